@@ -10,6 +10,8 @@ from typing import List, Dict, Any, Optional, Callable
 from openai import OpenAI
 from pydantic import BaseModel
 
+from data.serialization import encode_json
+
 # Set up logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
@@ -193,9 +195,11 @@ class DirectAgent:
                     if function_name in self.function_map:
                         try:
                             result = self.function_map[function_name](**function_args)
-                            # Convert to string if necessary
-                            if not isinstance(result, str):
-                                result = json.dumps(result)
+                            # Convert to string if necessary (tools may return pre-encoded JSON bytes)
+                            if isinstance(result, bytes):
+                                result = result.decode('utf-8')
+                            elif not isinstance(result, str):
+                                result = encode_json(result).decode('utf-8')
                                 
                             tool_outputs.append({
                                 "tool_call_id": tool_call_id,
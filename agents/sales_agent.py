@@ -51,6 +51,8 @@ class SalesAgent(BaseAgent):
             self._forecast_sales,
             self._calculate_average_ticket,
             self._analyze_top_sellers,
+            self._aggregate_sales,
+            self._sales_trend,
             self._calculate_conversion_rate,
             self._analyze_customer_retention,
             self._analyze_sales_channels,
@@ -61,24 +63,17 @@ class SalesAgent(BaseAgent):
         super().__init__("Sales Agent", data_manager, description, instructions, tools)
         self.sales_df = None
 
-    def _load_and_prepare_data(self):
-        if self.sales_df is None:
-            sales_data = self.data_manager.get_sales_data()
-            print(f"DEBUG: Raw sales data type: {type(sales_data)}")
-            print(f"DEBUG: Raw sales data keys: {sales_data.keys() if isinstance(sales_data, dict) else 'Not a dict'}")
-            if isinstance(sales_data, dict) and 'raw_data' in sales_data:
-                self.sales_df = pd.DataFrame(sales_data)
-            else:
-                print("ERROR: Expected sales_data to be a dictionary with 'raw_data' key")
-                self.sales_df = pd.DataFrame()
-
-            print(f"DEBUG: sales_df columns: {self.sales_df.columns}")
-            print(f"DEBUG: sales_df shape: {self.sales_df.shape}")
+    def _load_and_prepare_data(self, columns: List[str]):
+        # The sales store is already typed and shared; read only the columns a
+        # tool uses, so a lazily mapped store never loads the others
+        store = self.data_manager.get_sales_store()
+        if store is not None:
+            self.sales_df = store.take(columns=[col for col in columns if col in store.columns])
+        else:
+            logger.error("No transactional sales data available")
+            self.sales_df = pd.DataFrame()
 
-            if 'FECHA' in self.sales_df.columns:
-                self.sales_df['FECHA'] = pd.to_datetime(self.sales_df['FECHA'], errors='coerce')
-            if 'IMPORTE_TOTAL' in self.sales_df.columns:
-                self.sales_df['IMPORTE_TOTAL'] = self.sales_df['IMPORTE_TOTAL'].astype(float)
+        logger.debug(f"sales_df shape: {self.sales_df.shape}")
     @function_tool(
         name_override="get_sales_metrics",
         description_override="Get sales metrics from the latest data."
@@ -206,7 +201,7 @@ class SalesAgent(BaseAgent):
     description_override="Calculate the average ticket value of customers."
     )
     async def _calculate_average_ticket(self, context: RunContextWrapper[AgentContext]) -> Dict[str, Any]:
-        self._load_and_prepare_data()
+        self._load_and_prepare_data(['IMPORTE_TOTAL'])
         avg_ticket = self.sales_df['IMPORTE_TOTAL'].mean()
         return {"average_ticket": avg_ticket}
     
@@ -216,46 +211,118 @@ class SalesAgent(BaseAgent):
     )
     async def _analyze_top_sellers(self, context: RunContextWrapper[AgentContext], top_n: int = 5) -> Dict[str, Any]:
         try:
-            print("DEBUG: Entering _analyze_top_sellers function")
-            sales_data = self.data_manager.get_sales_data()
-            print(f"DEBUG: Sales data keys: {sales_data.keys()}")
+            logger.debug("Entering _analyze_top_sellers function")
+            # Seller totals are computed once per data version by the derived metrics registry
+            analysis = self.data_manager.get_sales_aggregation('analisis_vendedores')
+            if analysis:
+                return {"top_sellers": {row['NOMBRE_ASESOR']: row['VENTAS_TOTALES'] for row in analysis[:top_n]}}
 
-            if 'raw_data' in sales_data and isinstance(sales_data['raw_data'], list):
-                # Assuming raw_data is a list of dictionaries
-                df = pd.DataFrame(sales_data['raw_data'])
-                print(f"DEBUG: Raw data columns: {df.columns}")
-                if 'NOMBRE_ASESOR' in df.columns and 'IMPORTE_TOTAL' in df.columns:
-                    top_sellers = df.groupby('NOMBRE_ASESOR')['IMPORTE_TOTAL'].sum().nlargest(top_n)
+            store = self.data_manager.get_sales_store()
+            if store is not None:
+                # Without NOMBRE_ASESOR, group on alternative columns of the columnar table
+                columns = store.columns
+                logger.debug(f"Raw data columns: {columns}")
+                seller_column = next((col for col in columns if 'ASESOR' in col.upper() or 'VENDEDOR' in col.upper()), None)
+                amount_column = next((col for col in columns if 'IMPORTE' in col.upper() or 'VENTA' in col.upper()), None)
+                
+                if seller_column and amount_column:
+                    df = store.take(columns=[seller_column, amount_column])
+                    top_sellers = df.groupby(seller_column, observed=True)[amount_column].sum().nlargest(top_n)
                     return {"top_sellers": top_sellers.to_dict()}
-                else:
-                    # If the expected columns are not present, check for alternatives
-                    seller_column = next((col for col in df.columns if 'ASESOR' in col.upper() or 'VENDEDOR' in col.upper()), None)
-                    amount_column = next((col for col in df.columns if 'IMPORTE' in col.upper() or 'VENTA' in col.upper()), None)
-                    
-                    if seller_column and amount_column:
-                        top_sellers = df.groupby(seller_column)[amount_column].sum().nlargest(top_n)
-                        return {"top_sellers": top_sellers.to_dict()}
-                    else:
-                        return {"error": "No se encontraron columnas adecuadas para analizar los mejores vendedores"}
-            elif 'aggregations' in sales_data and 'by_rep' in sales_data['aggregations']:
-                print(f"DEBUG: Aggregation keys: {sales_data['aggregations'].keys()}")
-                # If there's already an aggregation by rep, use it
+                return {"error": "No se encontraron columnas adecuadas para analizar los mejores vendedores"}
+            # Without transactional rows, fall back to a precomputed aggregation by rep
+            sales_data = self.data_manager.get_sales_data()
+            if 'aggregations' in sales_data and 'by_rep' in sales_data['aggregations']:
+                logger.debug(f"Aggregation keys: {sales_data['aggregations'].keys()}")
                 top_sellers = pd.Series(sales_data['aggregations']['by_rep']).nlargest(top_n)
                 return {"top_sellers": top_sellers.to_dict()}
-            else:
-                return {"error": "No se encontraron datos adecuados para analizar los mejores vendedores"}
+            return {"error": "No se encontraron datos adecuados para analizar los mejores vendedores"}
         except Exception as e:
             logger.error(f"Error analyzing top sellers: {str(e)}")
             return {"error": str(e)}
     
+    @function_tool(
+        name_override="aggregate_sales",
+        description_override="Aggregate sales by any dimensions (e.g. VENDEDOR, CLIENTE, LINEA, AÑO, MES) with sum/count/mean/nunique/min/max metrics."
+    )
+    async def _aggregate_sales(
+        self,
+        context: RunContextWrapper[AgentContext],
+        dimensions: List[str] = None,
+        metrics: List[str] = None,
+        filters: Dict[str, Any] = None,
+        top_n: int = None,
+        sort_by: str = None
+    ) -> Dict[str, Any]:
+        """
+        Aggregate sales along any dimensions
+        
+        Args:
+            context: Agent context wrapper
+            dimensions: Group-by columns
+            metrics: Metrics as "COLUMNA:funcion" strings, e.g. "IMPORTE_TOTAL:sum"
+            filters: Optional filter specification
+            top_n: Optional number of groups to return
+            sort_by: Optional output column to sort by
+            
+        Returns:
+            Dictionary containing the aggregated records
+        """
+        try:
+            return self.data_manager.aggregate_sales(
+                filters=filters,
+                dimensions=dimensions,
+                metrics=metrics,
+                top_n=top_n,
+                sort_by=sort_by
+            )
+        except Exception as e:
+            logger.error(f"Error aggregating sales: {str(e)}")
+            return {"error": str(e)}
+    
+    @function_tool(
+        name_override="sales_trend",
+        description_override="Sales KPIs for the last N months, weeks or quarters, with period-over-period and year-over-year changes and running totals."
+    )
+    async def _sales_trend(
+        self,
+        context: RunContextWrapper[AgentContext],
+        frequency: str = "month",  # Options: month, week, quarter
+        last_n: int = 6,
+        filters: Dict[str, Any] = None
+    ) -> Dict[str, Any]:
+        """
+        Get rolling-window sales KPIs
+        
+        Args:
+            context: Agent context wrapper
+            frequency: Period granularity (month, week or quarter)
+            last_n: Number of periods ending at the current one
+            filters: Optional filter specification
+            
+        Returns:
+            Dictionary with one record per period
+        """
+        try:
+            return self.data_manager.get_sales_time_series(
+                frequency=frequency,
+                last_n=last_n,
+                filters=filters
+            )
+        except Exception as e:
+            logger.error(f"Error getting sales trend: {str(e)}")
+            return {"error": str(e)}
+    
     @function_tool(
         name_override="analyze_customer_retention",
         description_override="Analyze customer retention rate and lifetime value."
     )
     async def _analyze_customer_retention(self, context: RunContextWrapper[AgentContext]) -> Dict[str, Any]:
-        self._load_and_prepare_data()
+        self._load_and_prepare_data(['CLIENTE'])
         # This is a simplified version and would need more sophisticated logic in a real scenario
         repeat_customers = self.sales_df['CLIENTE'].value_counts()
+        # Encoded dimensions report every dictionary value; keep observed clients only
+        repeat_customers = repeat_customers[repeat_customers > 0]
         retention_rate = (repeat_customers > 1).sum() / len(repeat_customers) * 100
         return {"retention_rate": retention_rate}
     
@@ -264,8 +331,8 @@ class SalesAgent(BaseAgent):
         description_override="Analyze the performance of different sales channels."
     )
     async def _analyze_sales_channels(self, context: RunContextWrapper[AgentContext]) -> Dict[str, Any]:
-        self._load_and_prepare_data()
-        channel_performance = self.sales_df.groupby('VENDEDOR')['IMPORTE_TOTAL'].sum().sort_values(ascending=False)
+        self._load_and_prepare_data(['VENDEDOR', 'IMPORTE_TOTAL'])
+        channel_performance = self.sales_df.groupby('VENDEDOR', observed=True)['IMPORTE_TOTAL'].sum().sort_values(ascending=False)
         return {"channel_performance": channel_performance.to_dict()}
     
         if "total de ventas" in question.lower():
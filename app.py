@@ -21,6 +21,14 @@ logger = logging.getLogger(__name__)
 from data.data_manager import DataManager
 from agents.triage_agent import create_triage_agent
 from endpoints.data_endpoints import setup_data_scheduler
+from endpoints.sales_api import create_sales_blueprint
+import config
+
+# Ingest worker processes import this script again when it is run directly
+# (forkserver and spawn start methods); they only transform data
+if __name__ == '__mp_main__':
+    config.DATA_WARM_UP = False
+    config.DATA_REFRESHER = False
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -32,8 +40,11 @@ data_manager = DataManager()
 # Create triage agent and all specialized agents
 triage_agent = create_triage_agent(data_manager)
 
-# Setup daily data fetching scheduler
-setup_data_scheduler(data_manager)
+# Setup the data refresh scheduler (the workers elect one leader that refreshes)
+scheduler = setup_data_scheduler(data_manager) if config.DATA_REFRESHER else None
+
+# Paginated and streamed sales rows
+app.register_blueprint(create_sales_blueprint(data_manager))
 
 @app.route('/')
 def home():
@@ -71,16 +82,23 @@ async def query():
 def refresh_data():
     """Manually trigger data refresh"""
     try:
-        data_manager.refresh_all_data()
-        return jsonify({"status": "success", "message": "Data refreshed successfully"})
+        report = data_manager.refresh_all_data()
+        return jsonify({"status": "success", "message": "Data refreshed successfully", "report": report})
     except Exception as e:
         logger.error(f"Error refreshing data: {str(e)}")
         return jsonify({"error": str(e)}), 500
 
+@app.route('/api/data/schedule', methods=['GET'])
+def data_schedule():
+    """Last and next refresh of every data domain"""
+    if scheduler is None:
+        return jsonify({"error": "Data refresh scheduler not running in this process"}), 404
+    return jsonify(scheduler.status())
+
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({"status": "healthy"})
+    return jsonify({"status": "healthy", "data": data_manager.data_readiness()})
 
 if __name__ == '__main__':
     # This is only used for development
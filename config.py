@@ -2,6 +2,7 @@
 Configuration settings for the Decision Making Assistant
 """
 import os
+import json
 from dotenv import load_dotenv
 
 # Load environment variables
@@ -15,18 +16,115 @@ OPENAI_MODEL = os.getenv('OPENAI_MODEL', 'gpt-4o')
 AGENT_TEMPERATURE = float(os.getenv('AGENT_TEMPERATURE', '0.2'))
 AGENT_MAX_TOKENS = int(os.getenv('AGENT_MAX_TOKENS', '4000'))
 
+def _data_endpoint(domain: str):
+    """
+    Endpoint of a domain: its URL, or a dictionary with the URL and the
+    pagination settings when <DOMAIN>_DATA_PAGINATION is set (a style name,
+    cursor, offset or link, or a JSON object such as
+    {"style": "cursor", "page_size": 5000, "next_field": "meta.next"})
+    """
+    url = os.getenv(f'{domain}_DATA_ENDPOINT', '')
+    pagination = os.getenv(f'{domain}_DATA_PAGINATION', '').strip()
+    if not url or not pagination:
+        return url
+    options = json.loads(pagination) if pagination.startswith('{') else {'style': pagination}
+    return {'url': url, 'pagination': options}
+
 # Data endpoints
 DATA_REFRESH_INTERVAL = int(os.getenv('DATA_REFRESH_INTERVAL', '86400'))  # 24 hours in seconds
 DATA_ENDPOINTS = {
-    'marketing': os.getenv('MARKETING_DATA_ENDPOINT', ''),
-    'sales': os.getenv('SALES_DATA_ENDPOINT', ''),
-    'logistics': os.getenv('LOGISTICS_DATA_ENDPOINT', ''),
-    'collection': os.getenv('COLLECTION_DATA_ENDPOINT', '')
+    'marketing': _data_endpoint('MARKETING'),
+    'sales': _data_endpoint('SALES'),
+    'logistics': _data_endpoint('LOGISTICS'),
+    'collection': _data_endpoint('COLLECTION')
+}
+DATA_PAGE_CONCURRENCY = int(os.getenv('DATA_PAGE_CONCURRENCY', '4'))  # pages fetched at once when the total is known
+
+# Refresh schedule of every domain: interval in seconds or cron expression
+# (minute hour day month weekday, e.g. "0 6 * * 1-5"), plus a random delay of up to
+# DATA_REFRESH_JITTER seconds. One process per host refreshes; the others retry
+# the leader lock every DATA_LEADER_RETRY seconds
+DATA_REFRESH_SCHEDULES = {
+    'marketing': os.getenv('MARKETING_REFRESH_SCHEDULE', str(DATA_REFRESH_INTERVAL)),
+    'sales': os.getenv('SALES_REFRESH_SCHEDULE', str(DATA_REFRESH_INTERVAL)),
+    'logistics': os.getenv('LOGISTICS_REFRESH_SCHEDULE', str(DATA_REFRESH_INTERVAL)),
+    'collection': os.getenv('COLLECTION_REFRESH_SCHEDULE', str(DATA_REFRESH_INTERVAL))
+}
+DATA_REFRESH_JITTER = float(os.getenv('DATA_REFRESH_JITTER', '30'))
+DATA_LEADER_RETRY = float(os.getenv('DATA_LEADER_RETRY', '30'))
+
+# HTTP client used to fetch the endpoints: timeouts in seconds, retries with
+# exponential backoff and a circuit breaker per endpoint
+DATA_FETCH_CONNECT_TIMEOUT = float(os.getenv('DATA_FETCH_CONNECT_TIMEOUT', '5'))
+DATA_FETCH_READ_TIMEOUT = float(os.getenv('DATA_FETCH_READ_TIMEOUT', '30'))
+DATA_FETCH_RETRIES = int(os.getenv('DATA_FETCH_RETRIES', '3'))
+DATA_FETCH_BACKOFF = float(os.getenv('DATA_FETCH_BACKOFF', '0.5'))
+DATA_FETCH_MAX_BACKOFF = float(os.getenv('DATA_FETCH_MAX_BACKOFF', '30'))
+DATA_FETCH_BREAKER_THRESHOLD = int(os.getenv('DATA_FETCH_BREAKER_THRESHOLD', '5'))
+DATA_FETCH_BREAKER_RESET = float(os.getenv('DATA_FETCH_BREAKER_RESET', '60'))
+DATA_FETCH_POOL_SIZE = int(os.getenv('DATA_FETCH_POOL_SIZE', '10'))
+
+# Streaming download: large record payloads are parsed in chunks and typed in batches
+SALES_STREAM_FETCH = os.getenv('SALES_STREAM_FETCH', 'false').lower() == 'true'
+SALES_RECORDS_KEY = os.getenv('SALES_RECORDS_KEY', '')  # records array of an object payload; empty takes the first array
+DATA_STREAM_BATCH_SIZE = int(os.getenv('DATA_STREAM_BATCH_SIZE', '50000'))  # records per batch
+DATA_STREAM_CHUNK_BYTES = int(os.getenv('DATA_STREAM_CHUNK_BYTES', str(256 * 1024)))
+
+# Concurrent refresh: domains refreshed at once and deadline of each refresh in seconds
+DATA_REFRESH_CONCURRENCY = int(os.getenv('DATA_REFRESH_CONCURRENCY', '4'))
+DATA_REFRESH_TIMEOUT = float(os.getenv('DATA_REFRESH_TIMEOUT', '300'))
+DATA_REFRESH_TIMEOUTS = {
+    'marketing': float(os.getenv('MARKETING_REFRESH_TIMEOUT', DATA_REFRESH_TIMEOUT)),
+    'sales': float(os.getenv('SALES_REFRESH_TIMEOUT', DATA_REFRESH_TIMEOUT)),
+    'logistics': float(os.getenv('LOGISTICS_REFRESH_TIMEOUT', DATA_REFRESH_TIMEOUT)),
+    'collection': float(os.getenv('COLLECTION_REFRESH_TIMEOUT', DATA_REFRESH_TIMEOUT))
 }
 
+# Stale-while-revalidate: past its TTL a domain is still served while one background
+# refresh runs; past its hard limit requests wait for that refresh (seconds, 0 disables)
+DATA_TTLS = {
+    'marketing': float(os.getenv('MARKETING_DATA_TTL', 2 * DATA_REFRESH_INTERVAL)),
+    'sales': float(os.getenv('SALES_DATA_TTL', 2 * DATA_REFRESH_INTERVAL)),
+    'logistics': float(os.getenv('LOGISTICS_DATA_TTL', 2 * DATA_REFRESH_INTERVAL)),
+    'collection': float(os.getenv('COLLECTION_DATA_TTL', 2 * DATA_REFRESH_INTERVAL))
+}
+DATA_MAX_STALENESS = {
+    'marketing': float(os.getenv('MARKETING_MAX_STALENESS', '0')),
+    'sales': float(os.getenv('SALES_MAX_STALENESS', '0')),
+    'logistics': float(os.getenv('LOGISTICS_MAX_STALENESS', '0')),
+    'collection': float(os.getenv('COLLECTION_MAX_STALENESS', '0'))
+}
+DATA_REVALIDATE_INTERVAL = float(os.getenv('DATA_REVALIDATE_INTERVAL', '60'))  # minimum seconds between background refreshes of a domain
+
+# Worker processes parsing, typing and summarizing fetched data off the web
+# process (0 runs those stages in the refresh thread)
+DATA_INGEST_WORKERS = int(os.getenv('DATA_INGEST_WORKERS', '2'))
+DATA_INGEST_START_METHOD = os.getenv('DATA_INGEST_START_METHOD', '')  # forkserver or spawn; empty uses forkserver where available
+
+# Incremental sales refresh: only rows from the watermark on are requested
+SALES_INCREMENTAL_REFRESH = os.getenv('SALES_INCREMENTAL_REFRESH', 'false').lower() == 'true'
+SALES_WATERMARK_PARAM = os.getenv('SALES_WATERMARK_PARAM', 'since')
+SALES_WATERMARK_LOOKBACK_DAYS = int(os.getenv('SALES_WATERMARK_LOOKBACK_DAYS', '1'))
+SALES_KEY_COLUMN = os.getenv('SALES_KEY_COLUMN', '')  # e.g. FOLIO; empty replaces by date window
+
+# Raw sales row pagination and streaming
+SALES_PAGE_SIZE = int(os.getenv('SALES_PAGE_SIZE', '100'))
+SALES_MAX_PAGE_SIZE = int(os.getenv('SALES_MAX_PAGE_SIZE', '1000'))
+SALES_STREAM_CHUNK_SIZE = int(os.getenv('SALES_STREAM_CHUNK_SIZE', '1000'))
+# Matching row positions memoized for paging filtered rows (entries and total MB)
+SALES_POSITION_CACHE_SIZE = int(os.getenv('SALES_POSITION_CACHE_SIZE', '32'))
+SALES_POSITION_CACHE_MB = float(os.getenv('SALES_POSITION_CACHE_MB', '64'))
+
 # Data cache settings
 DATA_CACHE_DIR = os.path.join(os.path.dirname(__file__), 'data', 'cached')
 os.makedirs(DATA_CACHE_DIR, exist_ok=True)
+CACHE_GENERATIONS = int(os.getenv('CACHE_GENERATIONS', '3'))  # snapshot generations kept for rollback
+CACHE_PRUNE_GRACE = float(os.getenv('CACHE_PRUNE_GRACE', '3600'))  # seconds a replaced generation is kept for workers still reading it
+CACHE_SERIALIZER = os.getenv('CACHE_SERIALIZER', 'json')  # json, json+gzip or json+zstd
+DATA_WARM_UP = os.getenv('DATA_WARM_UP', 'true').lower() == 'true'  # pre-load cached domains in the background
+# Set to false in web workers when refresher.py publishes the snapshots for all of them
+DATA_REFRESHER = os.getenv('DATA_REFRESHER', 'true').lower() == 'true'
+DATA_ATTACH_INTERVAL = float(os.getenv('DATA_ATTACH_INTERVAL', '2'))  # seconds between checks for new generations (0 disables)
 
 # Flask settings
 FLASK_SECRET_KEY = os.getenv('FLASK_SECRET_KEY', 'default-secret-key')
\ No newline at end of file
@@ -0,0 +1,292 @@
+"""
+Binary columnar on-disk cache for the sales data
+
+Snapshots are opened, not read: every column file is memory-mapped and only
+touched when a query first uses that column.
+"""
+import logging
+import os
+import threading
+from typing import Dict, Any, Optional
+
+import numpy as np
+import pandas as pd
+
+from .sales_store import ColumnSource, SalesStore
+from .sales_cube import Cuboid, SalesCube
+from .serialization import decode_json, encode_json
+
+logger = logging.getLogger(__name__)
+
+# Bumped whenever the on-disk layout changes; older snapshots are ignored
+CACHE_FORMAT_VERSION = 1
+
+MANIFEST_FILE = 'manifest.json'
+DICTIONARY_FILE = 'dictionary.json'
+SUMMARY_FILE = 'summary.json'
+
+# Keys of the sales data dictionary stored in the summary file
+SUMMARY_KEYS = ['aggregations', 'kpis', 'last_updated']
+
+# Summary key holding the derived metrics computed for the snapshot
+DERIVED_KEY = 'derived'
+
+
+def _write_json(path: str, value: Any):
+    with open(path, 'wb') as f:
+        f.write(encode_json(value))
+
+
+def _read_json(path: str) -> Any:
+    with open(path, 'rb') as f:
+        return decode_json(f.read())
+
+
+def write_table(directory: str, frame: pd.DataFrame, dictionary: Optional[pd.Index]) -> Dict[str, Any]:
+    """
+    Write every column of a frame as a typed .npy file
+
+    Dictionary-encoded columns are written as their integer codes; their
+    values live once in the shared dictionary file.
+
+    Args:
+        directory: Target directory (created if missing)
+        frame: Table to write
+        dictionary: Shared value table of the snapshot
+
+    Returns:
+        Table specification for the manifest
+    """
+    os.makedirs(directory, exist_ok=True)
+    columns = []
+    for i, name in enumerate(frame.columns):
+        series = frame[name]
+        spec = {'name': name, 'file': f"c{i}.npy"}
+        if isinstance(series.dtype, pd.CategoricalDtype):
+            spec['kind'] = 'category'
+            categories = series.cat.categories
+            if dictionary is None or not categories.equals(dictionary):
+                spec['categories'] = list(categories)
+            values = series.cat.codes.to_numpy()
+        elif pd.api.types.is_datetime64_any_dtype(series):
+            spec['kind'] = 'datetime'
+            # Keeps the column's own resolution (datetime64[us] under pandas 3)
+            values = series.to_numpy()
+        elif pd.api.types.is_numeric_dtype(series):
+            spec['kind'] = 'numeric'
+            if isinstance(series.dtype, np.dtype):
+                values = series.to_numpy()
+            else:
+                # Nullable columns (SEMANA) go to disk as their values plus a missing mask
+                spec['dtype'] = str(series.dtype)
+                spec['mask'] = f"c{i}.mask.npy"
+                mask = series.isna().to_numpy()
+                values = series.to_numpy(dtype=series.dtype.numpy_dtype, na_value=0)
+                np.save(os.path.join(directory, spec['mask']), mask, allow_pickle=False)
+        else:
+            # Text columns outside the shared dictionary: codes plus their own values
+            spec['kind'] = 'category'
+            codes, uniques = pd.factorize(series.to_numpy(dtype=object))
+            spec['categories'] = list(uniques)
+            spec['decode'] = True
+            values = codes
+        np.save(os.path.join(directory, spec['file']), values, allow_pickle=False)
+        columns.append(spec)
+    return {'rows': len(frame), 'columns': columns}
+
+
+def read_column(directory: str, spec: Dict[str, Any], dtype: Optional[pd.CategoricalDtype], mmap: bool = True) -> Any:
+    """
+    Read one column written by write_table
+
+    Args:
+        directory: Table directory
+        spec: Column specification from the manifest
+        dtype: Categorical dtype over the shared dictionary
+        mmap: Map the file read-only instead of reading it into memory
+
+    Returns:
+        Column values ready to be placed in a DataFrame
+    """
+    values = np.load(os.path.join(directory, spec['file']), mmap_mode='r' if mmap else None, allow_pickle=False)
+    if spec['kind'] == 'category':
+        column_dtype = dtype
+        if 'categories' in spec:
+            column_dtype = pd.CategoricalDtype(categories=pd.Index(spec['categories'], dtype=object))
+        # Codes were written by us against this dictionary: skip the full scan
+        categorical = pd.Categorical.from_codes(values, dtype=column_dtype, validate=False)
+        if spec.get('decode'):
+            return np.asarray(categorical, dtype=object)
+        return categorical
+    if 'mask' in spec:
+        mask = np.load(os.path.join(directory, spec['mask']), mmap_mode='r' if mmap else None, allow_pickle=False)
+        return pd.api.types.pandas_dtype(spec['dtype']).construct_array_type()(values, mask)
+    return values
+
+
+def read_table(directory: str, spec: Dict[str, Any], dtype: Optional[pd.CategoricalDtype]) -> pd.DataFrame:
+    """
+    Read a whole table written by write_table into memory
+
+    Args:
+        directory: Table directory
+        spec: Table specification from the manifest
+        dtype: Categorical dtype over the shared dictionary
+
+    Returns:
+        DataFrame with the original column types
+    """
+    columns = {col['name']: read_column(directory, col, dtype, mmap=False) for col in spec['columns']}
+    return pd.DataFrame(columns, index=pd.RangeIndex(spec['rows']))
+
+
+class SnapshotDictionary:
+    """
+    Shared value table of a snapshot, read on first use.
+
+    Tables that only touch numeric or date columns never read it.
+    """
+    def __init__(self, path: str):
+        self._path = path
+        self._dtype = None
+        self._read = False
+        self._lock = threading.Lock()
+
+    @property
+    def dtype(self) -> Optional[pd.CategoricalDtype]:
+        """Categorical dtype over the shared values, None if the snapshot has no dimensions"""
+        if not self._read:
+            with self._lock:
+                if not self._read:
+                    values = _read_json(self._path)
+                    if values is not None:
+                        self._dtype = pd.CategoricalDtype(categories=pd.Index(values, dtype=object))
+                    self._read = True
+        return self._dtype
+
+
+class MappedTable(ColumnSource):
+    """
+    Table of a snapshot whose columns are memory-mapped on first access
+    """
+    def __init__(self, directory: str, spec: Dict[str, Any], dictionary: SnapshotDictionary):
+        """
+        Initialize the table
+
+        Args:
+            directory: Table directory
+            spec: Table specification from the manifest
+            dictionary: Shared value table of the snapshot
+        """
+        self._directory = directory
+        self._specs = {col['name']: col for col in spec['columns']}
+        self._rows = spec['rows']
+        self._dictionary = dictionary
+
+    @property
+    def columns(self):
+        return list(self._specs)
+
+    @property
+    def rows(self) -> int:
+        return self._rows
+
+    @property
+    def dictionary(self) -> Optional[pd.Index]:
+        dtype = self._dictionary.dtype
+        return dtype.categories if dtype is not None else None
+
+    def load(self, name: str) -> Any:
+        spec = self._specs[name]
+        dtype = self._dictionary.dtype if spec['kind'] == 'category' and 'categories' not in spec else None
+        return read_column(self._directory, spec, dtype)
+
+
+def is_sales_snapshot(directory: str) -> bool:
+    """Whether a directory holds a columnar sales snapshot"""
+    return os.path.exists(os.path.join(directory, MANIFEST_FILE))
+
+
+def write_sales_snapshot(directory: str, sales_data: Dict[str, Any], derived: Optional[Dict[str, Any]] = None):
+    """
+    Write the sales store, its cube and its summary as a columnar snapshot
+
+    Args:
+        directory: Empty directory receiving the snapshot
+        sales_data: Sales data dictionary backed by a SalesStore
+        derived: Optional derived metric values of the store, stored in the
+            summary so readers can serve them without opening the columns
+    """
+    os.makedirs(directory, exist_ok=True)
+
+    store = sales_data['store']
+    dictionary = store.dictionary
+    tables = {'store': write_table(os.path.join(directory, 'store'), store.frame, dictionary)}
+
+    cube = sales_data.get('cube')
+    cuboids = []
+    if cube is not None:
+        for i, cuboid in enumerate(cube.cuboids):
+            name = f"cube/{i}"
+            tables[name] = write_table(os.path.join(directory, 'cube', str(i)), cuboid.frame, dictionary)
+            cuboids.append({'table': name, 'dimensions': cuboid.dimensions, 'from_rows': cuboid.from_rows})
+
+    _write_json(os.path.join(directory, DICTIONARY_FILE), list(dictionary) if dictionary is not None else None)
+    summary = {k: sales_data[k] for k in SUMMARY_KEYS if k in sales_data}
+    if derived:
+        summary[DERIVED_KEY] = derived
+    _write_json(os.path.join(directory, SUMMARY_FILE), summary)
+    # The manifest goes last: a snapshot without one is never read
+    _write_json(os.path.join(directory, MANIFEST_FILE), {
+        'format': CACHE_FORMAT_VERSION,
+        'tables': tables,
+        'cuboids': cuboids
+    })
+
+
+def open_sales_snapshot(directory: str) -> Optional[Dict[str, Any]]:
+    """
+    Open a columnar sales snapshot
+
+    Only the manifest and the summary (aggregations and KPIs) are read
+    here; the store and cube columns are memory-mapped when first used, so
+    opening costs the same whatever the size of the history.
+
+    Args:
+        directory: Snapshot directory
+
+    Returns:
+        Sales data dictionary backed by a SalesStore (with the persisted
+        derived metrics under ``derived``), or None if there is no usable
+        snapshot
+    """
+    manifest_path = os.path.join(directory, MANIFEST_FILE)
+    if not os.path.exists(manifest_path):
+        return None
+    manifest = _read_json(manifest_path)
+    if manifest.get('format') != CACHE_FORMAT_VERSION:
+        logger.warning(f"Ignoring sales cache with format {manifest.get('format')}")
+        return None
+
+    dictionary = SnapshotDictionary(os.path.join(directory, DICTIONARY_FILE))
+    tables = manifest['tables']
+    store = SalesStore(MappedTable(os.path.join(directory, 'store'), tables['store'], dictionary))
+
+    cube = None
+    if manifest.get('cuboids'):
+        cuboids = [
+            Cuboid(
+                MappedTable(os.path.join(directory, *entry['table'].split('/')), tables[entry['table']], dictionary),
+                entry['dimensions'],
+                from_rows=entry['from_rows']
+            )
+            for entry in manifest['cuboids']
+        ]
+        cube = SalesCube(cuboids, version=store.version)
+
+    sales_data = _read_json(os.path.join(directory, SUMMARY_FILE))
+    sales_data.setdefault('aggregations', {})
+    sales_data.setdefault('kpis', {})
+    sales_data['store'] = store
+    sales_data['cube'] = cube
+    return sales_data
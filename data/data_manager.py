@@ -5,11 +5,36 @@ import os
 import json
 import logging
 import datetime
+import itertools
+import queue
+import threading
+import time
+import numpy as np
 import pandas as pd
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, Iterator, List, Optional
 import traceback
 
 
+from .sales_store import SalesStore, SalesStoreBuilder, frame_to_records
+from .sales_cube import SalesCube
+from .derived_metrics import AGGREGATION, KPI, DerivedMetricsRegistry
+from .time_series import TimeSeriesEngine
+from .columnar_cache import is_sales_snapshot, open_sales_snapshot, write_sales_snapshot
+from .domain_loader import DomainLoader
+from .domain_snapshot import DomainSnapshot, freeze
+from .ingest_pool import build_domain, build_sales, get_ingest_pool, run_in_pool
+from .serialization import EncodedCache, decode_json, encode_json, get_serializer
+from .snapshots import POINTER_FILE, SnapshotStore, content_hash, read_json_snapshot, write_json_snapshot
+from .sales_pagination import CursorError, clamp_page_size, decode_cursor, encode_cursor, page_slice
+from .sales_filters import compile_filters, normalize_filters
+from .sales_aggregation import (
+    AggregationCache,
+    aggregate_frame,
+    metric_names,
+    parse_metrics,
+    resolve_aggregation,
+    validate_request
+)
 from utils.data_processors import (
     process_marketing_data,
     process_sales_data,
@@ -20,211 +45,996 @@ import config
 
 logger = logging.getLogger(__name__)
 
+# Data domains, in warm-up order
+DATA_TYPES = ['marketing', 'sales', 'logistics', 'collection']
+
+# Version tags of the installed domain data
+_data_versions = itertools.count(1)
+
+
+def _count_rows(data: Any) -> int:
+    """
+    Count the records held by a domain's data
+    
+    Args:
+        data: Domain data (sales dictionary backed by a SalesStore, or a
+            dictionary of record lists)
+        
+    Returns:
+        Number of rows (sales transactions, or list entries)
+    """
+    if not isinstance(data, dict):
+        return 0
+    if isinstance(data.get('store'), SalesStore):
+        return len(data['store'])
+    return sum(len(value) for value in data.values() if isinstance(value, list))
+
+
+class _DomainData:
+    """
+    Data attribute of one domain, loaded from the local cache on first read
+
+    Reading returns the data of the current snapshot; assigning publishes a
+    new snapshot (see DataManager._publish).
+    """
+    def __init__(self, data_type: str):
+        self.data_type = data_type
+
+    def __get__(self, manager, owner=None):
+        if manager is None:
+            return self
+        snapshot = manager._current_snapshot(self.data_type)
+        return snapshot.data if snapshot is not None else None
+
+    def __set__(self, manager, value):
+        manager._publish(self.data_type, value)
+
+
 class DataManager:
     """
     Data manager for fetching and caching data from various sources
     """
+    _marketing_data = _DomainData('marketing')
+    _sales_data = _DomainData('sales')
+    _logistics_data = _DomainData('logistics')
+    _collection_data = _DomainData('collection')
+
     def __init__(self):
         """Initialize the data manager"""
         self.cache_dir = config.DATA_CACHE_DIR
-        self._marketing_data = None
-        self._sales_data = None
-        self._logistics_data = None
-        self._collection_data = None
+        # Published snapshot of every domain, replaced whole on each refresh
+        self._snapshots: Dict[str, DomainSnapshot] = {}
+        self._loader = DomainLoader(self._load_domain, DATA_TYPES, on_missing=self._refresh_in_background)
+        self._aggregation_cache = AggregationCache()
+        # Row positions of filtered pages, kept apart so they cannot crowd out the small results
+        self._position_cache = AggregationCache(
+            max_size=config.SALES_POSITION_CACHE_SIZE,
+            max_bytes=int(config.SALES_POSITION_CACHE_MB * 1024 * 1024)
+        )
+        self._derived_metrics = DerivedMetricsRegistry()
+        self._time_series = TimeSeriesEngine()
+        # Published cache generation of every domain (generation, hash, path)
+        self._snapshot_meta = {}
+        # Serializer of the JSON snapshots and pre-encoded response bytes
+        self._serializer = get_serializer(config.CACHE_SERIALIZER)
+        self._encoded = EncodedCache()
+        # Outcome of the latest refresh of every domain (bytes, modified, error)
+        self._refresh_runs = {}
+        # Generations published by another process are attached on read
+        self._attach_checks = {}
+        self._attach_lock = threading.Lock()
+        # Whether this process may fetch a missing domain (see set_refresh_gate)
+        self._refresh_gate = lambda: True
+        # Refreshes in flight (domain -> event set when done) and last background start
+        self._refreshing = {}
+        self._revalidated_at = {}
+        self._refresh_lock = threading.Lock()
+        
+        # Pre-load the cached domains without blocking startup
+        if config.DATA_WARM_UP:
+            self.warm_up()
+    
+    def warm_up(self):
+        """Load every domain from the local cache in a background thread"""
+        return self._loader.warm_up()
+    
+    def snapshot(self, data_type: str) -> Optional[DomainSnapshot]:
+        """
+        Get the current snapshot of a domain, revalidating it if stale
+        
+        Read from the local cache on first access. The snapshot is
+        immutable: hold it for a whole request to see one consistent
+        version while refreshes publish newer ones.
+        
+        Stale-while-revalidate: past its TTL (config.DATA_TTLS) the
+        snapshot is still returned at once while a single background
+        refresh runs. Past the hard limit (config.DATA_MAX_STALENESS) the
+        request waits for that refresh, up to the domain's refresh timeout.
+        
+        Args:
+            data_type: Type of data (marketing, sales, etc.)
+            
+        Returns:
+            The published snapshot, or None if the domain has no data yet
+        """
+        snapshot = self._current_snapshot(data_type)
+        ttl = config.DATA_TTLS.get(data_type, 0)
+        if snapshot is None or ttl <= 0:
+            return snapshot
+        age = time.time() - snapshot.fetched
+        if age <= ttl:
+            return snapshot
+        
+        done = self._refresh_in_background(data_type)
+        limit = config.DATA_MAX_STALENESS.get(data_type, 0)
+        if done is not None and 0 < limit < age:
+            logger.warning(f"{data_type} data is {age:.0f}s old (hard limit {limit:g}s), waiting for the refresh")
+            done.wait(config.DATA_REFRESH_TIMEOUTS[data_type])
+            snapshot = self._snapshots.get(data_type, snapshot)
+        return snapshot
+    
+    def _current_snapshot(self, data_type: str) -> Optional[DomainSnapshot]:
+        """Current snapshot of a domain, without revalidation"""
+        self._loader.ensure(data_type)
+        self._follow_snapshot(data_type)
+        return self._snapshots.get(data_type)
+    
+    def freshness(self, data_type: str, snapshot: Optional[DomainSnapshot] = None) -> Dict[str, Any]:
+        """
+        Describe how old a domain's data is
+        
+        Args:
+            data_type: Type of data (marketing, sales, etc.)
+            snapshot: Snapshot the response is built from (defaults to the current one)
+            
+        Returns:
+            Dictionary with age_seconds, fetched_at (when the data was last
+            fetched or confirmed from its source), stale (past its TTL) and
+            expired (past its hard limit)
+        """
+        snapshot = snapshot or self._snapshots.get(data_type)
+        if snapshot is None:
+            return {"age_seconds": None, "fetched_at": None, "stale": True, "expired": False}
+        age = max(0.0, time.time() - snapshot.fetched)
+        ttl = config.DATA_TTLS.get(data_type, 0)
+        limit = config.DATA_MAX_STALENESS.get(data_type, 0)
+        return {
+            "age_seconds": round(age, 1),
+            "fetched_at": datetime.datetime.fromtimestamp(snapshot.fetched).isoformat(),
+            "stale": 0 < ttl < age,
+            "expired": 0 < limit < age
+        }
+    
+    def _publish(self, data_type: str, data: Any, fetched: Optional[float] = None) -> DomainSnapshot:
+        """
+        Make fully built data the domain's current snapshot
+        
+        The data is frozen and swapped in with a single reference
+        assignment; readers never see a partly built version and never
+        wait for a refresh.
+        
+        Args:
+            data_type: Type of data (marketing, sales, etc.)
+            data: New domain data, not modified after this call
+            fetched: When the data was fetched from its source (defaults to now)
+            
+        Returns:
+            The published snapshot
+        """
+        current = self._snapshots.get(data_type)
+        if current is not None and current.data is data:
+            snapshot = current
+        else:
+            # A new object is a new version: its cached encodings are stale
+            now = time.time()
+            snapshot = DomainSnapshot(freeze(data), next(_data_versions), now, fetched or now)
+            self._snapshots[data_type] = snapshot
+        self._loader.mark_loaded(data_type)
+        # Data published here is newer than any generation already on disk
+        self._attach_checks[data_type] = (time.monotonic(), self._pointer_mtime(data_type))
+        return snapshot
+    
+    def _mark_fresh(self, data_type: str, fetched: Optional[float] = None):
+        """
+        Record that the source still matches the current snapshot
+        
+        Args:
+            data_type: Type of data (marketing, sales, etc.)
+            fetched: When the source was checked (defaults to now)
+        """
+        current = self._snapshots.get(data_type)
+        fetched = fetched or time.time()
+        if current is not None and fetched > current.fetched:
+            # Same data and version: cached encodings stay valid
+            self._snapshots[data_type] = current._replace(fetched=fetched)
+    
+    @staticmethod
+    def _meta_fetched(meta: Dict[str, Any]) -> Optional[float]:
+        """When a generation's data was last fetched or confirmed, from its metadata"""
+        stamp = meta.get('validated') or meta.get('created')
+        return datetime.datetime.fromisoformat(stamp).timestamp() if stamp else None
+    
+    def set_refresh_gate(self, gate: Callable[[], bool]):
+        """
+        Restrict background refreshes of missing domains to one process
         
-        # Load cached data if available
-        self._load_cached_data()
+        Args:
+            gate: Function returning whether this process refreshes the data
+                (e.g. whether it holds the scheduler's leader lock)
+        """
+        self._refresh_gate = gate
+    
+    def data_readiness(self) -> Dict[str, Any]:
+        """
+        Report the load state of every data domain
+        
+        Returns:
+            Dictionary domain -> status (pending, loading, ready, missing,
+            failed), load time, cache generation and freshness, plus an
+            overall flag
+        """
+        domains = self._loader.readiness()
+        for data_type, state in domains.items():
+            meta = self._snapshot_meta.get(data_type)
+            if meta is not None:
+                state['generation'] = meta.get('generation')
+            if self._snapshots.get(data_type) is not None:
+                state['freshness'] = self.freshness(data_type)
+        return {
+            "ready": all(state['status'] == 'ready' for state in domains.values()),
+            "domains": domains
+        }
     
     def _load_cached_data(self):
-        """Load data from cache files if they exist"""
-        data_types = ['marketing', 'sales', 'logistics', 'collection']
-        
-        for data_type in data_types:
-            cache_file = os.path.join(self.cache_dir, f"{data_type}_data.json")
-            if os.path.exists(cache_file):
-                try:
-                    with open(cache_file, 'r') as f:
-                        data = json.load(f)
-                    
-                    # Convert list format to proper dictionary structure for sales data
-                    if data_type == 'sales' and isinstance(data, list):
-                        data = {
-                            "raw_data": data,
-                            "aggregations": {},
-                            "kpis": {
-                                "total_ventas": sum(item.get('IMPORTE_TOTAL', 0) for item in data),
-                                "total_transacciones": len(data),
-                                "ultima_actualizacion": datetime.datetime.now().isoformat()
-                            }
-                        }
-                    
-                    # Set the data to the appropriate attribute
-                    setattr(self, f"_{data_type}_data", data)
-                    logger.info(f"Loaded cached {data_type} data from {cache_file}")
-                except Exception as e:
-                    logger.error(f"Error loading cached {data_type} data: {str(e)}")
+        """Load every domain from the local cache now"""
+        for data_type in DATA_TYPES:
+            self._loader.ensure(data_type)
     
-    def _save_cached_data(self, data_type: str, data: Dict[str, Any]):
+    def _load_domain(self, data_type: str) -> bool:
         """
-        Save data to cache file
+        Load one domain from the local cache (never from the network)
         
         Args:
             data_type: Type of data (marketing, sales, etc.)
-            data: Data to cache
+            
+        Returns:
+            True if data was found
         """
+        try:
+            if self._load_snapshot(data_type):
+                return True
+        except Exception as e:
+            logger.error(f"Error loading cached {data_type} snapshot: {str(e)}")
+        
         cache_file = os.path.join(self.cache_dir, f"{data_type}_data.json")
+        if os.path.exists(cache_file):
+            try:
+                with open(cache_file, 'r') as f:
+                    raw = json.load(f)
+                
+                # Build the columnar sales store once from the cached rows
+                data = self._sales_from_cache(raw) if data_type == 'sales' else raw
+                
+                # Publish it as last fetched when the cache file was written
+                self._publish(data_type, data, fetched=os.path.getmtime(cache_file))
+                logger.info(f"Loaded cached {data_type} data from {cache_file}")
+                
+                self._migrate_cache(data_type, cache_file, data, content_hash(raw))
+                return True
+            except Exception as e:
+                logger.error(f"Error loading cached {data_type} data: {str(e)}")
+        
+        if not config.DATA_ENDPOINTS.get(data_type) and config.DATA_REFRESHER:
+            # Without an endpoint the sample data is local and cheap to build
+            getattr(self, f"refresh_{data_type}_data")()
+            return self._snapshots.get(data_type) is not None
+        return False
+    
+    def _refresh_in_background(self, data_type: str) -> Optional[threading.Event]:
+        """
+        Fetch a missing or stale domain off the request path
+        
+        Concurrent calls share one refresh, and a domain is refreshed in
+        the background at most every config.DATA_REVALIDATE_INTERVAL
+        seconds, so a failing source is not retried on every request.
+        
+        Args:
+            data_type: Type of data (marketing, sales, etc.)
+            
+        Returns:
+            Event set when the refresh in flight finishes, or None if this
+            process does not refresh the domain now
+        """
+        if not config.DATA_REFRESHER or not self._refresh_gate():
+            # The refresher process publishes it; _follow_snapshot attaches it
+            return None
+        with self._refresh_lock:
+            done = self._refreshing.get(data_type)
+            if done is not None:
+                return done
+            started = self._revalidated_at.get(data_type)
+            if started is not None and time.monotonic() - started < config.DATA_REVALIDATE_INTERVAL:
+                return None
+            self._revalidated_at[data_type] = time.monotonic()
+            done = self._refreshing[data_type] = threading.Event()
+        threading.Thread(target=self._refresh_domain, args=(data_type,), name=f"refresh-{data_type}", daemon=True).start()
+        return done
+    
+    def _snapshot_store(self, data_type: str) -> SnapshotStore:
+        """
+        Get the generation store of a domain
+        
+        Args:
+            data_type: Type of data (marketing, sales, etc.)
+            
+        Returns:
+            Snapshot store under the cache directory
+        """
+        return SnapshotStore(os.path.join(self.cache_dir, data_type), keep=config.CACHE_GENERATIONS, grace=config.CACHE_PRUNE_GRACE)
+    
+    def _install_snapshot(
+        self,
+        data_type: str,
+        directory: str,
+        fetched: Optional[float] = None,
+        source_hash: Optional[str] = None
+    ) -> bool:
+        """
+        Read one snapshot generation and make it the domain's data
+        
+        Columnar sales snapshots are only opened (columns are memory-mapped
+        on first use) and their persisted derived metrics are seeded. JSON
+        snapshots are decoded once and their bytes kept as the domain's
+        pre-encoded form.
+        
+        Args:
+            data_type: Type of data (marketing, sales, etc.)
+            directory: Generation directory
+            fetched: When the data was fetched from its source
+            source_hash: Content hash of the generation
+            
+        Returns:
+            True if the snapshot was usable
+        """
+        if not is_sales_snapshot(directory):
+            encoded = read_json_snapshot(directory, self._serializer)
+            snapshot = self._publish(data_type, decode_json(encoded), fetched=fetched)
+            self._encoded.put((data_type, None), snapshot.version, encoded)
+            return True
+        
+        data = open_sales_snapshot(directory)
+        if data is None:
+            return False
+        data['store'].snapshot_hash = source_hash
+        derived = data.pop('derived', None)
+        if derived:
+            self._derived_metrics.seed(data['store'].version, derived)
+        self._publish(data_type, data, fetched=fetched)
+        return True
+    
+    def _load_snapshot(self, data_type: str) -> bool:
+        """
+        Load the published cache generation of a domain
+        
+        Args:
+            data_type: Type of data (marketing, sales, etc.)
+            
+        Returns:
+            True if a snapshot was loaded
+        """
+        snapshots = self._snapshot_store(data_type)
+        meta = snapshots.current()
+        if meta is None:
+            # Columnar sales cache written before generations existed
+            if data_type == 'sales' and is_sales_snapshot(snapshots.root):
+                meta = {'generation': 0, 'hash': None, 'path': snapshots.root}
+            else:
+                return False
+        
+        if not self._install_snapshot(data_type, meta['path'], fetched=self._meta_fetched(meta), source_hash=meta['hash']):
+            return False
+        self._snapshot_meta[data_type] = meta
+        logger.info(f"Loaded cached {data_type} data (generation {meta['generation']})")
+        return True
+    
+    def _migrate_cache(self, data_type: str, cache_file: str, data: Any, source_hash: str):
+        """
+        Convert a legacy JSON cache file into a snapshot generation
+        
+        The JSON file is renamed once the snapshot is published, so it is
+        parsed only this one time.
+        
+        Args:
+            data_type: Type of data (marketing, sales, etc.)
+            cache_file: Path of the legacy JSON cache
+            data: Data loaded from it
+            source_hash: Hash of the file content
+        """
+        if self._save_cached_data(data_type, data, source_hash=source_hash):
+            os.replace(cache_file, cache_file + '.migrated')
+            logger.info(f"Migrated {cache_file} to the snapshot cache")
+    
+    def _save_cached_data(
+        self,
+        data_type: str,
+        data: Dict[str, Any],
+        source_hash: Optional[str] = None,
+        extra: Optional[Dict[str, Any]] = None
+    ) -> bool:
+        """
+        Publish data as a new cache generation
+        
+        The snapshot is written to a temporary directory and published with
+        an atomic rename; nothing is written if the content hash matches the
+        current generation.
+        
+        Args:
+            data_type: Type of data (marketing, sales, etc.)
+            data: Data to cache
+            source_hash: Hash of the source content the data was built from
+            extra: Additional metadata stored with the generation
+            
+        Returns:
+            True if the data is on disk (published now or already current)
+        """
+        if isinstance(data, dict) and isinstance(data.get('store'), SalesStore):
+            # Sales are written as typed column files next to their summary
+            derived = self._derived_metrics.snapshot(data)
+            write = lambda directory: write_sales_snapshot(directory, data, derived=derived)
+            if source_hash is None:
+                source_hash = content_hash(data['store'].frame)
+        else:
+            # The same bytes later answer API and tool requests
+            current = self._snapshots.get(data_type)
+            payload = self._encode_snapshot(data_type, current) if current is not None and current.data is data else data
+            write = lambda directory: write_json_snapshot(directory, payload, self._serializer)
+            if source_hash is None:
+                source_hash = content_hash({k: v for k, v in data.items() if k != 'last_updated'})
+        
         try:
-            os.makedirs(os.path.dirname(cache_file), exist_ok=True)
-            with open(cache_file, 'w') as f:
-                json.dump(data, f, indent=2)
-            logger.info(f"Saved {data_type} data to cache file {cache_file}")
+            snapshots = self._snapshot_store(data_type)
+            meta = snapshots.publish(write, source_hash, extra=extra)
+            if meta is not None:
+                self._snapshot_meta[data_type] = meta
+                logger.info(f"Saved {data_type} data to cache generation {meta['generation']}")
+            else:
+                # Same content: the published generation is confirmed fresh
+                snapshots.validate()
+            if isinstance(data, dict) and isinstance(data.get('store'), SalesStore):
+                # Cursors issued here stay valid in every process attaching the generation
+                data['store'].snapshot_hash = source_hash
+            return True
         except Exception as e:
             logger.error(f"Error saving {data_type} data to cache: {str(e)}")
+            return False
+    
+    def get_encoded_data(self, data_type: str, key: Optional[str] = None) -> bytes:
+        """
+        Get a domain (or one of its top-level entries) as JSON bytes
+        
+        The bytes are encoded once per data version, so repeated API and
+        tool responses over unchanged data never re-encode it; only the
+        small freshness entry is appended per call.
+        
+        Args:
+            data_type: Dict-shaped domain (marketing, logistics, collection)
+            key: Optional top-level key to encode alone
+            
+        Returns:
+            JSON bytes of an object that also carries the freshness entry
+        """
+        snapshot = self.snapshot(data_type)
+        encoded = self._encode_snapshot(data_type, snapshot, key)
+        freshness = b'"freshness":' + encode_json(self.freshness(data_type, snapshot))
+        body = encoded.rstrip()[:-1].rstrip()
+        return body + (b',' if body != b'{' else b'') + freshness + b'}'
+    
+    def _encode_snapshot(self, data_type: str, snapshot: Optional[DomainSnapshot], key: Optional[str] = None) -> bytes:
+        """Encode a snapshot (or one entry), cached against its version"""
+        data = (snapshot.data if snapshot is not None else None) or {}
+        version = snapshot.version if snapshot is not None else None
+        value = (lambda: data) if key is None else (lambda: {key: data.get(key)})
+        return self._encoded.get((data_type, key), version, value)
+    
+    def _fetch_source(
+        self,
+        data_type: str,
+        endpoint: Any,
+        since: Optional[Any] = None,
+        on_batch: Optional[Callable[[List[Dict[str, Any]]], None]] = None,
+        records_key: Optional[str] = None,
+        parse: bool = True
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Fetch a domain's endpoint unless it is unchanged since the loaded generation
+        
+        The ETag, Last-Modified and payload hash of the response a
+        generation was built from are stored with it, so the request is
+        conditional even right after a restart. Paginated endpoints are
+        fetched page by page; their pages reach on_batch as they arrive.
+        
+        Args:
+            data_type: Type of data (marketing, sales, etc.)
+            endpoint: Entry of config.DATA_ENDPOINTS (URL, or URL with pagination)
+            since: Optional watermark for endpoints returning deltas (delta
+                requests are never conditional)
+            on_batch: Stream the payload, passing its records to this
+                function in batches instead of returning them parsed
+            records_key: Key of the records array when streaming an object payload
+            parse: Decode a plain JSON response here; if False its data is
+                the raw bytes, left for a worker process to parse (paginated
+                endpoints are always decoded page by page)
+            
+        Returns:
+            Fetch result (data, validators, bytes), or None if the source
+            is unchanged and processing and saving can be skipped
+        """
+        from endpoints.data_endpoints import fetch_data_conditional, fetch_data_stream
+        from endpoints.pagination import endpoint_pagination, endpoint_url, fetch_pages
+        # Load the cached generation first: its validators make the request conditional
+        loaded = self._loader.ensure(data_type, notify=False)
+        meta = self._snapshot_meta.get(data_type) or {}
+        validators = None
+        if since is None and loaded:
+            validators = {key: meta.get(key) for key in ('etag', 'last_modified', 'hash')}
+        
+        if endpoint_pagination(endpoint) is not None:
+            records = []
+            fetched = fetch_pages(
+                endpoint,
+                on_batch or records.extend,
+                validators=validators,
+                since=since,
+                since_param=config.SALES_WATERMARK_PARAM
+            )
+            fetched['data'] = None if on_batch is not None else records
+        elif on_batch is not None:
+            fetched = fetch_data_stream(
+                endpoint_url(endpoint),
+                on_batch,
+                validators=validators,
+                since=since,
+                since_param=config.SALES_WATERMARK_PARAM,
+                records_key=records_key
+            )
+        else:
+            fetched = fetch_data_conditional(
+                endpoint_url(endpoint),
+                validators=validators,
+                since=since,
+                since_param=config.SALES_WATERMARK_PARAM,
+                parse=parse
+            )
+        self._refresh_runs.setdefault(data_type, {}).update(bytes=fetched['bytes'], modified=fetched['modified'])
+        if not fetched['modified']:
+            logger.info(f"{data_type} source unchanged (generation {meta.get('generation')}), skipping refresh")
+            self._mark_fresh(data_type)
+            self._snapshot_store(data_type).validate()
+            return None
+        return fetched
+    
+    def _source_meta(self, fetched: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Get the response validators stored with a generation
+        
+        Args:
+            fetched: Fetch result
+            
+        Returns:
+            Dictionary with etag and last_modified
+        """
+        return {key: fetched['validators'].get(key) for key in ('etag', 'last_modified')}
+    
+    def _build_in_worker(
+        self,
+        data_type: str,
+        stage: Callable[..., Any],
+        args: tuple,
+        source_hash: str,
+        extra: Optional[Dict[str, Any]] = None
+    ) -> Any:
+        """
+        Run a refresh's parse, transform and aggregate stages in the ingest pool
+        
+        The worker writes the new cache generation itself and this process
+        attaches it like one published by another process: the sales
+        columns are memory-mapped from the files the worker wrote, so
+        nothing large is copied back and request threads never wait on the
+        GIL for the processing.
+        
+        Args:
+            data_type: Type of data (marketing, sales, etc.)
+            stage: Worker function of data.ingest_pool, called with args and
+                the generation directory to fill
+            args: Arguments of the stage
+            source_hash: Hash of the source content
+            extra: Additional metadata stored with the generation
+            
+        Returns:
+            Published data
+        """
+        snapshots = self._snapshot_store(data_type)
+        meta = snapshots.publish(lambda directory: run_in_pool(stage, *args, directory), source_hash, extra=extra)
+        if meta is not None:
+            logger.info(f"Saved {data_type} data to cache generation {meta['generation']} (built by an ingest worker)")
+            self._attach_generation(data_type, meta)
+        else:
+            # Same content: the published generation is confirmed fresh
+            meta = snapshots.validate()
+            if self._snapshots.get(data_type) is None and meta is not None:
+                self._attach_generation(data_type, meta)
+            self._mark_fresh(data_type)
+        snapshot = self._snapshots.get(data_type)
+        return snapshot.data if snapshot is not None else {}
+    
+    def cache_generations(self, data_type: str) -> Dict[str, Any]:
+        """
+        Describe the cache generations of a domain
+        
+        Args:
+            data_type: Type of data (marketing, sales, etc.)
+            
+        Returns:
+            Dictionary with the current generation, its hash and the
+            generations available for rollback
+        """
+        snapshots = self._snapshot_store(data_type)
+        meta = snapshots.current() or {}
+        return {
+            "current": meta.get('generation'),
+            "hash": meta.get('hash'),
+            "created": meta.get('created'),
+            "available": snapshots.generations()
+        }
+    
+    def rollback_cached_data(self, data_type: str, generation: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Restore an earlier cache generation of a domain and load it
+        
+        Args:
+            data_type: Type of data (marketing, sales, etc.)
+            generation: Generation to restore, defaults to the previous one
+            
+        Returns:
+            Metadata of the restored generation, or None if there is none
+        """
+        meta = self._snapshot_store(data_type).rollback(generation)
+        if meta is None:
+            return None
+        self._attach_generation(data_type, meta)
+        return meta
+    
+    def _attach_generation(self, data_type: str, meta: Dict[str, Any]):
+        """
+        Replace a domain's data with another published generation
+        
+        Args:
+            data_type: Type of data (marketing, sales, etc.)
+            meta: Generation metadata (generation, hash, path)
+        """
+        if data_type == 'sales':
+            self._aggregation_cache.clear()
+            self._position_cache.clear()
+            self._derived_metrics.invalidate()
+            self._time_series.clear()
+        if self._install_snapshot(data_type, meta['path'], fetched=self._meta_fetched(meta), source_hash=meta.get('hash')):
+            self._snapshot_meta[data_type] = meta
+    
+    def _pointer_mtime(self, data_type: str) -> Optional[int]:
+        """Modification time of a domain's generation pointer, None if unpublished"""
+        try:
+            return os.stat(os.path.join(self.cache_dir, data_type, POINTER_FILE)).st_mtime_ns
+        except OSError:
+            return None
+    
+    def _follow_snapshot(self, data_type: str):
+        """
+        Attach the generation another process published, if any
+        
+        Workers never refresh on their own when a separate refresher
+        process publishes the snapshots: they only notice the new pointer
+        and map its files. Sales columns stay memory-mapped read-only, so
+        every worker shares the same page cache instead of holding a copy.
+        The pointer is checked at most every config.DATA_ATTACH_INTERVAL
+        seconds and only read when its modification time changed.
+        
+        Args:
+            data_type: Type of data (marketing, sales, etc.)
+        """
+        interval = config.DATA_ATTACH_INTERVAL
+        now = time.monotonic()
+        checked_at, mtime = self._attach_checks.get(data_type, (None, None))
+        if interval <= 0 or (checked_at is not None and now - checked_at < interval):
+            return
+        # Readers never wait on an attach in progress: they get the current data
+        if not self._attach_lock.acquire(blocking=False):
+            return
+        try:
+            current_mtime = self._pointer_mtime(data_type)
+            self._attach_checks[data_type] = (now, current_mtime)
+            if current_mtime is None or current_mtime == mtime:
+                return
+            
+            meta = self._snapshot_store(data_type).current()
+            loaded = self._snapshot_meta.get(data_type) or {}
+            if meta is None:
+                return
+            if meta['generation'] == loaded.get('generation'):
+                # The refresher confirmed the source unchanged
+                self._mark_fresh(data_type, self._meta_fetched(meta))
+                return
+            self._attach_generation(data_type, meta)
+            logger.info(f"Attached {data_type} cache generation {meta['generation']} published by another process")
+        except Exception as e:
+            logger.error(f"Error attaching published {data_type} snapshot: {str(e)}")
+        finally:
+            self._attach_lock.release()
+    
+    def _sales_from_cache(self, data) -> Dict[str, Any]:
+        """
+        Convert cached sales data into the in-memory sales structure
+        
+        Args:
+            data: Cached sales data (list of records or dictionary with raw_data)
+            
+        Returns:
+            Sales data dictionary backed by a SalesStore
+        """
+        # Convert list format to proper dictionary structure for sales data
+        if isinstance(data, list):
+            return self._preprocess_sales_data(pd.DataFrame(data))
+        
+        if isinstance(data, dict) and isinstance(data.get('raw_data'), list):
+            sales_data = {k: v for k, v in data.items() if k != 'raw_data'}
+            sales_data['store'] = SalesStore.from_records(data['raw_data'])
+            sales_data['cube'] = SalesCube.from_store(sales_data['store'])
+            sales_data.setdefault('aggregations', {})
+            sales_data.setdefault('kpis', {})
+            return sales_data
+        
+        return data
+    
+    def get_sales_store(self) -> Optional[SalesStore]:
+        """
+        Get the columnar sales store
+        
+        Returns:
+            The current SalesStore, or None if no transactional data is loaded
+        """
+        sales = self._current_sales()
+        if isinstance(sales, dict):
+            return sales.get('store')
+        return None
+    
+    def _current_sales(self) -> Any:
+        """
+        Read the sales snapshot a request works on
+        
+        Callers read it once and use it throughout, so a refresh publishing
+        new data mid-request never mixes two versions.
+        
+        Returns:
+            Current sales data (sample data is published if there is none)
+        """
+        return self._current_sales_snapshot().data
+    
+    def _current_sales_snapshot(self) -> DomainSnapshot:
+        """
+        Read the sales snapshot a request works on, with its fetch time
+        
+        Returns:
+            Current sales snapshot (sample data is published if there is none)
+        """
+        snapshot = self.snapshot('sales')
+        if snapshot is None or not snapshot.data:
+            # Si no hay datos cargados, publicar datos de muestra
+            snapshot = self._publish('sales', self._get_sample_sales_data())
+        return snapshot
     
     def get_marketing_data(self) -> Dict[str, Any]:
         """
         Get marketing data
         
+        Read from the local cache on first access, never fetched here; empty
+        until the first refresh if nothing is cached. Past its TTL the data
+        is returned as is while a background refresh revalidates it.
+        
         Returns:
-            Marketing data dictionary
+            Marketing data dictionary, with a freshness entry (see freshness())
         """
-        if self._marketing_data is None:
-            self.refresh_marketing_data()
-        return self._marketing_data or {}
+        snapshot = self.snapshot('marketing')
+        data = snapshot.data if snapshot is not None else None
+        return dict(data or {}, freshness=self.freshness('marketing', snapshot))
     
-    def get_sales_data(self, filters=None, aggregation=None):
-        print(f"DEBUG: Solicitando datos de ventas. filters={filters}, aggregation={aggregation}")
+    def get_sales_data(self, filters=None, aggregation=None, cursor=None, limit=None):
+        logger.debug(f"Solicitando datos de ventas. filters={filters}, aggregation={aggregation}")
         
-        if not self._sales_data:
-            # Si no hay datos cargados, cargar datos de muestra
-            self._sales_data = self._get_sample_sales_data()
+        # Una sola lectura del snapshot para toda la solicitud
+        snapshot = self._current_sales_snapshot()
+        sales = snapshot.data
     
-        print(f"DEBUG: Tipo de self._sales_data: {type(self._sales_data)}")
-        print(f"DEBUG: Claves en self._sales_data: {self._sales_data.keys() if isinstance(self._sales_data, dict) else 'No es un diccionario'}")
+        logger.debug(f"Tipo de self._sales_data: {type(sales)}")
+        logger.debug(f"Claves en self._sales_data: {sales.keys() if isinstance(sales, dict) else 'No es un diccionario'}")
         
         # Asegurarse de que _sales_data tenga la estructura esperada
-        if not isinstance(self._sales_data, dict) or 'raw_data' not in self._sales_data:
-            print("ERROR: self._sales_data no tiene la estructura esperada")
+        if not isinstance(sales, dict) or 'store' not in sales:
+            logger.error("self._sales_data no tiene la estructura esperada")
             return {"error": "Estructura de datos inválida"}
         
-        # Crear DataFrame de vendedores
-        df_vendedores = pd.DataFrame(self._sales_data['raw_data'])
+        result = self._filter_and_aggregate_sales(filters, aggregation, cursor=cursor, limit=limit, sales=sales)
+        if isinstance(result, dict) and 'kpis' not in result:
+            result['kpis'] = self.get_sales_kpis(sales)
+        if isinstance(result, dict) and 'error' not in result:
+            result['freshness'] = self.freshness('sales', snapshot)
+        return result
+
+    def get_sales_kpis(self, sales: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        """
+        Get the sales KPIs, including the derived ones
         
-        if 'NOMBRE_ASESOR' in df_vendedores.columns and 'IMPORTE_TOTAL' in df_vendedores.columns:
-            vendedores_analysis = df_vendedores.groupby('NOMBRE_ASESOR').agg({
-                'IMPORTE_TOTAL': ['sum', 'mean', 'count'],
-                'CLIENTE': 'nunique'
-            }).reset_index()
-            
-            vendedores_analysis.columns = ['NOMBRE_ASESOR', 'VENTAS_TOTALES', 'VENTA_PROMEDIO', 'NUMERO_VENTAS', 'CLIENTES_UNICOS']
-            vendedores_analysis = vendedores_analysis.sort_values('VENTAS_TOTALES', ascending=False)
+        Derived KPIs (top_vendedor, promedio_ventas_por_vendedor...) are
+        computed once per data version; the shared KPI dictionary is never
+        modified.
+        
+        Args:
+            sales: Sales snapshot data the request works on (defaults to the current one)
+        
+        Returns:
+            New dictionary with the precomputed and derived KPIs
+        """
+        sales = self._sales_data if sales is None else sales
+        kpis = dict(sales.get('kpis', {})) if isinstance(sales, dict) else {}
+        kpis.update(self._derived_metrics.values(KPI, sales))
+        return kpis
+    
+    def get_sales_aggregation(self, name: str) -> Optional[Any]:
+        """
+        Get a precomputed or derived sales aggregation of the current data
+        
+        Derived aggregations (analisis_vendedores...) are computed once per
+        data version and then served from memory.
+        
+        Args:
+            name: Aggregation name
             
-            # Añadir este análisis a las agregaciones existentes
-            self._sales_data['aggregations']['analisis_vendedores'] = vendedores_analysis.to_dict('records')
+        Returns:
+            Aggregation records, or None if unknown or not computable
+        """
+        sales = self._current_sales()
+        if not isinstance(sales, dict):
+            return None
+        return self._get_sales_aggregation(name, sales)
+    
+    def _get_sales_aggregation(self, name: str, sales: Dict[str, Any]) -> Optional[Any]:
+        """
+        Get a precomputed or derived sales aggregation by name
+        
+        Args:
+            name: Aggregation name
+            sales: Sales snapshot data the request works on
             
-            # Añadir KPIs relacionados con vendedores
-            self._sales_data['kpis']['top_vendedor'] = vendedores_analysis.iloc[0]['NOMBRE_ASESOR']
-            self._sales_data['kpis']['total_vendedores'] = len(vendedores_analysis)
-            self._sales_data['kpis']['promedio_ventas_por_vendedor'] = vendedores_analysis['VENTAS_TOTALES'].mean()
-        result = self._filter_and_aggregate_sales(filters, aggregation)
-        if isinstance(result, dict) and 'kpis' not in result:
-            result['kpis'] = self._sales_data('kpis',{})
-        return result
+        Returns:
+            Aggregation records, or None if unknown
+        """
+        aggregations = sales.get('aggregations', {})
+        if name in aggregations:
+            return aggregations[name]
+        if name in self._derived_metrics.names(AGGREGATION):
+            return self._derived_metrics.get(name, sales)
+        return None
 
     def _preprocess_sales_data(self, df):
         """
         Preprocesa los datos de ventas para un acceso y análisis eficiente
         
         Args:
-            df: DataFrame de pandas con los datos de ventas
+            df: DataFrame de pandas con los datos de ventas, o una tabla
+                columnar ya construida (p. ej. por lotes durante la descarga)
             
         Returns:
-            Diccionario con datos procesados y métricas precalculadas
+            Diccionario con la tabla columnar, métricas y agregaciones precalculadas
         """
-        print(f"DEBUG: Iniciando preprocesamiento de datos, shape={df.shape}")
+        logger.debug(f"Iniciando preprocesamiento de datos, shape={(len(df), len(df.columns))}")
         
-        # Asegurar que las fechas estén en formato datetime
-        if 'FECHA' in df.columns:
-            df['FECHA'] = pd.to_datetime(df['FECHA'], errors='coerce')
-            
-            # Añadir columnas calculadas útiles
-            df['MES'] = df['FECHA'].dt.month
-            df['AÑO'] = df['FECHA'].dt.year
-            df['TRIMESTRE'] = df['FECHA'].dt.quarter
-            df['SEMANA'] = df['FECHA'].dt.isocalendar().week
-            
-            print(f"DEBUG: Fechas procesadas y columnas temporales añadidas")
+        # Tipar las columnas una sola vez y construir la tabla columnar compartida
+        store = df if isinstance(df, SalesStore) else SalesStore.from_frame(df)
+        df = store.frame
+        logger.debug("Tabla columnar de ventas construida")
+
+        # Cubo preagregado para responder consultas agregadas sin recorrer filas
+        cube = SalesCube.from_store(store)
+
+        aggregations, kpis = self._summarize_sales(store, cube)
         
-        # Asegurar que los valores numéricos sean de tipo float
-        if 'IMPORTE_TOTAL' in df.columns:
-            df['IMPORTE_TOTAL'] = pd.to_numeric(df['IMPORTE_TOTAL'], errors='coerce')
-            print(f"DEBUG: IMPORTE_TOTAL convertido a numérico")
+        logger.debug(f"Preprocesamiento completado. Agregaciones: {len(aggregations)}, KPIs: {len(kpis)}")
         
-        if 'PRECIO_UNITARIO' in df.columns:
-            df['PRECIO_UNITARIO'] = pd.to_numeric(df['PRECIO_UNITARIO'], errors='coerce')
+        # Crear el diccionario con estructura correcta; los registros solo se
+        # materializan cuando un consumidor los pide explícitamente
+        processed_data = {
+            "store": store,  # Tabla columnar con todos los registros
+            "cube": cube,  # Cubo preagregado (None si faltan dimensiones)
+            "aggregations": aggregations,  # Diccionario con agregaciones precalculadas
+            "kpis": kpis  # Diccionario con KPIs precalculados
+        }
+        
+        logger.debug("Estructura de datos procesados creada correctamente")
+        return processed_data
+    
+    def _summarize_sales(self, store: SalesStore, cube: Optional[SalesCube]):
+        """
+        Calcula las agregaciones y KPIs precalculados de ventas
+        
+        Se resuelven sobre el cubo preagregado cuando es posible, de modo que
+        una ingesta incremental solo paga por los meses que cambiaron.
+        
+        Args:
+            store: Tabla columnar con los registros de ventas
+            cube: Cubo preagregado de la misma versión (o None)
+            
+        Returns:
+            Tupla (agregaciones, kpis)
+        """
+        df = store.frame
+        columns = set(df.columns)
+        
+        def aggregate(dimensions, metrics, filters=None):
+            return self._aggregate_records(store, cube, filters, dimensions, parse_metrics(metrics))
         
-        if 'CANTIDAD' in df.columns:
-            df['CANTIDAD'] = pd.to_numeric(df['CANTIDAD'], errors='coerce')
-
         # Calcular el total de ventas
-        total_ventas = df['IMPORTE_TOTAL'].sum() if 'IMPORTE_TOTAL' in df.columns else 0
-        print(f"DEBUG: Total de ventas calculado: {total_ventas}")
+        totals = aggregate([], {'IMPORTE_TOTAL': ['sum', 'mean']})[0] if 'IMPORTE_TOTAL' in columns else {}
+        total_ventas = totals.get('sum') or 0
+        logger.debug(f"Total de ventas calculado: {total_ventas}")
         
         # Realizar agregaciones precalculadas para consultas comunes
         aggregations = {}
-        print("DEBUG: Calculando agregaciones...")
+        logger.debug("Calculando agregaciones...")
         
-        if 'VENDEDOR' in df.columns and 'IMPORTE_TOTAL' in df.columns:
-            print("DEBUG: Calculando ventas_por_vendedor")
-            vendedor_agg = df.groupby('VENDEDOR')['IMPORTE_TOTAL'].agg(['sum', 'count', 'mean']).reset_index()
-            aggregations["ventas_por_vendedor"] = vendedor_agg.to_dict('records')
+        if 'VENDEDOR' in columns and 'IMPORTE_TOTAL' in columns:
+            logger.debug("Calculando ventas_por_vendedor")
+            aggregations["ventas_por_vendedor"] = aggregate(['VENDEDOR'], {'IMPORTE_TOTAL': ['sum', 'count', 'mean']})
         
-        if 'CLIENTE' in df.columns and 'IMPORTE_TOTAL' in df.columns:
-            print("DEBUG: Calculando ventas_por_cliente")
-            cliente_agg = df.groupby('CLIENTE')['IMPORTE_TOTAL'].agg(['sum', 'count', 'mean']).reset_index()
-            aggregations["ventas_por_cliente"] = cliente_agg.to_dict('records')
+        if 'CLIENTE' in columns and 'IMPORTE_TOTAL' in columns:
+            logger.debug("Calculando ventas_por_cliente")
+            aggregations["ventas_por_cliente"] = aggregate(['CLIENTE'], {'IMPORTE_TOTAL': ['sum', 'count', 'mean']})
         
-        if all(col in df.columns for col in ['AÑO', 'MES', 'IMPORTE_TOTAL']):
-            print("DEBUG: Calculando ventas_por_mes")
+        if all(col in columns for col in ['AÑO', 'MES', 'IMPORTE_TOTAL']):
+            logger.debug("Calculando ventas_por_mes")
             # Agrupar por año y mes
-            monthly_sales = df.groupby(['AÑO', 'MES'])['IMPORTE_TOTAL'].agg(['sum', 'count']).reset_index()
-            aggregations["ventas_por_mes"] = monthly_sales.to_dict('records')
-        
-        if 'ARTICULO' in df.columns and 'IMPORTE_TOTAL' in df.columns:
-            print("DEBUG: Calculando ventas_por_articulo")
-            articulo_agg = df.groupby('ARTICULO')['IMPORTE_TOTAL'].agg(['sum', 'count']).reset_index()
-            aggregations["ventas_por_articulo"] = articulo_agg.to_dict('records')
-        
-        if 'LINEA' in df.columns and 'IMPORTE_TOTAL' in df.columns:
-            print("DEBUG: Calculando ventas_por_linea")
-            linea_agg = df.groupby('LINEA')['IMPORTE_TOTAL'].agg(['sum', 'count']).reset_index()
-            aggregations["ventas_por_linea"] = linea_agg.to_dict('records')
+            aggregations["ventas_por_mes"] = aggregate(['AÑO', 'MES'], {'IMPORTE_TOTAL': ['sum', 'count']})
+        
+        if 'ARTICULO' in columns and 'IMPORTE_TOTAL' in columns:
+            logger.debug("Calculando ventas_por_articulo")
+            aggregations["ventas_por_articulo"] = aggregate(['ARTICULO'], {'IMPORTE_TOTAL': ['sum', 'count']})
+        
+        if 'LINEA' in columns and 'IMPORTE_TOTAL' in columns:
+            logger.debug("Calculando ventas_por_linea")
+            aggregations["ventas_por_linea"] = aggregate(['LINEA'], {'IMPORTE_TOTAL': ['sum', 'count']})
             
         # Agregar datos específicos para responder las preguntas de ventas
-        if 'TIPO_CLIENTE' in df.columns and 'CLIENTE' in df.columns and 'IMPORTE_TOTAL' in df.columns:
-            print("DEBUG: Calculando métricas por tipo de cliente")
-            tipo_cliente_agg = df.groupby('TIPO_CLIENTE')['IMPORTE_TOTAL'].agg(['sum', 'count', 'mean']).reset_index()
-            aggregations["ventas_por_tipo_cliente"] = tipo_cliente_agg.to_dict('records')
+        if 'TIPO_CLIENTE' in columns and 'CLIENTE' in columns and 'IMPORTE_TOTAL' in columns:
+            logger.debug("Calculando métricas por tipo de cliente")
+            aggregations["ventas_por_tipo_cliente"] = aggregate(['TIPO_CLIENTE'], {'IMPORTE_TOTAL': ['sum', 'count', 'mean']})
         
         # Para ciclo de ventas, agrupar por fecha
-        if 'FECHA' in df.columns and 'CLASIFICACION' in df.columns:
-            print("DEBUG: Analizando ciclo de ventas")
-            # Filtrar solo ventas completadas
-            ventas_df = df[df['CLASIFICACION'] == 'Ventas']
-            
-            ciclo_ventas_mensual = ventas_df.groupby(['AÑO', 'MES'])['IMPORTE_TOTAL'].agg(['sum', 'count', 'mean']).reset_index()
-            aggregations["ciclo_ventas_mensual"] = ciclo_ventas_mensual.to_dict('records')
+        if 'FECHA' in columns and 'CLASIFICACION' in columns:
+            logger.debug("Analizando ciclo de ventas")
+            # Solo ventas completadas
+            aggregations["ciclo_ventas_mensual"] = aggregate(
+                ['AÑO', 'MES'], {'IMPORTE_TOTAL': ['sum', 'count', 'mean']}, filters={'CLASIFICACION': 'Ventas'}
+            )
         
         # Para retención de clientes, necesitamos analizar transacciones repetidas
-        if 'CLIENTE' in df.columns and 'FECHA' in df.columns:
-            print("DEBUG: Calculando retención de clientes")
-            # Conseguir primera y última compra de cada cliente
-            cliente_compras = df.groupby('CLIENTE')['FECHA'].agg(['min', 'max', 'count']).reset_index()
-            cliente_compras.columns = ['CLIENTE', 'primera_compra', 'ultima_compra', 'total_compras']
+        if 'CLIENTE' in columns and 'FECHA' in columns:
+            logger.debug("Calculando retención de clientes")
+            # Compras con fecha de cada cliente
+            if cube is not None:
+                total_compras = cube.purchases_per_client()
+            else:
+                total_compras = df.groupby('CLIENTE', observed=True)['FECHA'].count()
             
             # Calcular si los clientes son recurrentes (más de una compra)
-            clientes_totales = cliente_compras.shape[0]
-            clientes_recurrentes = cliente_compras[cliente_compras['total_compras'] > 1].shape[0]
+            clientes_totales = int(len(total_compras))
+            clientes_recurrentes = int((total_compras > 1).sum())
             
             if clientes_totales > 0:
                 tasa_retencion = (clientes_recurrentes / clientes_totales) * 100
@@ -237,170 +1047,117 @@ class DataManager:
                 "tasa_retencion": tasa_retencion
             }
         
-        # Calcular KPIs críticos
-        current_date = datetime.datetime.now()
-        current_month = current_date.month
-        current_year = current_date.year
-        
-        # Filtrar datos del mes actual para KPIs actuales
-        current_month_data = df[(df['AÑO'] == current_year) & (df['MES'] == current_month)] if 'AÑO' in df.columns and 'MES' in df.columns else pd.DataFrame()
+        # Ventanas mensuales en una sola pasada agrupada (mes actual y últimos 6 meses)
+        dated = 'FECHA' in columns and 'IMPORTE_TOTAL' in columns
+        last_6 = self._time_series.window(store, 'month', 6) if dated else []
         
         kpis = {
             "total_ventas": float(total_ventas),
-            "ticket_promedio": float(df['IMPORTE_TOTAL'].mean()) if 'IMPORTE_TOTAL' in df.columns else 0,
-            "total_transacciones": len(df),
-            "total_clientes": df['CLIENTE'].nunique() if 'CLIENTE' in df.columns else 0,
-            "total_vendedores": df['VENDEDOR'].nunique() if 'VENDEDOR' in df.columns else 0,
-            "ventas_mes_actual": float(current_month_data['IMPORTE_TOTAL'].sum()) if not current_month_data.empty and 'IMPORTE_TOTAL' in current_month_data.columns else 0,
+            "ticket_promedio": float(totals['mean']) if totals.get('mean') is not None else 0,
+            "total_transacciones": len(store),
+            "total_clientes": aggregate([], {'CLIENTE': 'nunique'})[0]['nunique'] if 'CLIENTE' in columns else 0,
+            "total_vendedores": aggregate([], {'VENDEDOR': 'nunique'})[0]['nunique'] if 'VENDEDOR' in columns else 0,
+            "ventas_mes_actual": float(last_6[-1]['ventas']) if last_6 else 0,
             "ultima_actualizacion": datetime.datetime.now().isoformat()
         }
         
-        # Añadir datos de tendencia (últimos 6 meses si hay datos suficientes)
-        if 'FECHA' in df.columns and 'IMPORTE_TOTAL' in df.columns:
-            print("DEBUG: Calculando tendencia de últimos 6 meses")
-            # Obtener los últimos 6 meses
+        # Añadir datos de tendencia (últimos 6 meses con ventas, del más reciente al más antiguo)
+        if dated:
+            logger.debug("Calculando tendencia de últimos 6 meses")
             last_6_months = {}
-            today = datetime.datetime.now()
-            
-            for i in range(6):
-                target_date = today - datetime.timedelta(days=30 * i)
-                month_key = f"{target_date.year}-{target_date.month:02d}"
-                
-                month_data = df[
-                    (df['FECHA'].dt.year == target_date.year) & 
-                    (df['FECHA'].dt.month == target_date.month)
-                ]
-                
-                if not month_data.empty:
-                    last_6_months[month_key] = {
-                        "ventas": float(month_data['IMPORTE_TOTAL'].sum()),
-                        "transacciones": len(month_data),
-                        "clientes": month_data['CLIENTE'].nunique() if 'CLIENTE' in month_data else 0,
-                        "ticket_promedio": float(month_data['IMPORTE_TOTAL'].mean()) if 'IMPORTE_TOTAL' in month_data.columns else 0
+            for month in reversed(last_6):
+                if month['transacciones']:
+                    last_6_months[month['periodo']] = {
+                        "ventas": month['ventas'],
+                        "transacciones": month['transacciones'],
+                        "clientes": month.get('clientes', 0),
+                        "ticket_promedio": month['ticket_promedio']
                     }
             
             kpis["tendencia_6_meses"] = last_6_months
         
-        print(f"DEBUG: Preprocesamiento completado. Agregaciones: {len(aggregations)}, KPIs: {len(kpis)}")
-        
-        # Convertir el DataFrame a lista de diccionarios para formato raw_data
-        raw_data = df.to_dict(orient='records')
-        
-        # Crear el diccionario con estructura correcta
-        processed_data = {
-            "raw_data": raw_data,  # Lista de diccionarios con todos los registros
-            "aggregations": aggregations,  # Diccionario con agregaciones precalculadas
-            "kpis": kpis  # Diccionario con KPIs precalculados
-        }
-        
-        print(f"DEBUG: Estructura de datos procesados creada correctamente")
-        return processed_data
+        return aggregations, kpis
     
-    def _filter_and_aggregate_sales(self, filters=None, aggregation=None):
+    def _filter_and_aggregate_sales(self, filters=None, aggregation=None, cursor=None, limit=None, sales=None):
         """
         Aplica filtros y agregaciones a los datos de ventas
+        
+        Sin agregación, las filas se devuelven paginadas (ver get_sales_rows).
+        Toda la solicitud usa el mismo snapshot ``sales`` (por defecto el actual).
         """
-        print(f"DEBUG _filter_and_aggregate_sales: Iniciando con filters={filters}, aggregation={aggregation}")
-        print(f"DEBUG: Tipo de self._sales_data en _filter_and_aggregate_sales: {type(self._sales_data)}")
+        sales = self._current_sales() if sales is None else sales
+        logger.debug(f"_filter_and_aggregate_sales: iniciando con filters={filters}, aggregation={aggregation}")
+        logger.debug(f"Tipo de self._sales_data en _filter_and_aggregate_sales: {type(sales)}")
 
-        # Format validation and conversion - single clean block
-        if isinstance(self._sales_data, list):
-            print("DEBUG: Converting list sales data to dictionary format")
-            self._sales_data = {
-                "raw_data": self._sales_data,
+        # Format validation and conversion - single clean block; the converted
+        # data is published as a new snapshot, never written into the current one
+        if isinstance(sales, list):
+            logger.debug("Converting list sales data to dictionary format")
+            sales = self._publish('sales', self._sales_from_cache(sales)).data
+        elif not isinstance(sales, dict):
+            logger.debug("Invalid data format, initializing empty structure")
+            sales = self._publish('sales', {
+                "store": SalesStore.from_records([]),
                 "aggregations": {},
                 "kpis": {"total_ventas": 0}
-            }
-        elif not isinstance(self._sales_data, dict):
-            print("DEBUG: Invalid data format, initializing empty structure")
-            self._sales_data = {
-                "raw_data": [],
-                "aggregations": {},
-                "kpis": {"total_ventas": 0}
-            }
+            }).data
         
-        if not self._sales_data:
-            print("DEBUG: self._sales_data está vacío")
-            return {"error": "No hay datos de ventas disponibles"}
-        if not self._sales_data:
+        if not sales:
+            logger.debug("self._sales_data está vacío")
             return {"error": "No hay datos de ventas disponibles"}
         
+        store = sales.get("store")
+        
         # Si no hay filtros ni agregación, devolver los KPIs generales
         if not filters and not aggregation:
             return {
-                "kpis": self._sales_data["kpis"],
+                "kpis": self.get_sales_kpis(sales),
                 "data_summary": {
-                    "total_records": len(self._sales_data["raw_data"]),
-                    "aggregations_available": list(self._sales_data["aggregations"].keys())
+                    "total_records": len(store) if store is not None else 0,
+                    "aggregations_available": list(sales["aggregations"].keys()) + list(self._derived_metrics.values(AGGREGATION, sales).keys())
                 }
             }
         
         # Si hay una agregación específica y está precalculada, devolverla directamente
-        if aggregation and not filters:
-            if aggregation in self._sales_data["aggregations"]:
+        if aggregation and not filters and isinstance(aggregation, str):
+            precomputed = self._get_sales_aggregation(aggregation, sales)
+            if precomputed is not None:
                 return {
                     "aggregation": aggregation,
-                    "data": self._sales_data["aggregations"][aggregation]
+                    "data": precomputed
                 }
         
-        # Si hay filtros, necesitamos aplicarlos a los datos crudos
-        if filters:
-            # Verificar que raw_data es una lista
-            raw_data = self._sales_data.get("raw_data", [])
-            if not isinstance(raw_data, list):
-                return {"error": "Los datos sin procesar no están en el formato esperado (lista)"}
-            
-            # Convertir datos crudos a DataFrame para filtrado eficiente
-            import pandas as pd
-            
-            # Verificar que hay datos para procesar
-            if not raw_data:
+        # Verificar que existe la tabla columnar
+        if not isinstance(store, SalesStore):
+            return {"error": "Los datos sin procesar no están en el formato esperado (tabla columnar)"}
+        
+        # Verificar que hay datos para procesar
+        if len(store) == 0:
+            return {
+                "filters": filters,
+                "aggregation": aggregation,
+                "result": "No hay datos disponibles para aplicar filtros",
+                "data": {}
+            }
+        
+        # Si hay agregación, resolverla con la API genérica de agrupación
+        if aggregation:
+            spec = resolve_aggregation(aggregation, store.columns)
+            if spec is None:
+                # Agregación no soportada: no devolver todas las filas filtradas
                 return {
                     "filters": filters,
                     "aggregation": aggregation,
-                    "result": "No hay datos disponibles para aplicar filtros",
-                    "data": {}
+                    "result": f"Agregación '{aggregation}' no soportada o faltan campos requeridos",
+                    "data": []
                 }
             
-            try:
-                df = pd.DataFrame(raw_data)
-            except Exception as e:
-                return {
-                    "error": f"Error al convertir datos a DataFrame: {str(e)}",
-                    "traceback": traceback.format_exc()
-                }
-            
-            # Aplicar cada filtro
-            for field, value in filters.items():
-                if field in df.columns:
-                    # Manejar diferentes tipos de filtros
-                    if isinstance(value, list):
-                        # Filtro por lista de valores
-                        df = df[df[field].isin(value)]
-                    elif isinstance(value, dict) and all(k in ['min', 'max'] for k in value.keys()):
-                        # Filtro por rango
-                        if 'min' in value and value['min'] is not None:
-                            df = df[df[field] >= value['min']]
-                        if 'max' in value and value['max'] is not None:
-                            df = df[df[field] <= value['max']]
-                    elif isinstance(value, dict) and 'regex' in value:
-                        # Filtro por expresión regular
-                        df = df[df[field].astype(str).str.contains(value['regex'], na=False)]
-                    elif isinstance(value, dict) and 'date_range' in value:
-                        # Filtro por rango de fechas
-                        if field == 'FECHA' and 'from' in value['date_range'] and 'to' in value['date_range']:
-                            try:
-                                from_date = pd.to_datetime(value['date_range']['from'])
-                                to_date = pd.to_datetime(value['date_range']['to'])
-                                df = df[(df[field] >= from_date) & (df[field] <= to_date)]
-                            except Exception as e:
-                                logger.warning(f"Error al procesar rango de fechas: {str(e)}")
-                    else:
-                        # Filtro simple por valor exacto
-                        df = df[df[field] == value]
+            result = self._aggregate_sales(sales, filters=filters, **spec)
+            if "error" in result:
+                return result
             
             # Si después de filtrar no quedan datos, devolver resultado vacío
-            if len(df) == 0:
+            if not result["data"]:
                 return {
                     "filters": filters,
                     "aggregation": aggregation,
@@ -408,83 +1165,309 @@ class DataManager:
                     "data": {}
                 }
             
-            # Si hay agregación, aplicarla a los datos filtrados
-            if aggregation:
-                try:
-                    if aggregation == "por_vendedor" and "VENDEDOR" in df.columns and "IMPORTE_TOTAL" in df.columns:
-                        result = df.groupby("VENDEDOR")["IMPORTE_TOTAL"].agg(['sum', 'count', 'mean']).reset_index()
-                        return {
-                            "filters": filters,
-                            "aggregation": aggregation,
-                            "data": result.to_dict(orient='records')
-                        }
-                    elif aggregation == "por_cliente" and "CLIENTE" in df.columns and "IMPORTE_TOTAL" in df.columns:
-                        result = df.groupby("CLIENTE")["IMPORTE_TOTAL"].agg(['sum', 'count', 'mean']).reset_index()
-                        return {
-                            "filters": filters,
-                            "aggregation": aggregation,
-                            "data": result.to_dict(orient='records')
-                        }
-                    elif aggregation == "por_mes" and "FECHA" in df.columns and "IMPORTE_TOTAL" in df.columns:
-                        # Asegurar que FECHA sea datetime
-                        df['FECHA'] = pd.to_datetime(df['FECHA'])
-                        df['MES'] = df['FECHA'].dt.month
-                        df['AÑO'] = df['FECHA'].dt.year
-                        result = df.groupby(['AÑO', 'MES'])['IMPORTE_TOTAL'].agg(['sum', 'count']).reset_index()
-                        return {
-                            "filters": filters,
-                            "aggregation": aggregation,
-                            "data": result.to_dict(orient='records')
-                        }
-                    else:
-                        # Agregación no soportada
-                        return {
-                            "filters": filters,
-                            "aggregation": aggregation,
-                            "result": f"Agregación '{aggregation}' no soportada o faltan campos requeridos",
-                            "data": df.to_dict(orient='records')
-                        }
-                except Exception as e:
-                    return {
-                        "error": f"Error al aplicar agregación: {str(e)}",
-                        "traceback": traceback.format_exc()
-                    }
-            
-            # Si no hay agregación, devolver los datos filtrados
             return {
                 "filters": filters,
-                "total_records": len(df),
-                "data": df.to_dict(orient='records')
+                "aggregation": aggregation,
+                "data": result["data"]
+            }
+        
+        # Sin agregación, devolver una página acotada de las filas filtradas
+        page = self.get_sales_rows(filters=filters, cursor=cursor, limit=limit, store=store)
+        if "error" in page:
+            return page
+        
+        # Si después de filtrar no quedan datos, devolver resultado vacío
+        if page["total_records"] == 0:
+            return {
+                "filters": filters,
+                "aggregation": aggregation,
+                "result": "No hay datos que cumplan con los filtros especificados",
+                "data": {}
             }
         
-        # Si llegamos aquí, la combinación de filtros y agregación no está soportada
+        return page
+    
+    def _matching_positions(self, store: SalesStore, filters) -> Any:
+        """
+        Get the positions of the rows matching a filter, memoized per version
+        
+        Without filters every row matches and no array is built or cached.
+        
+        Args:
+            store: Sales store to filter
+            filters: Filter specification
+            
+        Returns:
+            Sorted array of row positions, or a range over every row
+        """
+        if not filters:
+            return range(len(store))
+        key = normalize_filters(filters)
+        positions = self._position_cache.get(store.version, key)
+        if positions is None:
+            positions = compile_filters(filters).apply(store)
+            self._position_cache.put(store.version, key, positions)
+        return positions
+    
+    def get_sales_rows(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        cursor: Optional[str] = None,
+        limit: Optional[int] = None,
+        store: Optional[SalesStore] = None
+    ) -> Dict[str, Any]:
+        """
+        Get one page of filtered sales rows
+        
+        Rows keep the store order (FECHA, then load order), so paging is
+        stable for a given data version. Pass the returned ``next_cursor``
+        to get the following page; it is None on the last page.
+        
+        Args:
+            filters: Optional filter specification (same format as get_sales_data)
+            cursor: Cursor returned with the previous page
+            limit: Page size (config.SALES_PAGE_SIZE by default, capped at
+                config.SALES_MAX_PAGE_SIZE)
+            store: Sales store of the snapshot the request works on
+                (defaults to the current one)
+            
+        Returns:
+            Dictionary with the page records, total_records and next_cursor
+        """
+        store = self.get_sales_store() if store is None else store
+        if store is None:
+            return {"error": "No hay datos de ventas transaccionales disponibles"}
+        
+        limit = clamp_page_size(limit, config.SALES_PAGE_SIZE, config.SALES_MAX_PAGE_SIZE)
+        filters_key = normalize_filters(filters)
+        snapshot = self._cursor_snapshot(store)
+        try:
+            after = decode_cursor(cursor, snapshot, filters_key) if cursor else None
+        except CursorError as e:
+            return {"error": str(e)}
+        
+        positions = self._matching_positions(store, filters)
+        page, has_more = page_slice(positions, after, limit)
+        
         return {
-            "error": "Combinación de filtros y agregación no soportada",
             "filters": filters,
-            "aggregation": aggregation
+            "total_records": len(positions),
+            "limit": limit,
+            "data": store.to_records(page),
+            "next_cursor": encode_cursor(snapshot, page[-1], filters_key) if has_more else None
         }
     
+    @staticmethod
+    def _cursor_snapshot(store: SalesStore) -> str:
+        """
+        Identify the store content that row cursors are bound to
+        
+        Store versions are only unique within a process, so a published
+        store is identified by the content hash of its generation, which
+        every worker attaching it agrees on. A store that was never
+        published falls back to its process-local version.
+        
+        Args:
+            store: Sales store being paged
+            
+        Returns:
+            Snapshot identity stored in the cursor
+        """
+        return store.snapshot_hash or f"local-{store.version}"
+    
+    def iter_sales_rows(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        chunk_size: Optional[int] = None,
+        store: Optional[SalesStore] = None
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Iterate over every filtered sales row in bounded chunks
+        
+        The store read at the start is kept for the whole iteration, so a
+        refresh during a long export does not mix versions. Only one chunk
+        of records is materialized at a time.
+        
+        Args:
+            filters: Optional filter specification
+            chunk_size: Rows materialized per chunk (config.SALES_STREAM_CHUNK_SIZE by default)
+            store: Sales store of the snapshot the request works on
+                (defaults to the current one)
+            
+        Yields:
+            Row records in store order
+        """
+        store = self.get_sales_store() if store is None else store
+        if store is None:
+            return
+        chunk_size = chunk_size or config.SALES_STREAM_CHUNK_SIZE
+        positions = compile_filters(filters).apply(store) if filters else None
+        total = len(store) if positions is None else len(positions)
+        for start in range(0, total, chunk_size):
+            chunk = np.arange(start, min(start + chunk_size, total)) if positions is None else positions[start:start + chunk_size]
+            yield from store.to_records(chunk)
+    
+    def aggregate_sales(
+        self,
+        filters: Optional[Dict[str, Any]] = None,
+        dimensions: Optional[List[str]] = None,
+        metrics=None,
+        top_n: Optional[int] = None,
+        sort_by: Optional[str] = None,
+        ascending: bool = False
+    ) -> Dict[str, Any]:
+        """
+        Aggregate sales along any dimensions with any metrics
+        
+        Results are memoized per (filters, dimensions, metrics, sort, data
+        version); a refresh that installs a new store invalidates them.
+        
+        Args:
+            filters: Optional filter specification (same format as get_sales_data)
+            dimensions: Group-by columns, including derived AÑO/MES/TRIMESTRE/SEMANA
+            metrics: Metrics specification, e.g. {"IMPORTE_TOTAL": ["sum", "mean"]}
+            top_n: Optional number of groups to return
+            sort_by: Output column to sort by (defaults to the first metric with top_n)
+            ascending: Sort direction
+            
+        Returns:
+            Dictionary with the request echo and the aggregated records
+        """
+        return self._aggregate_sales(
+            self._current_sales(), filters=filters, dimensions=dimensions, metrics=metrics,
+            top_n=top_n, sort_by=sort_by, ascending=ascending
+        )
+    
+    def _aggregate_sales(self, sales, filters=None, dimensions=None, metrics=None, top_n=None, sort_by=None, ascending=False):
+        """Aggregate one sales snapshot (store and cube of the same version)"""
+        store = sales.get('store') if isinstance(sales, dict) else None
+        if store is None:
+            return {"error": "No hay datos de ventas transaccionales disponibles"}
+        
+        dimensions = list(dimensions or [])
+        metric_list = parse_metrics(metrics)
+        error = validate_request(store.columns, dimensions, metric_list)
+        if error:
+            return {"error": error}
+        
+        key = (
+            normalize_filters(filters), tuple(dimensions), tuple(metric_list),
+            top_n, sort_by, bool(ascending)
+        )
+        data = self._aggregation_cache.get(store.version, key)
+        if data is None:
+            try:
+                cube = sales.get('cube')
+                data = self._aggregate_records(
+                    store, cube, filters, dimensions, metric_list,
+                    top_n=top_n, sort_by=sort_by, ascending=ascending
+                )
+            except Exception as e:
+                return {
+                    "error": f"Error al aplicar agregación: {str(e)}",
+                    "traceback": traceback.format_exc()
+                }
+            self._aggregation_cache.put(store.version, key, data)
+        
+        return {
+            "filters": filters,
+            "dimensions": dimensions,
+            "metrics": metric_names(metric_list),
+            "data": data
+        }
+    
+    def get_sales_time_series(
+        self,
+        frequency: str = 'month',
+        last_n: int = 12,
+        end=None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> Dict[str, Any]:
+        """
+        Get rolling-window sales KPIs
+        
+        Args:
+            frequency: month, week or quarter
+            last_n: Number of periods to return, ending at ``end``
+            end: Date inside the last period (defaults to today)
+            filters: Optional filter specification (same format as get_sales_data)
+            
+        Returns:
+            Dictionary with one record per period (ventas, transacciones,
+            clientes, ticket_promedio, deltas vs the previous period and the
+            same period last year, running totals)
+        """
+        store = self.get_sales_store()
+        if store is None:
+            return {"error": "No hay datos de ventas transaccionales disponibles"}
+        if 'FECHA' not in store.columns or 'IMPORTE_TOTAL' not in store.columns:
+            return {"error": "Los datos de ventas no tienen FECHA o IMPORTE_TOTAL"}
+        
+        try:
+            periods = self._time_series.window(store, frequency, last_n, end=end, filters=filters)
+        except ValueError as e:
+            return {"error": str(e)}
+        
+        return {
+            "frequency": frequency,
+            "filters": filters,
+            "periods": periods
+        }
+    
+    def _aggregate_records(self, store: SalesStore, cube: Optional[SalesCube], filters, dimensions, metric_list, **options):
+        """
+        Aggregate from the pre-aggregated cube, falling back to the raw rows
+        
+        Args:
+            store: Sales store the request is validated against
+            cube: Cube built from the same store version (or None)
+            filters: Filter specification
+            dimensions: Group-by columns
+            metric_list: (column, function) pairs
+            **options: top_n, sort_by and ascending
+            
+        Returns:
+            Result records
+        """
+        if cube is not None and cube.version == store.version:
+            data = cube.answer(filters, dimensions, metric_list, store.columns, **options)
+            if data is not None:
+                return data
+        
+        # El cubo no cubre la consulta: agregar sobre las filas
+        positions = compile_filters(filters).apply(store) if filters else None
+        columns = list(dict.fromkeys(dimensions + [column for column, _ in metric_list]))
+        return aggregate_frame(store.take(positions, columns), dimensions, metric_list, **options)
+    
     def get_logistics_data(self) -> Dict[str, Any]:
         """
         Get logistics data
         
+        Read from the local cache on first access, never fetched here; empty
+        until the first refresh if nothing is cached. Past its TTL the data
+        is returned as is while a background refresh revalidates it.
+        
         Returns:
-            Logistics data dictionary
+            Logistics data dictionary, with a freshness entry (see freshness())
         """
-        if self._logistics_data is None:
-            self.refresh_logistics_data()
-        return self._logistics_data or {}
+        snapshot = self.snapshot('logistics')
+        data = snapshot.data if snapshot is not None else None
+        return dict(data or {}, freshness=self.freshness('logistics', snapshot))
     
     def get_collection_data(self) -> Dict[str, Any]:
         """
         Get collection data
         
+        Read from the local cache on first access, never fetched here; empty
+        until the first refresh if nothing is cached. Past its TTL the data
+        is returned as is while a background refresh revalidates it.
+        
         Returns:
-            Collection data dictionary
+            Collection data dictionary, with a freshness entry (see freshness())
         """
-        if self._collection_data is None:
-            self.refresh_collection_data()
-        return self._collection_data or {}
+        snapshot = self.snapshot('collection')
+        data = snapshot.data if snapshot is not None else None
+        return dict(data or {}, freshness=self.freshness('collection', snapshot))
     
     def refresh_marketing_data(self) -> Dict[str, Any]:
         """
@@ -501,31 +1484,51 @@ class DataManager:
             if not endpoint:
                 logger.info("Using sample marketing data (no endpoint configured)")
                 data = self._get_sample_marketing_data()
+                source_hash = content_hash(data)
+                source_meta = None
             else:
-                # In production, fetch from endpoint
-                from endpoints.data_endpoints import fetch_data
-                raw_data = fetch_data(endpoint)
-                data = process_marketing_data(raw_data)
+                # In production, fetch from endpoint (conditional request)
+                pool = get_ingest_pool()
+                fetched = self._fetch_source('marketing', endpoint, parse=pool is None)
+                if fetched is None:
+                    return self._marketing_data
+                source_hash = fetched['validators']['hash']
+                source_meta = self._source_meta(fetched)
+                if pool is not None:
+                    # Parsed and processed by a worker process, which writes the generation
+                    return self._build_in_worker(
+                        'marketing', build_domain, ('marketing', fetched['data'], config.CACHE_SERIALIZER),
+                        source_hash, source_meta
+                    )
+                data = process_marketing_data(fetched['data'])
             
             # Add timestamp
             data["last_updated"] = datetime.datetime.now().isoformat()
             
-            # Cache the data
-            self._marketing_data = data
-            self._save_cached_data('marketing', data)
+            # Publish the finished data with a single swap, then cache it
+            data = self._publish('marketing', data).data
+            self._save_cached_data('marketing', data, source_hash=source_hash, extra=source_meta)
             
             return data
         except Exception as e:
             logger.error(f"Error refreshing marketing data: {str(e)}")
+            self._refresh_runs.setdefault('marketing', {})['error'] = str(e)
             return {}
     
-    def refresh_sales_data(self) -> Dict[str, Any]:
+    def refresh_sales_data(self, incremental: Optional[bool] = None) -> Dict[str, Any]:
         """
         Refresh sales data from source
 
+        Args:
+            incremental: Only request rows from the current watermark on and
+                merge them into the loaded store (defaults to
+                config.SALES_INCREMENTAL_REFRESH)
+
         Returns:
             Updated sales data
         """
+        if incremental is None:
+            incremental = config.SALES_INCREMENTAL_REFRESH
         try:
             # Get sales data endpoint from config
             endpoint = config.DATA_ENDPOINTS.get('sales')
@@ -534,30 +1537,146 @@ class DataManager:
             if not endpoint:
                 logger.info("Using sample sales data (no endpoint configured)")
                 data = self._get_sample_sales_data()
+                source_hash = content_hash(data)
+                source_meta = None
             else:
-                # In production, fetch from endpoint
-                from endpoints.data_endpoints import fetch_data
-                raw_data = fetch_data(endpoint)
-                data = process_sales_data(raw_data)
+                # In production, fetch from endpoint (conditional unless a delta is requested)
+                since = self.sales_watermark() if incremental else None
+                # Deltas are merged in this process; full loads are built by a worker process
+                pool = get_ingest_pool() if since is None else None
+                if (config.SALES_STREAM_FETCH or isinstance(endpoint, dict)) and since is None:
+                    # Full exports are typed batch by batch (or page by page) while they download
+                    builder = SalesStoreBuilder()
+                    fetched = self._fetch_source(
+                        'sales', endpoint, since=since,
+                        on_batch=builder.add, records_key=config.SALES_RECORDS_KEY or None
+                    )
+                    if fetched is None:
+                        return self._sales_data
+                    data = builder.build()
+                else:
+                    fetched = self._fetch_source('sales', endpoint, since=since, parse=pool is None)
+                    if fetched is None:
+                        return self._sales_data
+                    data = fetched['data']
+                    if pool is None:
+                        data = data if isinstance(data, list) else process_sales_data(data)
+
+                if since is not None:
+                    # Only the delta is parsed and merged into the loaded store
+                    logger.info(f"Incremental sales refresh since {since.isoformat()}")
+                    return self.ingest_sales_delta(data, since=since)
+
+                source_hash = fetched['validators']['hash']
+                source_meta = self._source_meta(fetched)
+                if pool is not None:
+                    # The worker writes the columns; they come back memory-mapped
+                    return self._build_in_worker('sales', build_sales, (data,), source_hash, source_meta)
 
                 # Convert to pandas DataFrame for preprocessing
-                sales_df = pd.DataFrame(data) if not isinstance(data, pd.DataFrame) else data
+                sales_df = data if isinstance(data, (pd.DataFrame, SalesStore)) else pd.DataFrame(data)
 
-                # Preprocess the data to ensure correct format
+                # Preprocess the data into the columnar store
                 data = self._preprocess_sales_data(sales_df)
 
             # Add timestamp
             data["last_updated"] = datetime.datetime.now().isoformat()
 
-            # Cache the data
-            self._sales_data = data
-            self._save_cached_data('sales', data)
+            # Publish the finished data with a single swap, then cache it
+            data = self._publish('sales', data).data
+            self._aggregation_cache.clear()
+            self._position_cache.clear()
+            self._derived_metrics.invalidate()
+            self._time_series.clear()
+            self._save_cached_data('sales', data, source_hash=source_hash, extra=source_meta)
 
             return data
         except Exception as e:
             logger.error(f"Error refreshing sales data: {str(e)}")
+            self._refresh_runs.setdefault('sales', {})['error'] = str(e)
             return {}
     
+    def sales_watermark(self) -> Optional[pd.Timestamp]:
+        """
+        Get the FECHA from which an incremental refresh must re-read rows
+        
+        Returns:
+            Start of the day of the latest loaded transaction minus the
+            configured lookback, or None if there is nothing to build on
+        """
+        sales = self._sales_data
+        store = sales.get('store') if isinstance(sales, dict) else None
+        if not isinstance(store, SalesStore) or len(store) == 0 or 'FECHA' not in store.columns:
+            return None
+        latest = store.column('FECHA').max()
+        if pd.isna(latest):
+            return None
+        return latest.normalize() - pd.Timedelta(days=config.SALES_WATERMARK_LOOKBACK_DAYS)
+    
+    def ingest_sales_delta(self, records, since=None, key: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Merge new or changed transactions into the loaded sales data
+        
+        The cost depends on the size of the delta: only the new rows are
+        typed and encoded, and the cube, aggregations and KPIs are patched
+        for the months that changed instead of being rebuilt from every row.
+        
+        Args:
+            records: Delta transactions (list of dictionaries or DataFrame)
+            since: FECHA watermark the delta was requested from; existing rows
+                on or after it are replaced by the delta
+            key: Unique transaction column; existing rows with a key present
+                in the delta are replaced (defaults to config.SALES_KEY_COLUMN)
+            
+        Returns:
+            Updated sales data
+        """
+        key = key or config.SALES_KEY_COLUMN or None
+        delta_df = records if isinstance(records, pd.DataFrame) else pd.DataFrame(records)
+        # The delta is merged into the snapshot read here, never into newer ones
+        current = self._sales_data
+        store = current.get('store') if isinstance(current, dict) else None
+        
+        # Re-applying the delta the current generation was built from changes nothing
+        delta_hash = content_hash([content_hash(delta_df), str(since), key])
+        meta = self._snapshot_meta.get('sales') or {}
+        if isinstance(store, SalesStore) and meta.get('delta') == delta_hash:
+            logger.info(f"Sales delta already applied (generation {meta['generation']}), skipping merge")
+            return current
+        
+        if not isinstance(store, SalesStore) or len(store) == 0:
+            # Nothing to merge into: build everything from the delta
+            data = self._preprocess_sales_data(delta_df)
+        else:
+            # Con clave, los cambios se identifican por clave y no por ventana de fechas
+            merged, months = store.merge(delta_df, key=key, since=None if key else since)
+            cube = current.get('cube')
+            cube = cube.update(merged, months) if cube is not None else SalesCube.from_store(merged)
+            aggregations, kpis = self._summarize_sales(merged, cube)
+            data = {
+                "store": merged,
+                "cube": cube,
+                "aggregations": aggregations,
+                "kpis": kpis
+            }
+            logger.info(
+                f"Merged {len(delta_df)} sales rows ({len(months)} months changed); "
+                f"store now holds {len(merged)} rows"
+            )
+        
+        data["last_updated"] = datetime.datetime.now().isoformat()
+        data = self._publish('sales', data).data
+        self._aggregation_cache.clear()
+        self._position_cache.clear()
+        self._derived_metrics.invalidate()
+        self._time_series.clear()
+        self._save_cached_data(
+            'sales', data,
+            source_hash=content_hash([meta.get('hash'), delta_hash]),
+            extra={'delta': delta_hash}
+        )
+        return data
+    
     def refresh_logistics_data(self) -> Dict[str, Any]:
         """
         Refresh logistics data from source
@@ -573,22 +1692,35 @@ class DataManager:
             if not endpoint:
                 logger.info("Using sample logistics data (no endpoint configured)")
                 data = self._get_sample_logistics_data()
+                source_hash = content_hash(data)
+                source_meta = None
             else:
-                # In production, fetch from endpoint
-                from endpoints.data_endpoints import fetch_data
-                raw_data = fetch_data(endpoint)
-                data = process_logistics_data(raw_data)
+                # In production, fetch from endpoint (conditional request)
+                pool = get_ingest_pool()
+                fetched = self._fetch_source('logistics', endpoint, parse=pool is None)
+                if fetched is None:
+                    return self._logistics_data
+                source_hash = fetched['validators']['hash']
+                source_meta = self._source_meta(fetched)
+                if pool is not None:
+                    # Parsed and processed by a worker process, which writes the generation
+                    return self._build_in_worker(
+                        'logistics', build_domain, ('logistics', fetched['data'], config.CACHE_SERIALIZER),
+                        source_hash, source_meta
+                    )
+                data = process_logistics_data(fetched['data'])
             
             # Add timestamp
             data["last_updated"] = datetime.datetime.now().isoformat()
             
-            # Cache the data
-            self._logistics_data = data
-            self._save_cached_data('logistics', data)
+            # Publish the finished data with a single swap, then cache it
+            data = self._publish('logistics', data).data
+            self._save_cached_data('logistics', data, source_hash=source_hash, extra=source_meta)
             
             return data
         except Exception as e:
             logger.error(f"Error refreshing logistics data: {str(e)}")
+            self._refresh_runs.setdefault('logistics', {})['error'] = str(e)
             return {}
     
     def refresh_collection_data(self) -> Dict[str, Any]:
@@ -606,31 +1738,172 @@ class DataManager:
             if not endpoint:
                 logger.info("Using sample collection data (no endpoint configured)")
                 data = self._get_sample_collection_data()
+                source_hash = content_hash(data)
+                source_meta = None
             else:
-                # In production, fetch from endpoint
-                from endpoints.data_endpoints import fetch_data
-                raw_data = fetch_data(endpoint)
-                data = process_collection_data(raw_data)
+                # In production, fetch from endpoint (conditional request)
+                pool = get_ingest_pool()
+                fetched = self._fetch_source('collection', endpoint, parse=pool is None)
+                if fetched is None:
+                    return self._collection_data
+                source_hash = fetched['validators']['hash']
+                source_meta = self._source_meta(fetched)
+                if pool is not None:
+                    # Parsed and processed by a worker process, which writes the generation
+                    return self._build_in_worker(
+                        'collection', build_domain, ('collection', fetched['data'], config.CACHE_SERIALIZER),
+                        source_hash, source_meta
+                    )
+                data = process_collection_data(fetched['data'])
             
             # Add timestamp
             data["last_updated"] = datetime.datetime.now().isoformat()
             
-            # Cache the data
-            self._collection_data = data
-            self._save_cached_data('collection', data)
+            # Publish the finished data with a single swap, then cache it
+            data = self._publish('collection', data).data
+            self._save_cached_data('collection', data, source_hash=source_hash, extra=source_meta)
             
             return data
         except Exception as e:
             logger.error(f"Error refreshing collection data: {str(e)}")
+            self._refresh_runs.setdefault('collection', {})['error'] = str(e)
             return {}
     
-    def refresh_all_data(self):
-        """Refresh all data sources"""
-        self.refresh_marketing_data()
-        self.refresh_sales_data()
-        self.refresh_logistics_data()
-        self.refresh_collection_data()
-        logger.info("All data refreshed successfully")
+    def refresh_all_data(self, concurrency: Optional[int] = None, domains: Optional[List[str]] = None) -> Dict[str, Any]:
+        """
+        Refresh all data sources concurrently
+        
+        Every domain is fetched and processed in its own daemon thread with
+        its own deadline (config.DATA_REFRESH_TIMEOUTS, counted from when
+        its refresh starts), at most ``concurrency`` at a time. A failing or
+        slow domain never holds back the others: a refresh past its deadline
+        is reported as timed out and gives its slot to the next queued
+        domain, while it finishes in the background (its data installed if
+        it does).
+        
+        Args:
+            concurrency: Maximum domains refreshed at once (defaults to
+                config.DATA_REFRESH_CONCURRENCY)
+            domains: Domains to refresh, defaults to all
+            
+        Returns:
+            Summary with the overall status and duration, and per domain
+            the status (updated, unchanged, failed, timeout), duration,
+            bytes received and rows loaded
+        """
+        concurrency = max(1, concurrency or config.DATA_REFRESH_CONCURRENCY)
+        domains = [data_type for data_type in DATA_TYPES if domains is None or data_type in domains]
+        started = time.monotonic()
+        slots = threading.Semaphore(concurrency)
+        released = set()
+        lock = threading.Lock()
+        # Start and finish events of the domain threads
+        events = queue.Queue()
+        starts = {}
+        report = {}
+        
+        def release(data_type):
+            # A slot is given back once: on timeout or when the refresh ends
+            with lock:
+                if data_type not in released:
+                    released.add(data_type)
+                    slots.release()
+        
+        def run(data_type):
+            slots.acquire()
+            starts[data_type] = time.monotonic()
+            events.put((data_type, None))
+            try:
+                result = self._refresh_domain(data_type)
+            finally:
+                release(data_type)
+            events.put((data_type, result))
+        
+        for data_type in domains:
+            threading.Thread(target=run, args=(data_type,), name=f"refresh-{data_type}", daemon=True).start()
+        pending = set(domains)
+        while pending:
+            now = time.monotonic()
+            for data_type in [d for d in pending if d in starts]:
+                timeout = config.DATA_REFRESH_TIMEOUTS[data_type]
+                if now - starts[data_type] >= timeout:
+                    logger.error(f"Refreshing {data_type} data exceeded its {timeout}s deadline")
+                    report[data_type] = {"status": "timeout", "duration": round(now - starts[data_type], 3)}
+                    pending.discard(data_type)
+                    release(data_type)
+            if not pending:
+                break
+            deadlines = [
+                starts[d] + config.DATA_REFRESH_TIMEOUTS[d] - now
+                for d in pending if d in starts
+            ]
+            # Queued domains have no deadline yet: their start is an event too
+            try:
+                data_type, result = events.get(timeout=max(min(deadlines), 0) if deadlines else None)
+            except queue.Empty:
+                continue
+            if result is not None and data_type in pending:
+                report[data_type] = result
+                pending.discard(data_type)
+        
+        statuses = [report[data_type]['status'] for data_type in domains]
+        if all(status in ('updated', 'unchanged') for status in statuses):
+            overall = 'ok'
+        elif any(status in ('updated', 'unchanged') for status in statuses):
+            overall = 'partial'
+        else:
+            overall = 'failed'
+        summary = {
+            "status": overall,
+            "duration": round(time.monotonic() - started, 3),
+            "domains": {data_type: report[data_type] for data_type in domains}
+        }
+        logger.info(f"Data refresh finished ({overall}) in {summary['duration']}s: {dict(zip(domains, statuses))}")
+        return summary
+    
+    def _refresh_domain(self, data_type: str) -> Dict[str, Any]:
+        """
+        Refresh one domain and describe the outcome
+        
+        Args:
+            data_type: Type of data (marketing, sales, etc.)
+            
+        Returns:
+            Dictionary with status, duration, bytes, rows and error
+        """
+        with self._refresh_lock:
+            # Background revalidations wait for this refresh instead of starting their own
+            done = self._refreshing.setdefault(data_type, threading.Event())
+        self._refresh_runs[data_type] = {}
+        started = time.monotonic()
+        try:
+            data = getattr(self, f"refresh_{data_type}_data")()
+        except Exception as e:
+            logger.error(f"Error refreshing {data_type} data: {str(e)}")
+            self._refresh_runs[data_type]['error'] = str(e)
+            data = None
+        finally:
+            with self._refresh_lock:
+                if self._refreshing.get(data_type) is done:
+                    del self._refreshing[data_type]
+            done.set()
+        run = self._refresh_runs.get(data_type, {})
+        
+        if 'error' in run:
+            status = 'failed'
+        elif run.get('modified') is False:
+            status = 'unchanged'
+        else:
+            status = 'updated'
+        result = {
+            "status": status,
+            "duration": round(time.monotonic() - started, 3),
+            "bytes": run.get('bytes'),
+            "rows": _count_rows(data)
+        }
+        if 'error' in run:
+            result['error'] = run['error']
+        return result
     
     # Sample data methods for development/testing
     def _get_sample_marketing_data(self) -> Dict[str, Any]:
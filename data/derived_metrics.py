@@ -0,0 +1,227 @@
+"""
+Versioned registry of metrics derived from the sales data
+"""
+import logging
+import threading
+from typing import Dict, Any, Callable, Optional
+
+from .sales_store import frame_to_records
+
+logger = logging.getLogger(__name__)
+
+# Kinds of derived metrics: KPIs are merged into the kpis dictionary,
+# aggregations are served like the precomputed ones
+KPI = 'kpi'
+AGGREGATION = 'aggregation'
+
+# Default sales metric definitions, filled by the @sales_metric decorator
+SALES_METRICS = {}
+
+
+def sales_metric(name: str, kind: str = KPI):
+    """
+    Register a derived sales metric
+
+    The decorated function receives the sales data dictionary and a ``get``
+    callable that resolves other derived metrics of the same version. It may
+    return None when the data lacks the columns it needs.
+
+    Args:
+        name: Metric name as exposed to readers
+        kind: KPI or AGGREGATION
+
+    Returns:
+        Decorator that registers the function unchanged
+    """
+    def decorator(fn: Callable) -> Callable:
+        SALES_METRICS[name] = (kind, fn)
+        return fn
+    return decorator
+
+
+class DerivedMetricsRegistry:
+    """
+    Lazily computed metrics cached against the dataset version.
+
+    Each metric is computed on first access for a store version and then
+    served from memory. The latest versions are kept side by side, so
+    requests still holding the previous snapshot during a refresh neither
+    evict nor recompute the new one's metrics; cached values are read
+    without taking the lock. Readers never write into the shared sales
+    data dictionary.
+    """
+    # Store versions whose metrics are kept (current and previous snapshot)
+    KEEP_VERSIONS = 2
+
+    def __init__(self, definitions: Optional[Dict[str, Any]] = None):
+        """
+        Initialize the registry
+
+        Args:
+            definitions: Mapping name -> (kind, function), defaults to SALES_METRICS
+        """
+        self._definitions = dict(SALES_METRICS if definitions is None else definitions)
+        self._versions = {}  # store version -> {name: value}
+        self._lock = threading.RLock()
+
+    def _values_for(self, version: int) -> Dict[str, Any]:
+        """Values of one version, dropping the oldest versions (lock held)"""
+        values = self._versions.get(version)
+        if values is None:
+            values = self._versions[version] = {}
+            for old in sorted(self._versions)[:-self.KEEP_VERSIONS]:
+                del self._versions[old]
+        return values
+
+    def register(self, name: str, fn: Callable, kind: str = KPI):
+        """
+        Add or replace a metric definition
+
+        Args:
+            name: Metric name
+            fn: Function computing the metric
+            kind: KPI or AGGREGATION
+        """
+        with self._lock:
+            self._definitions[name] = (kind, fn)
+            for values in self._versions.values():
+                values.pop(name, None)
+
+    def names(self, kind: Optional[str] = None):
+        """
+        List the registered metrics
+
+        Args:
+            kind: Optional kind to filter on
+
+        Returns:
+            Metric names in registration order
+        """
+        return [name for name, (k, _) in self._definitions.items() if kind is None or k == kind]
+
+    def get(self, name: str, sales_data: Dict[str, Any]) -> Any:
+        """
+        Get a metric for the loaded data, computing it on first access
+
+        Args:
+            name: Metric name
+            sales_data: Sales data dictionary backed by a SalesStore
+
+        Returns:
+            Metric value, or None if unknown or not computable
+        """
+        if name not in self._definitions:
+            return None
+        store = sales_data.get('store') if isinstance(sales_data, dict) else None
+        version = getattr(store, 'version', None)
+        if version is None:
+            return None
+
+        values = self._versions.get(version)
+        if values is not None and name in values:
+            return values[name]
+
+        with self._lock:
+            values = self._values_for(version)
+            if name not in values:
+                _, fn = self._definitions[name]
+                try:
+                    values[name] = fn(sales_data, lambda other: self.get(other, sales_data))
+                except Exception as e:
+                    logger.error(f"Error computing derived metric {name}: {str(e)}")
+                    values[name] = None
+            return values[name]
+
+    def values(self, kind: str, sales_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Get every computable metric of one kind
+
+        Args:
+            kind: KPI or AGGREGATION
+            sales_data: Sales data dictionary backed by a SalesStore
+
+        Returns:
+            Dictionary name -> value, metrics that returned None are omitted
+        """
+        result = {}
+        for name in self.names(kind):
+            value = self.get(name, sales_data)
+            if value is not None:
+                result[name] = value
+        return result
+
+    def snapshot(self, sales_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Compute every metric so it can be persisted with the data
+
+        Args:
+            sales_data: Sales data dictionary backed by a SalesStore
+
+        Returns:
+            Dictionary name -> value for every computable metric
+        """
+        values = {}
+        for kind in (KPI, AGGREGATION):
+            values.update(self.values(kind, sales_data))
+        return values
+
+    def seed(self, version: int, values: Dict[str, Any]):
+        """
+        Install precomputed values for a store version
+
+        Used when a persisted snapshot is opened, so the metrics are served
+        without reading the rows they were computed from.
+
+        Args:
+            version: Version of the store the values belong to
+            values: Dictionary name -> value
+        """
+        with self._lock:
+            self._values_for(version).update({name: value for name, value in values.items() if name in self._definitions})
+
+    def invalidate(self):
+        """Drop every cached value"""
+        with self._lock:
+            self._versions = {}
+
+
+@sales_metric('analisis_vendedores', kind=AGGREGATION)
+def _analisis_vendedores(sales_data, get):
+    """Ventas, ticket promedio, número de ventas y clientes únicos por asesor"""
+    store = sales_data['store']
+    if 'NOMBRE_ASESOR' not in store.columns or 'IMPORTE_TOTAL' not in store.columns:
+        return None
+    # Solo se leen las columnas necesarias
+    df = store.take(columns=[c for c in ['NOMBRE_ASESOR', 'IMPORTE_TOTAL', 'CLIENTE'] if c in store.columns])
+
+    vendedores_analysis = df.groupby('NOMBRE_ASESOR', observed=True).agg({
+        'IMPORTE_TOTAL': ['sum', 'mean', 'count'],
+        'CLIENTE': 'nunique'
+    }).reset_index()
+
+    vendedores_analysis.columns = ['NOMBRE_ASESOR', 'VENTAS_TOTALES', 'VENTA_PROMEDIO', 'NUMERO_VENTAS', 'CLIENTES_UNICOS']
+    vendedores_analysis = vendedores_analysis.sort_values('VENTAS_TOTALES', ascending=False, kind='mergesort')
+    return frame_to_records(vendedores_analysis)
+
+
+@sales_metric('top_vendedor')
+def _top_vendedor(sales_data, get):
+    """Asesor con mayores ventas"""
+    analysis = get('analisis_vendedores')
+    return analysis[0]['NOMBRE_ASESOR'] if analysis else None
+
+
+@sales_metric('total_vendedores')
+def _total_vendedores(sales_data, get):
+    """Número de asesores con ventas"""
+    analysis = get('analisis_vendedores')
+    return len(analysis) if analysis else None
+
+
+@sales_metric('promedio_ventas_por_vendedor')
+def _promedio_ventas_por_vendedor(sales_data, get):
+    """Ventas promedio por asesor"""
+    analysis = get('analisis_vendedores')
+    if not analysis:
+        return None
+    return float(sum(row['VENTAS_TOTALES'] or 0 for row in analysis) / len(analysis))
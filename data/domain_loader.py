@@ -0,0 +1,138 @@
+"""
+Lazy per-domain loading with background warm-up
+"""
+import datetime
+import logging
+import threading
+import time
+from typing import Dict, Any, Callable, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Domain load states
+PENDING = 'pending'    # not requested yet
+LOADING = 'loading'    # being read from the local cache
+READY = 'ready'        # data available
+MISSING = 'missing'    # nothing cached locally, waiting for a refresh
+FAILED = 'failed'      # the local cache could not be read
+
+# States in which a read does not trigger a load
+SETTLED = (READY, MISSING, FAILED)
+
+
+class DomainLoader:
+    """
+    Loads each data domain on first access and tracks its readiness.
+
+    Loading only reads the local snapshot; the network is never hit on the
+    request path. A background thread can pre-warm every domain after
+    startup, and concurrent first reads of one domain wait for a single
+    load instead of each doing their own.
+    """
+    def __init__(
+        self,
+        load: Callable[[str], bool],
+        domains: List[str],
+        on_missing: Optional[Callable[[str], None]] = None
+    ):
+        """
+        Initialize the loader
+
+        Args:
+            load: Function loading one domain from the local cache, returns
+                whether any data was found
+            domains: Domain names, in warm-up order
+            on_missing: Optional callback for domains with nothing cached
+        """
+        self._load = load
+        self._on_missing = on_missing
+        self._domains = list(domains)
+        self._states = {domain: {'status': PENDING} for domain in self._domains}
+        self._locks = {domain: threading.RLock() for domain in self._domains}
+        self._thread = None
+
+    def ensure(self, domain: str, notify: bool = True) -> bool:
+        """
+        Load a domain if it was never loaded
+
+        Args:
+            domain: Domain name
+            notify: Call on_missing if nothing is cached (callers about to
+                fetch the domain themselves pass False)
+
+        Returns:
+            True if the domain has data
+        """
+        state = self._states[domain]
+        if state['status'] in SETTLED:
+            return state['status'] == READY
+
+        with self._locks[domain]:
+            # Re-entrant reads from the loading thread see the domain as empty
+            if state['status'] != PENDING:
+                return state['status'] == READY
+
+            state['status'] = LOADING
+            started = time.monotonic()
+            try:
+                found = self._load(domain)
+            except Exception as e:
+                logger.error(f"Error loading {domain} data: {str(e)}")
+                state.update(status=FAILED, error=str(e))
+                return False
+            state['load_seconds'] = round(time.monotonic() - started, 4)
+            if state['status'] == LOADING:
+                # The load function may already have installed the data
+                state['status'] = READY if found else MISSING
+                if found:
+                    state['loaded_at'] = datetime.datetime.now().isoformat()
+
+        if state['status'] == MISSING:
+            logger.info(f"No cached {domain} data available yet")
+            if self._on_missing is not None and notify:
+                self._on_missing(domain)
+        return state['status'] == READY
+
+    def mark_loaded(self, domain: str):
+        """
+        Record that a domain's data was installed (loaded or refreshed)
+
+        Args:
+            domain: Domain name
+        """
+        state = self._states.get(domain)
+        if state is None:
+            return
+        state.update(status=READY, loaded_at=datetime.datetime.now().isoformat())
+        state.pop('error', None)
+
+    def warm_up(self, domains: Optional[List[str]] = None) -> threading.Thread:
+        """
+        Load domains in a background thread
+
+        Args:
+            domains: Domains to load, defaults to all in their declared order
+
+        Returns:
+            The warm-up thread (already running)
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+
+        def run():
+            for domain in domains or self._domains:
+                self.ensure(domain)
+            logger.info("Data warm-up finished")
+
+        self._thread = threading.Thread(target=run, name='data-warm-up', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def readiness(self) -> Dict[str, Dict[str, Any]]:
+        """
+        Report the load state of every domain
+
+        Returns:
+            Dictionary domain -> status, loaded_at, load_seconds and error
+        """
+        return {domain: dict(state) for domain, state in self._states.items()}
@@ -0,0 +1,57 @@
+"""
+Immutable published state of a data domain
+"""
+from typing import Any, NamedTuple
+
+
+class FrozenDict(dict):
+    """
+    Read-only dictionary holding a published domain.
+
+    Any attempt to add, replace or remove a key raises TypeError, so a
+    reader can never change the data other requests are using; build a new
+    dictionary (``dict(frozen)``) and publish it instead. Nested values are
+    shared as they are and must be treated as read-only too.
+    """
+    def _readonly(self, *args, **kwargs):
+        raise TypeError("Los datos publicados son de solo lectura; publica una copia modificada")
+
+    __setitem__ = __delitem__ = __ior__ = _readonly
+    clear = pop = popitem = setdefault = update = _readonly
+
+    def __reduce__(self):
+        return (FrozenDict, (dict(self),))
+
+    def __copy__(self):
+        return self
+
+
+class DomainSnapshot(NamedTuple):
+    """
+    One published version of a domain: its data, version tag and timestamps.
+
+    A snapshot never changes once published. Refreshes build the next one
+    off to the side and replace the reference in a single assignment, so a
+    reader holding a snapshot sees one consistent version for as long as
+    it keeps it. A refresh finding the source unchanged swaps in a copy
+    with the same data and version and a newer ``fetched`` time.
+    """
+    data: Any
+    version: int
+    published: float  # time.time() of the swap
+    fetched: float    # time.time() the data was last fetched or confirmed from its source
+
+
+def freeze(data: Any) -> Any:
+    """
+    Make the top level of a domain's data read-only
+
+    Args:
+        data: Domain data
+
+    Returns:
+        A FrozenDict copy of a plain dictionary (other values unchanged)
+    """
+    if type(data) is dict:
+        return FrozenDict(data)
+    return data
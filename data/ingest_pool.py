@@ -0,0 +1,177 @@
+"""
+Worker processes for the CPU-bound stages of a refresh
+
+Parsing, typing, aggregating and summarizing a domain hold the GIL for
+seconds, which stalls every request thread of the web process. These stages
+run in a process pool instead. A worker writes the finished domain straight
+into the cache generation being published and returns only its row count;
+the web process then attaches that generation, memory-mapping the sales
+columns the worker wrote, so the result is never copied back through a pipe.
+"""
+import datetime
+import logging
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from typing import Any, Callable, Optional
+
+import pandas as pd
+
+import config
+from .columnar_cache import write_sales_snapshot
+from .sales_store import SalesStore
+from .serialization import decode_json, get_serializer
+from .snapshots import write_json_snapshot
+
+logger = logging.getLogger(__name__)
+
+_pool = None
+_pool_lock = threading.Lock()
+
+# Data manager of a worker process, used only for its transformations
+_processor = None
+
+
+def get_ingest_pool() -> Optional[ProcessPoolExecutor]:
+    """
+    Get the shared ingest pool, started on first use
+
+    Returns:
+        The pool, or None if config.DATA_INGEST_WORKERS is 0 (the stages
+        then run in the calling thread)
+    """
+    global _pool
+    if config.DATA_INGEST_WORKERS <= 0:
+        return None
+    with _pool_lock:
+        if _pool is None:
+            method = config.DATA_INGEST_START_METHOD or _default_start_method()
+            context = multiprocessing.get_context(method)
+            if method == 'forkserver':
+                # The server imports the stages (and pandas) once, never the main script
+                context.set_forkserver_preload([__name__])
+            _pool = ProcessPoolExecutor(
+                max_workers=config.DATA_INGEST_WORKERS,
+                mp_context=context,
+                initializer=_init_worker
+            )
+            logger.info(f"Started ingest pool with {config.DATA_INGEST_WORKERS} worker processes ({method} start)")
+        return _pool
+
+
+def _default_start_method() -> str:
+    """
+    Start method of the ingest workers when none is configured
+
+    The pool is created from a refresh thread while request threads, the
+    scheduler and the refresh executor are running. Forking that process
+    would copy locks other threads hold (logging, pandas, the HTTP pool)
+    into workers that then deadlock, so workers are started from a clean,
+    single-threaded interpreter instead.
+    """
+    return 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+
+
+def shutdown_ingest_pool():
+    """Stop the ingest pool; the next refresh starts a new one"""
+    global _pool
+    with _pool_lock:
+        pool, _pool = _pool, None
+    if pool is not None:
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def run_in_pool(stage: Callable[..., Any], *args) -> Any:
+    """
+    Run a stage in the ingest pool and wait for its result
+
+    Args:
+        stage: Module-level function of this module
+        *args: Its arguments (pickled to the worker)
+
+    Returns:
+        Result of the stage
+
+    Raises:
+        RuntimeError: If the pool is disabled
+        BrokenProcessPool: If a worker died (e.g. killed for memory); the
+            pool is replaced for the next refresh
+    """
+    pool = get_ingest_pool()
+    if pool is None:
+        raise RuntimeError("El pool de procesos de ingesta está deshabilitado")
+    try:
+        return pool.submit(stage, *args).result()
+    except BrokenProcessPool:
+        logger.error("An ingest worker process died; the pool will be restarted")
+        shutdown_ingest_pool()
+        raise
+
+
+def _init_worker():
+    """Workers only transform data: they never load, warm up or fetch domains"""
+    config.DATA_WARM_UP = False
+    config.DATA_REFRESHER = False
+
+
+def _worker_manager():
+    """Data manager of this worker process, created on first use"""
+    global _processor
+    if _processor is None:
+        from .data_manager import DataManager
+        _processor = DataManager()
+    return _processor
+
+
+def build_domain(data_type: str, payload: Any, serializer: str, directory: str) -> int:
+    """
+    Parse and process a dictionary-shaped domain into a JSON snapshot
+
+    Runs in a worker process.
+
+    Args:
+        data_type: marketing, logistics or collection
+        payload: Raw JSON bytes of the response, or records already parsed
+        serializer: Name of the cache serializer (config.CACHE_SERIALIZER)
+        directory: Generation directory to fill
+
+    Returns:
+        Number of top-level entries written
+    """
+    from utils import data_processors
+    raw = decode_json(payload) if isinstance(payload, bytes) else payload
+    data = getattr(data_processors, f"process_{data_type}_data")(raw)
+    data["last_updated"] = datetime.datetime.now().isoformat()
+    write_json_snapshot(directory, data, get_serializer(serializer))
+    return len(data)
+
+
+def build_sales(payload: Any, directory: str) -> int:
+    """
+    Build the sales store, cube, aggregations and KPIs into a columnar snapshot
+
+    Runs in a worker process. The derived metrics are computed here too and
+    stored in the summary, so the web process serves them without reading
+    a row.
+
+    Args:
+        payload: Raw JSON bytes of the response, records, a DataFrame or a
+            SalesStore typed while streaming
+        directory: Generation directory to fill
+
+    Returns:
+        Number of sales rows written
+    """
+    from utils.data_processors import process_sales_data
+    manager = _worker_manager()
+    if isinstance(payload, bytes):
+        payload = decode_json(payload)
+    if isinstance(payload, dict):
+        payload = process_sales_data(payload)
+    sales_df = payload if isinstance(payload, (pd.DataFrame, SalesStore)) else pd.DataFrame(payload)
+
+    data = manager._preprocess_sales_data(sales_df)
+    data["last_updated"] = datetime.datetime.now().isoformat()
+    write_sales_snapshot(directory, data, derived=manager._derived_metrics.snapshot(data))
+    return len(data['store'])
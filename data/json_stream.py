@@ -0,0 +1,197 @@
+"""
+Incremental parsing of large JSON payloads
+"""
+import codecs
+import json
+import re
+from typing import Any, Dict, Iterator, List, Optional
+
+_WHITESPACE = re.compile(r'[ \t\n\r]*')
+
+# Parser states
+_START = 'start'      # before the top-level value
+_OBJECT = 'object'    # between the entries of a top-level object
+_ARRAY = 'array'      # inside the records array
+_DONE = 'done'        # after the top-level value
+
+
+class JSONRecordStream:
+    """
+    Parser yielding the records of a JSON array as the bytes arrive.
+
+    The payload is either a top-level array of records or an object holding
+    one (under ``records_key``, or its first array-valued entry). Only the
+    unparsed tail of the text is buffered and each record is decoded as
+    soon as it is complete, so memory stays bounded by the size of a chunk
+    plus the records not consumed yet, whatever the size of the payload.
+    The other entries of an object payload are kept in ``meta``.
+    """
+    def __init__(self, records_key: Optional[str] = None):
+        """
+        Initialize the parser
+
+        Args:
+            records_key: Key of the records array in an object payload
+                (defaults to the first array-valued entry)
+        """
+        self.records_key = records_key
+        self.meta: Dict[str, Any] = {}
+        self.found = False
+        self._decoder = json.JSONDecoder()
+        self._scan_once = self._decoder.scan_once
+        self._text = codecs.getincrementaldecoder('utf-8')()
+        self._buffer = ''
+        self._pos = 0
+        self._state = _START
+        self._top = None
+
+    def feed(self, chunk: bytes) -> List[Any]:
+        """
+        Parse the next chunk of the payload
+
+        Args:
+            chunk: Raw bytes
+
+        Returns:
+            Records completed by this chunk
+        """
+        self._buffer = self._buffer[self._pos:] + self._text.decode(chunk)
+        self._pos = 0
+        return list(self._parse(final=False))
+
+    def close(self) -> List[Any]:
+        """
+        Finish the payload
+
+        Returns:
+            Records completed by the end of the payload
+
+        Raises:
+            ValueError: If the payload is truncated or holds no records array
+        """
+        self._buffer = self._buffer[self._pos:] + self._text.decode(b'', final=True)
+        self._pos = 0
+        records = list(self._parse(final=True))
+        if self._state != _DONE:
+            raise ValueError("JSON incompleto o inválido")
+        if not self.found:
+            raise ValueError("La respuesta no contiene un arreglo de registros")
+        return records
+
+    def _skip(self) -> int:
+        """Position of the next non-whitespace character"""
+        return _WHITESPACE.match(self._buffer, self._pos).end()
+
+    def _decode(self, pos: int, final: bool) -> Optional[tuple]:
+        """Decode one complete value at pos, None if more text is needed"""
+        try:
+            value, end = self._decoder.raw_decode(self._buffer, pos)
+        except json.JSONDecodeError:
+            if final:
+                raise ValueError(f"JSON inválido en la posición {pos}")
+            return None
+        # A number at the very end of the buffer may continue in the next chunk
+        if end == len(self._buffer) and not final:
+            return None
+        return value, end
+
+    def _scan_array(self, pos: int, final: bool) -> tuple:
+        """
+        Decode the consecutive array elements buffered from pos
+
+        Returns:
+            Tuple of the decoded elements and the position after the last
+            one (at the closing bracket or at an incomplete element)
+        """
+        buffer = self._buffer
+        size = len(buffer)
+        scan = self._scan_once
+        skip = _WHITESPACE.match
+        records = []
+        while pos < size:
+            char = buffer[pos]
+            if char == ',':
+                pos = skip(buffer, pos + 1).end()
+                continue
+            if char == ']':
+                break
+            try:
+                value, end = scan(buffer, pos)
+            except (StopIteration, json.JSONDecodeError):
+                if final:
+                    raise ValueError(f"JSON inválido en la posición {pos}")
+                break
+            # A number at the very end of the buffer may continue in the next chunk
+            if end == size and not final:
+                break
+            records.append(value)
+            pos = skip(buffer, end).end()
+        return records, pos
+
+    def _parse(self, final: bool) -> Iterator[Any]:
+        buffer = self._buffer
+        while True:
+            pos = self._skip()
+            if pos == len(buffer):
+                self._pos = pos
+                return
+            char = buffer[pos]
+
+            if self._state == _START:
+                if char not in '[{':
+                    raise ValueError("Se esperaba un arreglo u objeto JSON")
+                self._top = char
+                self._state = _ARRAY if char == '[' else _OBJECT
+                self.found = self.found or char == '['
+                self._pos = pos + 1
+
+            elif self._state == _ARRAY:
+                if char == ']':
+                    self._pos = pos + 1
+                    self._state = _DONE if self._top == '[' else _OBJECT
+                    continue
+                records, self._pos = self._scan_array(pos, final)
+                yield from records
+                if self._pos == pos:
+                    return
+
+            elif self._state == _OBJECT:
+                if char == ',':
+                    self._pos = pos + 1
+                    continue
+                if char == '}':
+                    self._pos = pos + 1
+                    self._state = _DONE
+                    continue
+                # An entry is consumed only once its key, colon and value start are buffered
+                key = self._decode(pos, final)
+                if key is None:
+                    self._pos = pos
+                    return
+                key, end = key
+                self._pos = end
+                colon = self._skip()
+                if colon == len(buffer) or buffer[colon] != ':':
+                    if colon < len(buffer) or final:
+                        raise ValueError(f"JSON inválido en la posición {colon}")
+                    self._pos = pos
+                    return
+                self._pos = colon + 1
+                start = self._skip()
+                if start == len(buffer):
+                    self._pos = pos
+                    return
+                wanted = key == self.records_key if self.records_key else not self.found
+                if buffer[start] == '[' and wanted:
+                    self.found = True
+                    self._state = _ARRAY
+                    self._pos = start + 1
+                    continue
+                decoded = self._decode(start, final)
+                if decoded is None:
+                    self._pos = pos
+                    return
+                self.meta[key], self._pos = decoded
+
+            else:
+                raise ValueError(f"Contenido inesperado después del JSON en la posición {pos}")
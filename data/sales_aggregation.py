@@ -0,0 +1,285 @@
+"""
+Generic multi-dimension aggregation over the columnar sales store
+"""
+import logging
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, List, Optional, Tuple, Union
+
+import pandas as pd
+
+from .sales_store import frame_to_records
+
+logger = logging.getLogger(__name__)
+
+# Calendar dimensions derived from FECHA at ingest
+DERIVED_DIMENSIONS = ['AÑO', 'MES', 'TRIMESTRE', 'SEMANA']
+
+# Numeric columns that support every metric function
+METRIC_COLUMNS = ['IMPORTE_TOTAL', 'CANTIDAD', 'PRECIO_UNITARIO']
+
+# Functions available per metric; count and nunique work on any column
+METRIC_FUNCTIONS = ['sum', 'count', 'mean', 'nunique', 'min', 'max']
+_ANY_COLUMN_FUNCTIONS = ['count', 'nunique']
+
+# Maximum number of memoized aggregation results
+AGGREGATION_CACHE_SIZE = 256
+
+# Legacy aggregation names understood by _filter_and_aggregate_sales
+LEGACY_AGGREGATIONS = {
+    'por_mes': {
+        'dimensions': ['AÑO', 'MES'],
+        'metrics': {'IMPORTE_TOTAL': ['sum', 'count']}
+    }
+}
+
+Metric = Tuple[str, str]
+
+
+def parse_metrics(metrics: Union[None, Dict[str, Any], List[Any]]) -> List[Metric]:
+    """
+    Normalize a metrics specification
+
+    Accepts ``{"IMPORTE_TOTAL": ["sum", "mean"]}``, ``["IMPORTE_TOTAL:sum"]``
+    or ``[["IMPORTE_TOTAL", "sum"]]``. Defaults to the sum, count and mean of
+    IMPORTE_TOTAL.
+
+    Args:
+        metrics: Metrics specification
+
+    Returns:
+        List of (column, function) pairs
+    """
+    if not metrics:
+        return [('IMPORTE_TOTAL', 'sum'), ('IMPORTE_TOTAL', 'count'), ('IMPORTE_TOTAL', 'mean')]
+
+    parsed = []
+    if isinstance(metrics, dict):
+        for column, functions in metrics.items():
+            if isinstance(functions, str):
+                functions = [functions]
+            parsed.extend((column, fn) for fn in functions)
+    else:
+        for metric in metrics:
+            if isinstance(metric, str):
+                column, _, fn = metric.partition(':')
+                parsed.append((column, fn or 'sum'))
+            else:
+                column, fn = metric
+                parsed.append((column, fn))
+    return parsed
+
+
+def validate_request(columns: List[str], dimensions: List[str], metrics: List[Metric]) -> Optional[str]:
+    """
+    Check an aggregation request against the available columns
+
+    Args:
+        columns: Columns available in the store
+        dimensions: Requested group-by dimensions
+        metrics: Requested (column, function) pairs
+
+    Returns:
+        Error message, or None if the request is valid
+    """
+    for dim in dimensions:
+        if dim not in columns:
+            return f"Dimensión '{dim}' no disponible"
+    for column, fn in metrics:
+        if fn not in METRIC_FUNCTIONS:
+            return f"Función '{fn}' no soportada (disponibles: {', '.join(METRIC_FUNCTIONS)})"
+        if column not in columns:
+            return f"Columna '{column}' no disponible"
+        if fn not in _ANY_COLUMN_FUNCTIONS and column not in METRIC_COLUMNS:
+            return f"La función '{fn}' solo aplica a {', '.join(METRIC_COLUMNS)}"
+    return None
+
+
+def metric_names(metrics: List[Metric]) -> List[str]:
+    """
+    Output column names for a list of metrics
+
+    Mirrors pandas: a single source column keeps the bare function names
+    (``sum``, ``count``), several columns are flattened as ``COLUMNA_fn``.
+
+    Args:
+        metrics: (column, function) pairs
+
+    Returns:
+        Output column names in the same order
+    """
+    if len({column for column, _ in metrics}) == 1:
+        return [fn for _, fn in metrics]
+    return [f"{column}_{fn}" for column, fn in metrics]
+
+
+def resolve_aggregation(aggregation: Union[str, Dict[str, Any]], columns: List[str]) -> Optional[Dict[str, Any]]:
+    """
+    Translate an aggregation argument into a request specification
+
+    Args:
+        aggregation: Legacy name (``por_vendedor``, ``por_mes``...) or a
+            dictionary with dimensions, metrics, top_n, sort_by and ascending
+        columns: Columns available in the store
+
+    Returns:
+        Keyword arguments for DataManager.aggregate_sales, or None if unknown
+    """
+    if isinstance(aggregation, dict):
+        return {
+            'dimensions': list(aggregation.get('dimensions') or []),
+            'metrics': aggregation.get('metrics'),
+            'top_n': aggregation.get('top_n'),
+            'sort_by': aggregation.get('sort_by'),
+            'ascending': bool(aggregation.get('ascending', False))
+        }
+    if aggregation in LEGACY_AGGREGATIONS:
+        return dict(LEGACY_AGGREGATIONS[aggregation])
+    if isinstance(aggregation, str) and aggregation.startswith('por_'):
+        # por_<dimension> agrupa por esa columna con suma, conteo y promedio
+        dimension = aggregation[len('por_'):].upper()
+        if dimension in columns:
+            return {'dimensions': [dimension], 'metrics': None}
+    return None
+
+
+def aggregate_frame(
+    df: pd.DataFrame,
+    dimensions: List[str],
+    metrics: List[Metric],
+    top_n: Optional[int] = None,
+    sort_by: Optional[str] = None,
+    ascending: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Group a frame by any dimensions and compute the requested metrics
+
+    Args:
+        df: Rows to aggregate
+        dimensions: Group-by columns, empty for a single total row
+        metrics: (column, function) pairs
+        top_n: Optional number of groups to keep after sorting
+        sort_by: Output column to sort on
+        ascending: Sort direction
+
+    Returns:
+        List of JSON-friendly result records
+    """
+    names = metric_names(metrics)
+    named = {name: pd.NamedAgg(column=column, aggfunc=fn) for name, (column, fn) in zip(names, metrics)}
+
+    if dimensions:
+        result = df.groupby(dimensions, observed=True).agg(**named).reset_index()
+    else:
+        result = pd.DataFrame([{name: df[column].agg(fn) for name, (column, fn) in zip(names, metrics)}])
+
+    return finalize_result(result, names, top_n=top_n, sort_by=sort_by, ascending=ascending)
+
+
+def finalize_result(
+    result: pd.DataFrame,
+    names: List[str],
+    top_n: Optional[int] = None,
+    sort_by: Optional[str] = None,
+    ascending: bool = False
+) -> List[Dict[str, Any]]:
+    """
+    Sort, truncate and serialize an aggregated frame
+
+    Args:
+        result: One row per group with the metric columns
+        names: Metric output column names
+        top_n: Optional number of groups to keep after sorting
+        sort_by: Output column to sort on (defaults to the first metric with top_n)
+        ascending: Sort direction
+
+    Returns:
+        List of JSON-friendly result records
+    """
+    if sort_by is None and top_n:
+        sort_by = names[0]
+    if sort_by is not None:
+        if sort_by not in result.columns:
+            raise ValueError(f"No se puede ordenar por '{sort_by}'")
+        result = result.sort_values(sort_by, ascending=ascending, kind='mergesort')
+    if top_n:
+        result = result.head(int(top_n))
+
+    return frame_to_records(result)
+
+
+class AggregationCache:
+    """
+    Bounded memo of aggregation results for one dataset version.
+
+    Keys include the data version; the first lookup with a newer version
+    drops every entry computed against the previous data. Requests still
+    reading an older snapshot miss without evicting the newer entries.
+    With ``max_bytes``, entries are also evicted once the arrays they hold
+    (counted by their ``nbytes``) exceed that total.
+    """
+    def __init__(self, max_size: int = AGGREGATION_CACHE_SIZE, max_bytes: Optional[int] = None):
+        self.max_size = max_size
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._bytes = 0
+        self._version = None
+        self._lock = threading.Lock()
+
+    def _sync_version(self, version) -> bool:
+        """Move to a newer version; False if the caller reads an older one"""
+        if self._version is None or version > self._version:
+            self._entries.clear()
+            self._bytes = 0
+            self._version = version
+        return version == self._version
+
+    def get(self, version, key) -> Optional[Any]:
+        """
+        Look up a memoized result
+
+        Args:
+            version: Version of the data the caller is reading
+            key: Normalized request key
+
+        Returns:
+            Cached result, or None on a miss
+        """
+        with self._lock:
+            if not self._sync_version(version) or key not in self._entries:
+                return None
+            self._entries.move_to_end(key)
+            return self._entries[key]
+
+    def put(self, version, key, value):
+        """
+        Store a result computed against a data version
+
+        Args:
+            version: Version of the data the result was computed from
+            key: Normalized request key
+            value: Result to memoize
+        """
+        with self._lock:
+            if self._version is not None and version != self._version:
+                # Computed against data that has already been replaced
+                return
+            size = getattr(value, 'nbytes', 0)
+            if self.max_bytes is not None and size > self.max_bytes:
+                return
+            self._version = version
+            if key in self._entries:
+                self._bytes -= getattr(self._entries[key], 'nbytes', 0)
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            self._bytes += size
+            while len(self._entries) > self.max_size or (self.max_bytes is not None and self._bytes > self.max_bytes):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= getattr(evicted, 'nbytes', 0)
+
+    def clear(self):
+        """Drop every memoized result"""
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self._version = None
@@ -0,0 +1,405 @@
+"""
+Pre-aggregated sales cube built once per refresh
+"""
+import logging
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .sales_store import ColumnarTable, recast_dimensions
+from .sales_filters import compile_filters
+from .sales_aggregation import METRIC_COLUMNS, Metric, finalize_result, metric_names
+
+logger = logging.getLogger(__name__)
+
+# Finest grain kept in the cube
+CUBE_DIMENSIONS = ['AÑO', 'MES', 'VENDEDOR', 'CLIENTE', 'LINEA', 'ARTICULO']
+
+# Coarser roll-ups materialized from the base cuboid for the common queries
+CUBOID_DIMENSIONS = [
+    ['AÑO', 'MES'],
+    ['AÑO', 'MES', 'VENDEDOR'],
+    ['AÑO', 'MES', 'LINEA'],
+    ['VENDEDOR'],
+    ['CLIENTE'],
+    ['LINEA'],
+    ['ARTICULO'],
+]
+
+# Monthly levels over dimensions outside the base grain, built from the rows
+SIDE_CUBOID_DIMENSIONS = [
+    ['AÑO', 'MES', 'TIPO_CLIENTE'],
+    ['AÑO', 'MES', 'CLASIFICACION'],
+]
+
+# Levels keyed by these columns can be patched month by month
+MONTH_KEY = ['AÑO', 'MES']
+
+# Additive partial aggregates stored per metric column
+PARTIAL_FUNCTIONS = ['sum', 'count', 'min', 'max']
+
+# Metric functions the cube can rebuild from its partial aggregates
+CUBE_FUNCTIONS = ['sum', 'count', 'mean', 'min', 'max']
+
+# Distinct-client measure, only exact on a cuboid with the query's grain
+DISTINCT_CLIENTS = 'CLIENTE__nunique'
+
+# Number of source rows behind each cell
+ROW_COUNT = '__rows'
+
+
+def _measure(column: str, fn: str) -> str:
+    """Name of the stored partial aggregate for a metric column"""
+    return f"{column}__{fn}"
+
+
+class Cuboid(ColumnarTable):
+    """
+    One group-by level of the cube.
+
+    Dimension columns keep the store's dictionary encoding, so the same
+    compiled filter plans used on the raw rows run on the cells.
+    """
+    def __init__(self, frame, dimensions: List[str], from_rows: bool = False):
+        """
+        Initialize the cuboid
+
+        Args:
+            frame: One row per cell with dimension and measure columns (a
+                DataFrame or a lazy ColumnSource)
+            dimensions: Group-by columns of this level
+            from_rows: Whether the level is aggregated from the raw rows
+                rather than rolled up from the base cuboid
+        """
+        super().__init__(frame)
+        self.dimensions = list(dimensions)
+        self.from_rows = from_rows
+
+    @property
+    def monthly(self) -> bool:
+        """Whether every cell belongs to a single calendar month"""
+        return all(col in self.dimensions for col in MONTH_KEY)
+
+    @property
+    def has_distinct_clients(self) -> bool:
+        """Whether the cells carry a precomputed distinct-client count"""
+        return DISTINCT_CLIENTS in self.columns
+
+
+def _build_base(df: pd.DataFrame, dimensions: List[str], metric_columns: List[str]) -> pd.DataFrame:
+    """
+    Aggregate the raw rows to the finest cube grain
+
+    Args:
+        df: Typed sales rows
+        dimensions: Cube dimensions present in the rows
+        metric_columns: Numeric columns present in the rows
+
+    Returns:
+        One row per observed dimension combination
+    """
+    named = {ROW_COUNT: pd.NamedAgg(column=dimensions[0], aggfunc='size')}
+    for column in metric_columns:
+        for fn in PARTIAL_FUNCTIONS:
+            named[_measure(column, fn)] = pd.NamedAgg(column=column, aggfunc=fn)
+    if 'CLIENTE' in df.columns and 'CLIENTE' not in dimensions:
+        named[DISTINCT_CLIENTS] = pd.NamedAgg(column='CLIENTE', aggfunc='nunique')
+    # dropna=False: las filas con dimensiones vacías siguen contando en los totales
+    return df.groupby(dimensions, observed=True, dropna=False).agg(**named).reset_index()
+
+
+def _roll_up(base: pd.DataFrame, dimensions: List[str], metric_columns: List[str]) -> pd.DataFrame:
+    """
+    Aggregate the base cuboid to a coarser level
+
+    Args:
+        base: Base cuboid frame
+        dimensions: Group-by columns of the coarser level
+        metric_columns: Numeric columns with partial aggregates
+
+    Returns:
+        One row per cell of the coarser level
+    """
+    named = {ROW_COUNT: pd.NamedAgg(column=ROW_COUNT, aggfunc='sum')}
+    for column in metric_columns:
+        for fn in PARTIAL_FUNCTIONS:
+            combine = 'sum' if fn in ('sum', 'count') else fn
+            named[_measure(column, fn)] = pd.NamedAgg(column=_measure(column, fn), aggfunc=combine)
+    if 'CLIENTE' in base.columns and 'CLIENTE' not in dimensions:
+        # Exact distinct count: each base cell belongs to exactly one client
+        named[DISTINCT_CLIENTS] = pd.NamedAgg(column='CLIENTE', aggfunc='nunique')
+    return base.groupby(dimensions, observed=True, dropna=False).agg(**named).reset_index()
+
+
+def _source_columns(df: pd.DataFrame, dimensions: List[str], metric_columns: List[str]) -> List[str]:
+    """Row columns needed to aggregate one level"""
+    extra = ['CLIENTE'] if 'CLIENTE' in df.columns and 'CLIENTE' not in dimensions else []
+    return dimensions + metric_columns + extra
+
+
+def _month_mask(frame: pd.DataFrame, months: set) -> np.ndarray:
+    """
+    Flag the cells of a monthly level that fall in a set of months
+
+    Args:
+        frame: Cuboid frame keyed by AÑO and MES
+        months: Set of (año, mes) pairs, None stands for undated cells
+
+    Returns:
+        Boolean mask aligned with the cells
+    """
+    years = frame['AÑO'].to_numpy(dtype='float64', na_value=np.nan)
+    month_numbers = frame['MES'].to_numpy(dtype='float64', na_value=np.nan)
+    keys = years * 100 + month_numbers
+    mask = np.isin(keys, [y * 100 + m for y, m in (month for month in months if month is not None)])
+    if None in months:
+        mask |= np.isnan(keys)
+    return mask
+
+
+class SalesCube:
+    """
+    Multi-level pre-aggregation of the sales store.
+
+    Holds the base cuboid at the AÑO x MES x VENDEDOR x CLIENTE x LINEA x
+    ARTICULO grain plus a few coarser roll-ups. Queries whose dimensions,
+    filters and metrics are all expressible on a cuboid are answered from
+    the smallest one that covers them; anything else returns None and the
+    caller falls back to the raw rows.
+    """
+    def __init__(self, cuboids: List[Cuboid], version: Optional[int] = None):
+        """
+        Initialize the cube
+
+        Args:
+            cuboids: Materialized levels, base cuboid first
+            version: Version of the store the cube was built from
+        """
+        # Smallest levels first so the first covering cuboid is the cheapest
+        self.cuboids = sorted(cuboids, key=len)
+        self.version = version
+
+    @classmethod
+    def from_store(cls, store) -> Optional['SalesCube']:
+        """
+        Build the cube from a sales store
+
+        Args:
+            store: SalesStore with the typed transactions
+
+        Returns:
+            New cube, or None if the store lacks the cube dimensions
+        """
+        df = store.frame
+        dimensions = [col for col in CUBE_DIMENSIONS if col in df.columns]
+        metric_columns = [col for col in METRIC_COLUMNS if col in df.columns]
+        if not dimensions or len(df) == 0:
+            return None
+
+        base = _build_base(df[dimensions + metric_columns], dimensions, metric_columns)
+        cuboids = [Cuboid(base, dimensions, from_rows=True)]
+        for level in CUBOID_DIMENSIONS:
+            if all(col in dimensions for col in level) and len(level) < len(dimensions):
+                cuboids.append(Cuboid(_roll_up(base, level, metric_columns), level))
+        for level in SIDE_CUBOID_DIMENSIONS:
+            if all(col in df.columns for col in level):
+                side = _build_base(df[_source_columns(df, level, metric_columns)], level, metric_columns)
+                cuboids.append(Cuboid(side, level, from_rows=True))
+
+        logger.info(
+            f"Sales cube built: {len(df)} rows -> {len(base)} base cells, "
+            f"{len(cuboids)} cuboids"
+        )
+        return cls(cuboids, version=getattr(store, 'version', None))
+
+    @property
+    def base(self) -> Cuboid:
+        """Finest level of the cube"""
+        return next(
+            c for c in self.cuboids
+            if c.from_rows and all(col in CUBE_DIMENSIONS for col in c.dimensions)
+        )
+
+    def purchases_per_client(self) -> pd.Series:
+        """
+        Number of dated transactions of every client
+
+        Returns:
+            Series indexed by CLIENTE, zero for clients with only undated rows
+        """
+        cells = self.base.frame
+        counts = cells[ROW_COUNT].where(cells['AÑO'].notna(), 0) if 'AÑO' in cells.columns else cells[ROW_COUNT]
+        return counts.groupby(cells['CLIENTE'], observed=True).sum()
+
+    def update(self, store, months: set) -> 'SalesCube':
+        """
+        Build the cube for a store that only changed in some months
+
+        Cells of the changed months are re-aggregated from the store rows of
+        those months and spliced into every monthly level; levels without a
+        month key are rolled up again from the patched base cuboid, never
+        from the raw rows.
+
+        Args:
+            store: New SalesStore produced by a merge
+            months: Calendar months whose rows changed
+
+        Returns:
+            New cube for the store (this cube is left untouched)
+        """
+        base = self.base
+        if not months or not base.monthly:
+            if months:
+                return SalesCube.from_store(store)
+            return SalesCube(self.cuboids, version=store.version)
+
+        df = store.frame
+        rows = df.iloc[store.month_positions(months)]
+        dictionary = store.dictionary
+        metric_columns = [col for col in METRIC_COLUMNS if _measure(col, 'sum') in base.columns]
+
+        def patch(cuboid: Cuboid, fresh: pd.DataFrame) -> pd.DataFrame:
+            old = cuboid.frame
+            if dictionary is not None:
+                old = recast_dimensions(old, dictionary)
+            kept = old[~_month_mask(old, months)]
+            return pd.concat([kept, fresh], ignore_index=True) if len(fresh) else kept.reset_index(drop=True)
+
+        fresh_base = _build_base(rows[_source_columns(df, base.dimensions, metric_columns)], base.dimensions, metric_columns)
+        new_base = patch(base, fresh_base)
+        cuboids = [Cuboid(new_base, base.dimensions, from_rows=True)]
+        for cuboid in self.cuboids:
+            if cuboid is base:
+                continue
+            if cuboid.from_rows:
+                if not all(col in df.columns for col in cuboid.dimensions):
+                    continue
+                fresh = _build_base(rows[_source_columns(df, cuboid.dimensions, metric_columns)], cuboid.dimensions, metric_columns)
+                frame = patch(cuboid, fresh)
+            elif cuboid.monthly:
+                frame = patch(cuboid, _roll_up(fresh_base, cuboid.dimensions, metric_columns))
+            else:
+                frame = _roll_up(new_base, cuboid.dimensions, metric_columns)
+            cuboids.append(Cuboid(frame, cuboid.dimensions, from_rows=cuboid.from_rows))
+
+        logger.info(f"Sales cube updated: {len(months)} months, {len(rows)} rows re-aggregated")
+        return SalesCube(cuboids, version=store.version)
+
+    def _covers(self, cuboid: Cuboid, dimensions: List[str], fields: List[str], metrics: List[Metric]) -> bool:
+        """
+        Check whether a cuboid can answer a query exactly
+
+        Args:
+            cuboid: Candidate level
+            dimensions: Requested group-by dimensions
+            fields: Filtered columns
+            metrics: Requested (column, function) pairs
+
+        Returns:
+            True if the result can be rebuilt from the cuboid's cells
+        """
+        available = set(cuboid.dimensions)
+        if not set(dimensions) <= available or not set(fields) <= available:
+            return False
+        for column, fn in metrics:
+            if column in METRIC_COLUMNS and fn in CUBE_FUNCTIONS:
+                if _measure(column, 'sum') not in cuboid.columns:
+                    return False
+            elif fn == 'nunique' and column in available:
+                continue
+            elif fn == 'nunique' and column == 'CLIENTE':
+                # Los distintos no se pueden sumar entre celdas
+                if not cuboid.has_distinct_clients or set(dimensions) != available:
+                    return False
+            else:
+                return False
+        return True
+
+    def _select(self, dimensions: List[str], fields: List[str], metrics: List[Metric]) -> Optional[Cuboid]:
+        """Smallest cuboid that covers the query, or None"""
+        for cuboid in self.cuboids:
+            if self._covers(cuboid, dimensions, fields, metrics):
+                return cuboid
+        return None
+
+    def answer(
+        self,
+        filters: Optional[Dict[str, Any]],
+        dimensions: List[str],
+        metrics: List[Metric],
+        columns: List[str],
+        top_n: Optional[int] = None,
+        sort_by: Optional[str] = None,
+        ascending: bool = False
+    ) -> Optional[List[Dict[str, Any]]]:
+        """
+        Answer an aggregation request from the cube
+
+        Args:
+            filters: Filter specification
+            dimensions: Group-by columns
+            metrics: (column, function) pairs
+            columns: Columns of the raw store, used to mirror how filters on
+                unknown columns are ignored there
+            top_n: Optional number of groups to keep after sorting
+            sort_by: Output column to sort on
+            ascending: Sort direction
+
+        Returns:
+            Result records, or None if the cube cannot answer the request
+        """
+        plan = compile_filters(filters)
+        # FECHA y demás columnas fuera del cubo hacen que ningún nivel cubra la consulta
+        fields = [p.field for p in plan.predicates if p.field in columns]
+
+        cuboid = self._select(dimensions, fields, metrics)
+        if cuboid is None:
+            return None
+
+        positions = plan.apply(cuboid) if fields else None
+        cells = cuboid.take(positions)
+        names = metric_names(metrics)
+
+        if dimensions:
+            grouped = cells.groupby(dimensions, observed=True)
+            result = grouped.size().to_frame(name=ROW_COUNT)
+        else:
+            grouped = cells
+            result = pd.DataFrame(index=[0])
+
+        for name, (column, fn) in zip(names, metrics):
+            result[name] = self._metric(grouped, cuboid, column, fn, bool(dimensions))
+
+        if dimensions:
+            result = result.drop(columns=[ROW_COUNT]).reset_index()
+        return finalize_result(result, names, top_n=top_n, sort_by=sort_by, ascending=ascending)
+
+    @staticmethod
+    def _metric(cells, cuboid: Cuboid, column: str, fn: str, grouped: bool):
+        """
+        Rebuild one metric from the partial aggregates
+
+        Args:
+            cells: Grouped cells, or the plain cell frame for a total
+            cuboid: Level the cells come from
+            column: Source column
+            fn: Metric function
+            grouped: Whether cells is a groupby object
+
+        Returns:
+            Series aligned with the groups, or a scalar for a total
+        """
+        if fn == 'mean':
+            total = cells[_measure(column, 'sum')].sum()
+            count = cells[_measure(column, 'count')].sum()
+            if grouped:
+                return total / count.where(count > 0)
+            return total / count if count else np.nan
+        if fn == 'nunique':
+            if column in cuboid.dimensions:
+                return cells[column].nunique()
+            # Mismo grano que la consulta: cada grupo es una sola celda
+            return cells[DISTINCT_CLIENTS].sum()
+        combine = 'sum' if fn in ('sum', 'count') else fn
+        return cells[_measure(column, fn)].agg(combine)
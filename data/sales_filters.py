@@ -0,0 +1,323 @@
+"""
+Compiled filter plans for the columnar sales store
+"""
+import json
+import logging
+import re
+from abc import ABC, abstractmethod
+from functools import lru_cache
+from typing import Dict, Any, List, Optional, Callable
+
+import numpy as np
+import pandas as pd
+
+from .sales_store import DATE_COLUMN
+
+logger = logging.getLogger(__name__)
+
+# Number of compiled plans kept around; the agents send a handful of shapes
+FILTER_PLAN_CACHE_SIZE = 64
+
+
+def normalize_filters(filters: Optional[Dict[str, Any]]) -> str:
+    """
+    Build a canonical key for a filter specification
+
+    Args:
+        filters: Filter dictionary as received from the tools or the API
+
+    Returns:
+        JSON string that is identical for equivalent specifications
+    """
+    return json.dumps(filters or {}, sort_keys=True, default=str)
+
+
+def _column_values(store, field: str, positions: Optional[np.ndarray]) -> np.ndarray:
+    """
+    Get the raw values of a column for the candidate rows
+
+    Args:
+        store: SalesStore to read from
+        field: Column name
+        positions: Candidate row positions, None for all rows
+
+    Returns:
+        NumPy array with codes, datetimes, floats or objects
+    """
+    if store.is_encoded(field):
+        values = store.codes(field)
+    else:
+        series = store.column(field)
+        if pd.api.types.is_datetime64_any_dtype(series):
+            values = series.to_numpy()
+        elif pd.api.types.is_numeric_dtype(series):
+            values = series.to_numpy(dtype='float64', na_value=np.nan)
+        else:
+            values = series.to_numpy(dtype=object)
+    return values if positions is None else values[positions]
+
+
+def _matching_codes(store, test: Callable[[pd.Index], np.ndarray]) -> np.ndarray:
+    """
+    Evaluate a predicate once per distinct dictionary value
+
+    Args:
+        store: SalesStore with dictionary-encoded dimensions
+        test: Function mapping the value table to a boolean array
+
+    Returns:
+        Codes of the values that satisfy the predicate
+    """
+    dictionary = store.dictionary
+    if dictionary is None or len(dictionary) == 0:
+        return np.array([], dtype=np.int64)
+    return np.flatnonzero(test(dictionary))
+
+
+def _distinct_mask(values: np.ndarray, test: Callable[[pd.Index], np.ndarray]) -> np.ndarray:
+    """
+    Evaluate a predicate once per distinct value of a plain column
+
+    Args:
+        values: Column values for the candidate rows
+        test: Function mapping distinct values to a boolean array
+
+    Returns:
+        Boolean mask aligned with values
+    """
+    codes, uniques = pd.factorize(values)
+    if len(uniques) == 0:
+        return np.zeros(len(values), dtype=bool)
+    matched = np.asarray(test(pd.Index(uniques)), dtype=bool)
+    return np.where(codes >= 0, matched[codes], False)
+
+
+class Predicate(ABC):
+    """
+    Single compiled condition over one column
+
+    Subclasses set ``cost`` so the plan can run cheap, selective predicates
+    first and only test the surviving rows with the expensive ones.
+    """
+    cost = 0
+
+    def __init__(self, field: str):
+        self.field = field
+
+    @abstractmethod
+    def mask(self, store, positions: Optional[np.ndarray]) -> np.ndarray:
+        """
+        Evaluate the predicate on the candidate rows
+
+        Args:
+            store: SalesStore to read from
+            positions: Candidate row positions, None for all rows
+
+        Returns:
+            Boolean mask aligned with the candidates
+        """
+
+    def seed(self, store) -> Optional[np.ndarray]:
+        """
+        Resolve the predicate through an index instead of a scan
+
+        Args:
+            store: SalesStore to read from
+
+        Returns:
+            Sorted row positions, or None if no index applies
+        """
+        return None
+
+
+class InPredicate(Predicate):
+    """Membership in a list of values (exact match is a one-element list)"""
+    cost = 0
+
+    def __init__(self, field: str, values: List[Any]):
+        super().__init__(field)
+        self.values = list(values)
+
+    def mask(self, store, positions):
+        values = _column_values(store, self.field, positions)
+        if store.is_encoded(self.field):
+            return np.isin(values, store.encode(self.values))
+        return pd.Series(values, copy=False).isin(self.values).to_numpy()
+
+    def seed(self, store):
+        if store.has_index(self.field):
+            return store.lookup(self.field, self.values)
+        return None
+
+
+class RangePredicate(Predicate):
+    """Inclusive min/max bounds"""
+    cost = 1
+
+    def __init__(self, field: str, low: Any = None, high: Any = None):
+        super().__init__(field)
+        self.low = low
+        self.high = high
+
+    def _test(self, values):
+        low, high = self.low, self.high
+        if getattr(values, 'dtype', None) is not None and values.dtype.kind == 'M':
+            # Bounds on datetime columns may arrive as strings
+            low = np.datetime64(pd.to_datetime(low)) if low is not None else None
+            high = np.datetime64(pd.to_datetime(high)) if high is not None else None
+        result = np.ones(len(values), dtype=bool)
+        if low is not None:
+            result &= np.asarray(values >= low, dtype=bool)
+        if high is not None:
+            result &= np.asarray(values <= high, dtype=bool)
+        return result
+
+    def mask(self, store, positions):
+        values = _column_values(store, self.field, positions)
+        if store.is_encoded(self.field):
+            return np.isin(values, _matching_codes(store, lambda d: self._test(d.astype(str))))
+        return self._test(values)
+
+    def seed(self, store):
+        if self.field == DATE_COLUMN and store.sorted_by_date:
+            bounds = store.date_slice(self.low, self.high)
+            return np.arange(bounds.start, bounds.stop)
+        return None
+
+
+class DateRangePredicate(RangePredicate):
+    """Inclusive date range on a datetime column"""
+    cost = 1
+
+    def __init__(self, field: str, date_from: Any, date_to: Any):
+        super().__init__(
+            field,
+            np.datetime64(pd.to_datetime(date_from)),
+            np.datetime64(pd.to_datetime(date_to))
+        )
+
+
+class RegexPredicate(Predicate):
+    """Regular expression search evaluated once per distinct value"""
+    cost = 2
+
+    def __init__(self, field: str, pattern: str):
+        super().__init__(field)
+        self.pattern = re.compile(pattern)
+
+    def _test(self, distinct: pd.Index) -> np.ndarray:
+        search = self.pattern.search
+        return np.fromiter((bool(search(str(v))) for v in distinct), dtype=bool, count=len(distinct))
+
+    def mask(self, store, positions):
+        values = _column_values(store, self.field, positions)
+        if store.is_encoded(self.field):
+            return np.isin(values, _matching_codes(store, self._test))
+        return _distinct_mask(values, self._test)
+
+
+def _predicate_order(predicate: Predicate):
+    """Sort key: cheap predicates first, short value lists before long ones"""
+    size = len(predicate.values) if isinstance(predicate, InPredicate) else 0
+    return (predicate.cost, size)
+
+
+class FilterPlan:
+    """
+    Ordered list of predicates evaluated as one pass over row positions.
+
+    No intermediate DataFrames are built: each predicate narrows an array of
+    candidate positions and the caller materializes rows once at the end.
+    """
+    def __init__(self, predicates: List[Predicate]):
+        self.predicates = sorted(predicates, key=_predicate_order)
+
+    def apply(self, store) -> np.ndarray:
+        """
+        Evaluate the plan against a store
+
+        Args:
+            store: SalesStore to filter
+
+        Returns:
+            Sorted array of matching row positions
+        """
+        columns = set(store.columns)
+        # Filtros sobre columnas inexistentes se ignoran, como antes
+        predicates = [p for p in self.predicates if p.field in columns]
+
+        # Start from the smallest index-backed candidate set (date slice or
+        # hash index lookup); every other predicate only tests those rows
+        positions = None
+        seeded_by = None
+        for predicate in predicates:
+            seeded = predicate.seed(store)
+            if seeded is not None and (positions is None or len(seeded) < len(positions)):
+                positions, seeded_by = seeded, predicate
+        if positions is not None and len(positions) == 0:
+            return positions
+        remaining = [p for p in predicates if p is not seeded_by]
+
+        for predicate in remaining:
+            mask = predicate.mask(store, positions)
+            positions = np.flatnonzero(mask) if positions is None else positions[mask]
+            if len(positions) == 0:
+                break
+        if positions is None:
+            return np.arange(len(store))
+        return positions
+
+
+def _compile_predicates(field: str, value: Any) -> List[Predicate]:
+    """
+    Translate one entry of the filter specification
+
+    Args:
+        field: Column name
+        value: Filter value (list, min/max, regex, date_range or exact value)
+
+    Returns:
+        List of predicates for this field
+    """
+    if isinstance(value, list):
+        return [InPredicate(field, value)]
+    if isinstance(value, dict) and all(k in ['min', 'max'] for k in value.keys()):
+        if value.get('min') is None and value.get('max') is None:
+            return []
+        return [RangePredicate(field, value.get('min'), value.get('max'))]
+    if isinstance(value, dict) and 'regex' in value:
+        return [RegexPredicate(field, value['regex'])]
+    if isinstance(value, dict) and 'date_range' in value:
+        date_range = value['date_range']
+        if field == 'FECHA' and 'from' in date_range and 'to' in date_range:
+            try:
+                return [DateRangePredicate(field, date_range['from'], date_range['to'])]
+            except Exception as e:
+                logger.warning(f"Error al procesar rango de fechas: {str(e)}")
+        return []
+    return [InPredicate(field, [value])]
+
+
+@lru_cache(maxsize=FILTER_PLAN_CACHE_SIZE)
+def _compile_cached(key: str) -> FilterPlan:
+    """Compile a normalized filter specification"""
+    predicates = []
+    for field, value in json.loads(key).items():
+        predicates.extend(_compile_predicates(field, value))
+    return FilterPlan(predicates)
+
+
+def compile_filters(filters: Optional[Dict[str, Any]]) -> FilterPlan:
+    """
+    Get the compiled plan for a filter specification
+
+    Plans do not hold any data, so they are cached by the normalized
+    specification and reused across stores and requests.
+
+    Args:
+        filters: Filter dictionary as received from the tools or the API
+
+    Returns:
+        Compiled filter plan
+    """
+    return _compile_cached(normalize_filters(filters))
@@ -0,0 +1,118 @@
+"""
+Cursor pagination over filtered sales rows
+"""
+import base64
+import hashlib
+import json
+import logging
+from typing import Dict, Any, Optional, Tuple, Union
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+class CursorError(ValueError):
+    """Raised when a pagination cursor is malformed or no longer valid"""
+
+
+def filters_fingerprint(filters_key: str) -> str:
+    """
+    Short hash binding a cursor to the filter specification it was issued for
+
+    Args:
+        filters_key: Normalized filter specification
+
+    Returns:
+        Hex digest prefix
+    """
+    return hashlib.sha1(filters_key.encode('utf-8')).hexdigest()[:12]
+
+
+def encode_cursor(snapshot: str, position: int, filters_key: str) -> str:
+    """
+    Build an opaque cursor pointing after a row
+
+    Args:
+        snapshot: Identity of the store content the page was read from
+            (content hash of its published generation)
+        position: Row position of the last returned row
+        filters_key: Normalized filter specification
+
+    Returns:
+        URL-safe cursor string
+    """
+    payload = json.dumps({'s': snapshot, 'p': int(position), 'f': filters_fingerprint(filters_key)})
+    return base64.urlsafe_b64encode(payload.encode('utf-8')).decode('ascii')
+
+
+def decode_cursor(cursor: str, snapshot: str, filters_key: str) -> int:
+    """
+    Validate a cursor and get the row position it points after
+
+    Rows are ordered by FECHA and then by load order, which is exactly the
+    store's row order, so a position is a stable resume point within one
+    snapshot. Every worker attaching the same generation accepts the
+    cursor; a refresh publishing different content invalidates it.
+
+    Args:
+        cursor: Cursor returned with a previous page
+        snapshot: Identity of the store content being read
+        filters_key: Normalized filter specification of this request
+
+    Returns:
+        Row position of the last row already returned
+
+    Raises:
+        CursorError: If the cursor is malformed, expired or was issued for
+            different filters
+    """
+    try:
+        payload = json.loads(base64.urlsafe_b64decode(cursor.encode('ascii')).decode('utf-8'))
+        position = int(payload['p'])
+    except Exception:
+        raise CursorError("Cursor inválido")
+    if payload.get('f') != filters_fingerprint(filters_key):
+        raise CursorError("El cursor corresponde a otros filtros")
+    if payload.get('s') != snapshot:
+        raise CursorError("Los datos se actualizaron; reinicie la paginación sin cursor")
+    return position
+
+
+def clamp_page_size(limit: Optional[int], default: int, maximum: int) -> int:
+    """
+    Apply the page size limits
+
+    Args:
+        limit: Requested page size
+        default: Page size when none is requested
+        maximum: Largest page size served
+
+    Returns:
+        Page size between 1 and maximum
+    """
+    if limit is None:
+        return default
+    return max(1, min(int(limit), maximum))
+
+
+def page_slice(positions: Union[np.ndarray, range], after: Optional[int], limit: int) -> Tuple[np.ndarray, bool]:
+    """
+    Select one page of matching row positions
+
+    Args:
+        positions: Sorted positions of every matching row, or a range when
+            every row matches
+        after: Row position the page starts after, None for the first page
+        limit: Page size
+
+    Returns:
+        Tuple of the page positions and whether more rows follow
+    """
+    if isinstance(positions, range):
+        start = 0 if after is None else min(max(after + 1 - positions.start, 0), len(positions))
+        page = np.asarray(positions[start:start + limit], dtype=np.int64)
+    else:
+        start = 0 if after is None else int(np.searchsorted(positions, after, side='right'))
+        page = positions[start:start + limit]
+    return page, start + limit < len(positions)
@@ -0,0 +1,739 @@
+"""
+Columnar in-memory store for sales transactions
+"""
+import itertools
+import logging
+from abc import ABC, abstractmethod
+from typing import Dict, Any, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Columns coerced to float at ingest
+NUMERIC_COLUMNS = ['IMPORTE_TOTAL', 'PRECIO_UNITARIO', 'CANTIDAD']
+
+# Repeated string dimensions stored as integer codes over one shared value table
+DIMENSION_COLUMNS = [
+    'VENDEDOR', 'NOMBRE_ASESOR', 'CLIENTE', 'ARTICULO',
+    'LINEA', 'TIPO_CLIENTE', 'CLASIFICACION'
+]
+
+# Dimensions with a value -> row positions index for single-entity lookups
+INDEXED_COLUMNS = ['CLIENTE', 'VENDEDOR', 'ARTICULO']
+
+# The store is kept sorted by this column so date ranges are slices
+DATE_COLUMN = 'FECHA'
+
+# Monotonic counter used to tag every store built in this process
+_store_versions = itertools.count(1)
+
+
+def _coerce_sales_frame(df: pd.DataFrame, dictionary: Optional[pd.Index] = None) -> pd.DataFrame:
+    """
+    Apply the sales column types in place
+
+    Args:
+        df: DataFrame with raw sales transactions
+        dictionary: Optional value table to extend instead of building a new one
+
+    Returns:
+        The same DataFrame with typed and derived columns
+    """
+    # Asegurar que las fechas estén en formato datetime
+    if 'FECHA' in df.columns:
+        df['FECHA'] = pd.to_datetime(df['FECHA'], errors='coerce')
+
+        # Añadir columnas calculadas útiles
+        df['MES'] = df['FECHA'].dt.month
+        df['AÑO'] = df['FECHA'].dt.year
+        df['TRIMESTRE'] = df['FECHA'].dt.quarter
+        df['SEMANA'] = df['FECHA'].dt.isocalendar().week
+
+    # Asegurar que los valores numéricos sean de tipo float
+    for col in NUMERIC_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col], errors='coerce')
+
+    _encode_dimensions(df, dictionary)
+
+    # Ordenar por fecha (orden estable, fechas inválidas al final)
+    if DATE_COLUMN in df.columns:
+        df = df.sort_values(DATE_COLUMN, kind='mergesort', na_position='last', ignore_index=True)
+
+    return df
+
+
+def _encode_dimensions(df: pd.DataFrame, dictionary: Optional[pd.Index] = None) -> Optional[pd.Index]:
+    """
+    Dictionary-encode the sales dimensions in place
+
+    Every dimension column becomes a categorical whose categories are the same
+    shared value table, so each distinct string is stored once and group-bys
+    and filters run on the integer codes.
+
+    Args:
+        df: DataFrame with raw sales transactions
+        dictionary: Optional existing value table; new values are appended to
+            it so codes already handed out stay valid
+
+    Returns:
+        The shared value table, or None if there is nothing to encode
+    """
+    columns = [
+        col for col in DIMENSION_COLUMNS
+        if col in df.columns and not pd.api.types.is_numeric_dtype(df[col])
+    ]
+    if not columns:
+        return None
+
+    # Factorize all dimensions together so the codes index one value table
+    values = np.concatenate([df[col].to_numpy(dtype=object) for col in columns])
+    if dictionary is None:
+        codes, uniques = pd.factorize(values)
+        categories = pd.Index(uniques, dtype=object)
+    else:
+        known = dictionary.get_indexer(values)
+        unseen = values[(known < 0) & pd.notna(values)]
+        categories = dictionary.append(pd.Index(pd.unique(unseen), dtype=object)).astype(object) if len(unseen) else dictionary
+        codes = categories.get_indexer(values)
+    dtype = pd.CategoricalDtype(categories=categories)
+
+    n = len(df)
+    for i, col in enumerate(columns):
+        df[col] = pd.Categorical.from_codes(codes[i * n:(i + 1) * n], dtype=dtype)
+
+    return dtype.categories
+
+
+def recast_dimensions(df: pd.DataFrame, dictionary: pd.Index) -> pd.DataFrame:
+    """
+    Move encoded columns onto an extended value table without re-hashing
+
+    Args:
+        df: Frame whose categorical columns use a prefix of ``dictionary``
+        dictionary: Extended shared value table
+
+    Returns:
+        Frame with the same codes over the new value table
+    """
+    dtype = pd.CategoricalDtype(categories=dictionary)
+    columns = {
+        col: pd.Categorical.from_codes(df[col].cat.codes.to_numpy(), dtype=dtype)
+        for col in df.columns
+        if isinstance(df[col].dtype, pd.CategoricalDtype) and not df[col].cat.categories.equals(dictionary)
+    }
+    return df.assign(**columns) if columns else df
+
+
+def affected_months(df: pd.DataFrame) -> set:
+    """
+    Calendar months present in a set of rows
+
+    Args:
+        df: Typed sales rows
+
+    Returns:
+        Set of (año, mes) pairs, with None standing for rows without a date
+    """
+    if 'AÑO' not in df.columns or 'MES' not in df.columns or len(df) == 0:
+        return set()
+    months = df[['AÑO', 'MES']]
+    dated = months.dropna()
+    result = {(int(y), int(m)) for y, m in dated.drop_duplicates().itertuples(index=False)}
+    if len(dated) < len(months):
+        result.add(None)
+    return result
+
+
+def frame_to_records(df: pd.DataFrame) -> List[Dict[str, Any]]:
+    """
+    Convert a DataFrame slice to JSON-friendly records
+
+    Args:
+        df: DataFrame to convert
+
+    Returns:
+        List of dictionaries with ISO dates and None for missing values
+    """
+    out = df.copy()
+    for col in out.columns:
+        if pd.api.types.is_datetime64_any_dtype(out[col]):
+            out[col] = out[col].dt.strftime('%Y-%m-%dT%H:%M:%S')
+    out = out.astype(object).where(out.notna(), None)
+    return out.to_dict(orient='records')
+
+
+class ColumnSource(ABC):
+    """
+    Table columns that are read one at a time, on first access.
+
+    Lets a ColumnarTable be opened (e.g. over a memory-mapped snapshot)
+    without reading any values; each column is only loaded when a query
+    touches it.
+    """
+    @property
+    @abstractmethod
+    def columns(self) -> List[str]:
+        """Column names in table order"""
+
+    @property
+    @abstractmethod
+    def rows(self) -> int:
+        """Number of rows"""
+
+    @property
+    def dictionary(self) -> Optional[pd.Index]:
+        """Shared value table of the encoded columns"""
+        return None
+
+    @abstractmethod
+    def load(self, name: str) -> Any:
+        """
+        Read one column
+
+        Args:
+            name: Column name
+
+        Returns:
+            Array-like column values (NumPy array, Categorical or extension array)
+        """
+
+
+class ColumnarTable:
+    """
+    Read-only typed table with dictionary-encoded dimensions.
+
+    Shared base for the sales store and its pre-aggregated cuboids so both
+    can be filtered with the same compiled plans.
+    """
+    def __init__(self, frame):
+        """
+        Initialize the table
+
+        Args:
+            frame: Already typed DataFrame, or a ColumnSource whose columns
+                are loaded lazily
+        """
+        if isinstance(frame, ColumnSource):
+            self._source = frame
+            self._data = None
+        else:
+            self._source = None
+            self._data = frame
+        self._loaded = {}
+
+    @property
+    def _frame(self) -> pd.DataFrame:
+        """Full table, materializing every lazy column on first use"""
+        if self._data is None:
+            # copy=False keeps memory-mapped columns shared instead of consolidating them
+            data = pd.DataFrame(
+                {name: self.column(name) for name in self._source.columns},
+                index=pd.RangeIndex(self._source.rows),
+                copy=False
+            )
+            self._data = data
+            self._loaded = {}
+        return self._data
+
+    @property
+    def frame(self) -> pd.DataFrame:
+        """Read-only view of the full table"""
+        return self._frame
+
+    @property
+    def materialized(self) -> List[str]:
+        """Columns currently loaded in memory"""
+        if self._data is not None:
+            return list(self._data.columns)
+        return list(self._loaded)
+
+    @property
+    def dictionary(self) -> Optional[pd.Index]:
+        """Shared value table behind the dictionary-encoded dimensions"""
+        if self._data is None:
+            return self._source.dictionary
+        for col in DIMENSION_COLUMNS:
+            if col in self._data.columns and isinstance(self._data[col].dtype, pd.CategoricalDtype):
+                return self._data[col].cat.categories
+        return None
+
+    @property
+    def columns(self) -> List[str]:
+        """Column names available in the table"""
+        if self._data is None:
+            return list(self._source.columns)
+        return list(self._data.columns)
+
+    def __len__(self) -> int:
+        if self._data is None:
+            return self._source.rows
+        return len(self._data)
+
+    def column(self, name: str) -> pd.Series:
+        """
+        Get a single column
+
+        Args:
+            name: Column name
+
+        Returns:
+            Column as a pandas Series
+        """
+        if self._data is not None:
+            return self._data[name]
+        series = self._loaded.get(name)
+        if series is None:
+            if name not in self._source.columns:
+                raise KeyError(name)
+            series = pd.Series(
+                self._source.load(name), index=pd.RangeIndex(self._source.rows), name=name, copy=False
+            )
+            self._loaded[name] = series
+        return series
+
+    def is_encoded(self, name: str) -> bool:
+        """
+        Check whether a column is dictionary-encoded
+
+        Args:
+            name: Column name
+
+        Returns:
+            True if the column holds codes over the shared value table
+        """
+        return name in self.columns and isinstance(self.column(name).dtype, pd.CategoricalDtype)
+
+    def codes(self, name: str) -> np.ndarray:
+        """
+        Get the integer codes of a dictionary-encoded column
+
+        Args:
+            name: Column name
+
+        Returns:
+            Array of codes, -1 marks missing values
+        """
+        return self.column(name).cat.codes.to_numpy()
+
+    def encode(self, values: Sequence[Any]) -> np.ndarray:
+        """
+        Translate dimension values to codes in the shared value table
+
+        Args:
+            values: Values to look up
+
+        Returns:
+            Array of codes, values not present in the table are dropped
+        """
+        dictionary = self.dictionary
+        if dictionary is None:
+            return np.array([], dtype=np.int64)
+        codes = dictionary.get_indexer(list(values))
+        return codes[codes >= 0]
+
+    @property
+    def sorted_by_date(self) -> bool:
+        """Whether rows are ordered by the date column"""
+        return False
+
+    def has_index(self, name: str) -> bool:
+        """
+        Check whether a column has a hash index
+
+        Args:
+            name: Column name
+
+        Returns:
+            True if lookups on the column avoid a scan
+        """
+        return False
+
+    def take(self, positions: Optional[np.ndarray] = None, columns: Optional[List[str]] = None) -> pd.DataFrame:
+        """
+        Materialize a subset of rows
+
+        Args:
+            positions: Optional row positions, all rows if omitted
+            columns: Optional subset of columns to materialize
+
+        Returns:
+            DataFrame with the selected rows
+        """
+        if self._data is None:
+            # Lazy table: gather only the requested rows of the requested columns
+            names = self.columns if columns is None else columns
+            if positions is None:
+                return pd.DataFrame({name: self.column(name) for name in names}, copy=False)
+            return pd.DataFrame({name: self.column(name).iloc[positions] for name in names}, copy=False)
+        frame = self._data if columns is None else self._data[columns]
+        if positions is None:
+            return frame
+        return frame.iloc[positions]
+
+    def to_records(self, positions: Optional[np.ndarray] = None) -> List[Dict[str, Any]]:
+        """
+        Produce row records for callers that really need them
+
+        Args:
+            positions: Optional row positions, all rows if omitted
+
+        Returns:
+            List of JSON-friendly dictionaries
+        """
+        return frame_to_records(self.take(positions))
+
+
+class SalesStore(ColumnarTable):
+    """
+    Typed columnar table holding every sales transaction.
+
+    The store is built once per refresh and shared by every reader. The
+    underlying frame must be treated as read-only; readers that need rows
+    ask for them explicitly through ``take`` or ``to_records``.
+    """
+    def __init__(self, frame: pd.DataFrame, version: Optional[int] = None):
+        """
+        Initialize the store
+
+        Args:
+            frame: Already typed sales DataFrame, or a ColumnSource read lazily
+            version: Optional version tag, a new one is assigned if omitted
+        """
+        super().__init__(frame)
+        self.version = version if version is not None else next(_store_versions)
+        # Content hash of the published cache generation holding this store,
+        # the same in every process that attached it (None until published)
+        self.snapshot_hash = None
+        self._indexes = {}
+        self._sorted = None
+
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> 'SalesStore':
+        """
+        Build a store from an untyped DataFrame
+
+        Args:
+            df: DataFrame with raw sales transactions (modified in place)
+
+        Returns:
+            New sales store
+        """
+        store = cls(_coerce_sales_frame(df))
+        store.build_indexes()
+        return store
+
+    @classmethod
+    def from_records(cls, records: Sequence[Dict[str, Any]]) -> 'SalesStore':
+        """
+        Build a store from a list of transaction records
+
+        Args:
+            records: List of transaction dictionaries
+
+        Returns:
+            New sales store
+        """
+        return cls.from_frame(pd.DataFrame(list(records)))
+
+    @property
+    def sorted_by_date(self) -> bool:
+        """Whether dated rows are ordered by the date column, undated ones last"""
+        if self._sorted is None:
+            if DATE_COLUMN not in self.columns:
+                self._sorted = False
+            else:
+                dates = self.column(DATE_COLUMN)
+                dated = self._dated_count()
+                self._sorted = bool(dates.iloc[:dated].is_monotonic_increasing and dates.iloc[dated:].isna().all())
+        return self._sorted
+
+    def date_slice(self, start: Any = None, end: Any = None, include_end: bool = True) -> slice:
+        """
+        Locate a date range with a binary search over the sorted date column
+
+        Args:
+            start: Inclusive lower bound, None for the first row
+            end: Upper bound, None for the last dated row
+            include_end: Whether rows equal to ``end`` are included
+
+        Returns:
+            Slice of row positions within the range
+        """
+        dates = self.column(DATE_COLUMN).to_numpy()
+        # Las filas sin fecha quedan al final y nunca entran en un rango
+        dated = len(dates) - int(np.isnat(dates).sum()) if len(dates) else 0
+        dates = dates[:dated]
+        lo = 0 if start is None else int(np.searchsorted(dates, np.datetime64(pd.Timestamp(start)), side='left'))
+        if end is None:
+            hi = dated
+        else:
+            side = 'right' if include_end else 'left'
+            hi = int(np.searchsorted(dates, np.datetime64(pd.Timestamp(end)), side=side))
+        return slice(lo, max(lo, hi))
+
+    def build_indexes(self):
+        """Build the value -> row positions indexes for the indexed dimensions"""
+        self._indexes = {}
+        for col in INDEXED_COLUMNS:
+            if col in self.columns:
+                self._indexes[col] = self._build_index(col)
+
+    def _build_index(self, name: str) -> Dict[Any, np.ndarray]:
+        """
+        Build a hash index for one column
+
+        Args:
+            name: Column name
+
+        Returns:
+            Dictionary mapping each value to its ascending row positions
+        """
+        if self.is_encoded(name):
+            codes = self.codes(name)
+            values = self.dictionary
+        else:
+            codes, values = pd.factorize(self.column(name).to_numpy(dtype=object))
+
+        order = np.argsort(codes, kind='stable')
+        sorted_codes = codes[order]
+        boundaries = np.flatnonzero(np.diff(sorted_codes)) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(sorted_codes)]))
+
+        index = {}
+        for start, end in zip(starts, ends):
+            if end > start and sorted_codes[start] >= 0:
+                index[values[sorted_codes[start]]] = order[start:end]
+        return index
+
+    def has_index(self, name: str) -> bool:
+        """
+        Check whether a column has a hash index
+
+        Args:
+            name: Column name
+
+        Returns:
+            True if lookups on the column avoid a scan
+        """
+        if name not in self._indexes and name in INDEXED_COLUMNS and name in self.columns:
+            self._indexes[name] = self._build_index(name)
+        return name in self._indexes
+
+    def lookup(self, name: str, values: Sequence[Any]) -> np.ndarray:
+        """
+        Get the row positions holding any of the given values
+
+        Args:
+            name: Indexed column name
+            values: Values to look up
+
+        Returns:
+            Sorted array of row positions
+        """
+        index = self._indexes[name]
+        parts = [index[v] for v in values if v in index]
+        if not parts:
+            return np.array([], dtype=np.int64)
+        if len(parts) == 1:
+            return parts[0]
+        return np.unique(np.concatenate(parts))
+
+    def _dated_count(self) -> int:
+        """Number of rows with a valid date (they precede the undated ones)"""
+        if DATE_COLUMN not in self.columns:
+            return len(self)
+        return len(self) - int(self.column(DATE_COLUMN).isna().sum())
+
+    def month_positions(self, months: set) -> np.ndarray:
+        """
+        Get the row positions of a set of calendar months
+
+        Args:
+            months: Set of (año, mes) pairs, None selects the undated rows
+
+        Returns:
+            Sorted array of row positions
+        """
+        parts = []
+        for month in sorted((m for m in months if m is not None)):
+            start = pd.Timestamp(month[0], month[1], 1)
+            bounds = self.date_slice(start, start + pd.offsets.MonthBegin(1), include_end=False)
+            parts.append(np.arange(bounds.start, bounds.stop))
+        if None in months:
+            parts.append(np.arange(self._dated_count(), len(self)))
+        if not parts:
+            return np.array([], dtype=np.int64)
+        return np.concatenate(parts)
+
+    def merge(self, df: pd.DataFrame, key: Optional[str] = None, since: Any = None) -> Tuple['SalesStore', set]:
+        """
+        Merge a batch of new or changed transactions into a new store
+
+        Only the batch is parsed, typed and encoded; existing rows keep their
+        codes and are spliced with the batch without re-sorting the history.
+        Rows are replaced when ``since`` is given (every existing row dated on
+        or after the watermark) and when ``key`` is given (every existing row
+        whose key appears in the batch).
+
+        Args:
+            df: DataFrame with raw delta transactions (modified in place)
+            key: Optional unique transaction column
+            since: Optional FECHA watermark the batch was requested from; batch
+                rows before it (or without a date) are ignored
+
+        Returns:
+            Tuple of the new store and the calendar months it changed
+        """
+        if len(self.columns) == 0:
+            store = SalesStore.from_frame(df)
+            return store, affected_months(store.frame)
+
+        delta = _coerce_sales_frame(df, self.dictionary)
+        dictionary = ColumnarTable(delta).dictionary
+        old = self._frame if dictionary is None else recast_dimensions(self._frame, dictionary)
+        for col in old.columns:
+            if col not in delta.columns:
+                delta[col] = pd.Series(index=delta.index, dtype=old[col].dtype)
+        delta = delta[list(old.columns) + [col for col in delta.columns if col not in old.columns]]
+
+        dated = self._dated_count()
+        keep = np.ones(len(old), dtype=bool)
+        if since is not None and DATE_COLUMN in old.columns:
+            # El lote reemplaza todo lo posterior a la marca de agua
+            since = pd.Timestamp(since)
+            keep[self.date_slice(since, None)] = False
+            delta = delta[delta[DATE_COLUMN] >= since]
+        if key is not None and key in old.columns and key in delta.columns:
+            keep &= ~old[key].isin(delta[key].dropna()).to_numpy()
+
+        removed = old[~keep]
+        months = affected_months(removed) | affected_months(delta)
+
+        # Splice the sorted batch into the sorted history: rows with the same
+        # date go after the existing ones, undated rows stay at the end
+        kept_positions = np.flatnonzero(keep)
+        kept_dated = kept_positions[kept_positions < dated]
+        kept_undated = kept_positions[kept_positions >= dated]
+        delta_dates = delta[DATE_COLUMN].to_numpy() if DATE_COLUMN in delta.columns else None
+        delta_dated = len(delta) - int(np.isnat(delta_dates).sum()) if delta_dates is not None else len(delta)
+
+        if DATE_COLUMN in old.columns:
+            old_dates = old[DATE_COLUMN].to_numpy()[kept_dated]
+            inserts = np.searchsorted(old_dates, delta_dates[:delta_dated], side='right')
+        else:
+            inserts = np.full(delta_dated, len(kept_dated))
+        total_dated = len(kept_dated) + delta_dated
+        order = np.empty(total_dated, dtype=np.int64)
+        new_slots = inserts + np.arange(delta_dated)
+        is_new = np.zeros(total_dated, dtype=bool)
+        is_new[new_slots] = True
+        order[~is_new] = kept_dated
+        order[new_slots] = len(old) + np.arange(delta_dated)
+        order = np.concatenate((order, kept_undated, len(old) + np.arange(delta_dated, len(delta))))
+
+        combined = pd.concat([old, delta], ignore_index=True)
+        merged = SalesStore(combined.iloc[order].reset_index(drop=True))
+
+        # Fast path: the kept history is an unmoved prefix and the batch lands
+        # after it, so the indexes only need the batch positions appended
+        prefix = len(kept_dated)
+        if self._indexes and len(kept_undated) == 0 and np.array_equal(kept_dated, np.arange(prefix)) \
+                and (delta_dated == 0 or int(inserts.min()) == prefix):
+            merged._indexes = self._extended_indexes(merged, prefix)
+        return merged, months
+
+    def _extended_indexes(self, merged: 'SalesStore', prefix: int) -> Dict[str, Dict[Any, np.ndarray]]:
+        """
+        Carry the hash indexes over to a store that appended rows after a prefix
+
+        Args:
+            merged: New store whose first ``prefix`` rows are this store's first rows
+            prefix: Number of unchanged leading rows
+
+        Returns:
+            Indexes for the merged store
+        """
+        tail = SalesStore(merged.frame.iloc[prefix:].reset_index(drop=True), version=0)
+        indexes = {}
+        for name, index in self._indexes.items():
+            extended = {}
+            for value, positions in index.items():
+                kept = positions[:int(np.searchsorted(positions, prefix))]
+                if len(kept):
+                    extended[value] = kept
+            for value, positions in tail._build_index(name).items():
+                shifted = positions + prefix
+                extended[value] = np.concatenate((extended[value], shifted)) if value in extended else shifted
+            indexes[name] = extended
+        return indexes
+
+
+class SalesStoreBuilder:
+    """
+    Builds a SalesStore from batches of raw transactions.
+
+    Each batch is typed and dictionary-encoded as soon as it arrives,
+    extending the value table of the previous batches, so only one batch of
+    raw records is ever held as Python objects. The result is the same
+    store from_records would build from all the rows at once.
+    """
+    def __init__(self):
+        self._chunks = []
+        self._dictionary = None
+        self.rows = 0
+
+    def add(self, records):
+        """
+        Type and encode one batch
+
+        Args:
+            records: Batch of transaction dictionaries, or a DataFrame
+                (modified in place)
+        """
+        df = records if isinstance(records, pd.DataFrame) else pd.DataFrame(list(records))
+        if len(df) == 0:
+            return
+        chunk = _coerce_sales_frame(df, self._dictionary)
+        dictionary = ColumnarTable(chunk).dictionary
+        if dictionary is not None:
+            self._dictionary = dictionary
+        self._chunks.append(chunk)
+        self.rows += len(chunk)
+
+    def build(self) -> SalesStore:
+        """
+        Assemble the batches into a store
+
+        Returns:
+            New sales store with every row added so far, sorted by date
+        """
+        chunks, self._chunks = self._chunks, []
+        if not chunks:
+            return SalesStore.from_frame(pd.DataFrame())
+
+        # Batches that lacked a column get it typed like the others, and every
+        # batch moves onto the final value table (a superset of its own)
+        dtypes = {}
+        for chunk in chunks:
+            for col in chunk.columns:
+                dtypes.setdefault(col, chunk[col].dtype)
+        for i, chunk in enumerate(chunks):
+            for col, dtype in dtypes.items():
+                if col not in chunk.columns:
+                    chunk[col] = pd.Series(index=chunk.index, dtype=dtype)
+            if self._dictionary is not None:
+                chunk = recast_dimensions(chunk, self._dictionary)
+            chunks[i] = chunk[list(dtypes)]
+
+        frame = pd.concat(chunks, ignore_index=True)
+        del chunks
+        if DATE_COLUMN in frame.columns and len(frame) > 0:
+            # Batches are each sorted already; a stable sort keeps their arrival order for equal dates
+            frame = frame.sort_values(DATE_COLUMN, kind='mergesort', na_position='last', ignore_index=True)
+        store = SalesStore(frame)
+        store.build_indexes()
+        return store
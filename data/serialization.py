@@ -0,0 +1,268 @@
+"""
+Serializers shared by the on-disk cache and the API/tool responses
+"""
+import datetime
+import decimal
+import gzip
+import json
+import logging
+import math
+import threading
+from typing import Any, Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+try:
+    import orjson
+except ImportError:  # optional: the standard library encoder is used instead
+    orjson = None
+
+try:
+    import zstandard
+except ImportError:  # optional: zstd compression falls back to gzip
+    zstandard = None
+
+logger = logging.getLogger(__name__)
+
+# File suffix of each compression codec
+COMPRESSION_SUFFIXES = {
+    None: '',
+    'gzip': '.gz',
+    'zstd': '.zst',
+}
+
+
+def _encode_default(value: Any) -> Any:
+    """Convert the NumPy and pandas values the encoders do not handle natively"""
+    if value is None or value is pd.NaT or value is pd.NA:
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        item = value.item()
+        return None if isinstance(item, float) and math.isnan(item) else item
+    if isinstance(value, decimal.Decimal):
+        return float(value)
+    if isinstance(value, (pd.Period, pd.Timedelta)):
+        return str(value)
+    if isinstance(value, (set, frozenset, tuple)):
+        return list(value)
+    if isinstance(value, pd.Series):
+        return value.tolist()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def encode_json(value: Any) -> bytes:
+    """
+    Encode a value as compact UTF-8 JSON
+
+    NumPy scalars and arrays, pandas timestamps and missing values are
+    handled without a pre-conversion pass. Uses orjson when installed
+    (NaN becomes null), the standard library encoder otherwise.
+
+    Args:
+        value: Value to encode
+
+    Returns:
+        JSON bytes
+    """
+    if orjson is not None:
+        return orjson.dumps(
+            value,
+            default=_encode_default,
+            option=orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+        )
+    return json.dumps(value, default=_encode_default, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def decode_json(data: bytes) -> Any:
+    """
+    Decode JSON bytes
+
+    Args:
+        data: JSON bytes
+
+    Returns:
+        Decoded value
+    """
+    if orjson is not None:
+        return orjson.loads(data)
+    return json.loads(data)
+
+
+class Serializer:
+    """
+    JSON serializer with optional compression of the encoded bytes
+    """
+    def __init__(self, compression: Optional[str] = None, level: Optional[int] = None):
+        """
+        Initialize the serializer
+
+        Args:
+            compression: None, 'gzip' or 'zstd' ('zstd' falls back to gzip
+                when the zstandard package is not installed)
+            level: Optional compression level
+        """
+        if compression == 'zstd' and zstandard is None:
+            logger.warning("zstandard is not installed, using gzip compression")
+            compression = 'gzip'
+        if compression not in COMPRESSION_SUFFIXES:
+            raise ValueError(f"Compresión '{compression}' no soportada")
+        self.compression = compression
+        self.level = level
+
+    @property
+    def suffix(self) -> str:
+        """File name suffix of the serialized payload"""
+        return '.json' + COMPRESSION_SUFFIXES[self.compression]
+
+    def compress(self, data: bytes) -> bytes:
+        """
+        Compress already encoded JSON bytes
+
+        Args:
+            data: JSON bytes
+
+        Returns:
+            Bytes as stored on disk
+        """
+        if self.compression == 'gzip':
+            return gzip.compress(data, compresslevel=self.level if self.level is not None else 6)
+        if self.compression == 'zstd':
+            return zstandard.ZstdCompressor(level=self.level if self.level is not None else 3).compress(data)
+        return data
+
+    def dumps(self, value: Any) -> bytes:
+        """
+        Encode and compress a value
+
+        Args:
+            value: Value to serialize, or JSON bytes that are only compressed
+
+        Returns:
+            Bytes as stored on disk
+        """
+        return self.compress(value if isinstance(value, bytes) else encode_json(value))
+
+    def decompress(self, data: bytes, suffix: Optional[str] = None) -> bytes:
+        """
+        Get the JSON bytes of a stored payload
+
+        Args:
+            data: Stored bytes
+            suffix: File suffix the bytes were read from (defaults to this
+                serializer's), so files written with another codec still load
+
+        Returns:
+            JSON bytes
+        """
+        suffix = suffix or self.suffix
+        if suffix.endswith(COMPRESSION_SUFFIXES['gzip']):
+            return gzip.decompress(data)
+        if suffix.endswith(COMPRESSION_SUFFIXES['zstd']):
+            if zstandard is None:
+                raise ValueError("El archivo requiere el paquete zstandard")
+            return zstandard.ZstdDecompressor().decompress(data)
+        return data
+
+    def loads(self, data: bytes, suffix: Optional[str] = None) -> Any:
+        """
+        Decompress and decode a payload
+
+        Args:
+            data: Stored bytes
+            suffix: File suffix the bytes were read from
+
+        Returns:
+            Decoded value
+        """
+        return decode_json(self.decompress(data, suffix))
+
+
+# Registered serializers by name
+SERIALIZERS = {
+    'json': lambda: Serializer(),
+    'json+gzip': lambda: Serializer('gzip'),
+    'json+zstd': lambda: Serializer('zstd'),
+}
+
+
+def register_serializer(name: str, factory: Callable[[], Serializer]):
+    """
+    Make a serializer available by name
+
+    Args:
+        name: Serializer name (as used in config.CACHE_SERIALIZER)
+        factory: Function building the serializer
+    """
+    SERIALIZERS[name] = factory
+
+
+def get_serializer(name: str = 'json') -> Serializer:
+    """
+    Build a registered serializer
+
+    Args:
+        name: Serializer name
+
+    Returns:
+        Serializer instance
+    """
+    if name not in SERIALIZERS:
+        raise ValueError(f"Serializador '{name}' no soportado (disponibles: {', '.join(SERIALIZERS)})")
+    return SERIALIZERS[name]()
+
+
+class EncodedCache:
+    """
+    Pre-encoded JSON bytes kept per data version.
+
+    A value is encoded the first time it is requested for a version and the
+    same bytes are served until the version changes, so unchanged data is
+    never re-encoded.
+    """
+    def __init__(self):
+        self._entries = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: Any, version: Any, value: Callable[[], Any]) -> bytes:
+        """
+        Get the encoded bytes of a value
+
+        Args:
+            key: Cache key
+            version: Version of the data the value is built from
+            value: Function producing the value on a miss
+
+        Returns:
+            JSON bytes
+        """
+        entry = self._entries.get(key)
+        if entry is not None and entry[0] == version:
+            return entry[1]
+        encoded = encode_json(value())
+        with self._lock:
+            self._entries[key] = (version, encoded)
+        return encoded
+
+    def put(self, key: Any, version: Any, encoded: bytes):
+        """
+        Store bytes that were already encoded
+
+        Args:
+            key: Cache key
+            version: Version of the data
+            encoded: JSON bytes
+        """
+        with self._lock:
+            self._entries[key] = (version, encoded)
+
+    def clear(self):
+        """Drop every cached encoding"""
+        with self._lock:
+            self._entries = {}
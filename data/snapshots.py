@@ -0,0 +1,295 @@
+"""
+Atomic, generation-numbered on-disk snapshots
+"""
+import datetime
+import hashlib
+import json
+import logging
+import os
+import re
+import shutil
+import tempfile
+import time
+from typing import Dict, Any, Callable, List, Optional
+
+import pandas as pd
+
+from .serialization import Serializer, encode_json
+
+logger = logging.getLogger(__name__)
+
+# File naming the published generation of a snapshot directory
+POINTER_FILE = 'CURRENT'
+
+# Metadata written inside every generation
+META_FILE = 'snapshot.json'
+
+# Payload file name (before the serializer suffix) of JSON snapshots
+JSON_FILE = 'data'
+
+GENERATION_PATTERN = re.compile(r'^gen-(\d+)$')
+
+
+def content_hash(value: Any) -> str:
+    """
+    Hash the content a snapshot is built from
+
+    Args:
+        value: DataFrame or JSON-serializable payload
+
+    Returns:
+        Hex SHA-256 digest, equal for equal content
+    """
+    digest = hashlib.sha256()
+    if isinstance(value, pd.DataFrame):
+        digest.update(json.dumps([str(c) for c in value.columns]).encode('utf-8'))
+        digest.update(pd.util.hash_pandas_object(value, index=False).to_numpy().tobytes())
+    else:
+        digest.update(encode_json(value))
+    return digest.hexdigest()
+
+
+def write_json_snapshot(directory: str, data: Any, serializer: Optional[Serializer] = None):
+    """
+    Write a JSON payload into a snapshot directory
+
+    Args:
+        directory: Snapshot directory
+        data: JSON-serializable data, or JSON bytes already encoded
+        serializer: Serializer deciding the encoding and compression
+    """
+    serializer = serializer or Serializer()
+    with open(os.path.join(directory, JSON_FILE + serializer.suffix), 'wb') as f:
+        f.write(serializer.dumps(data))
+
+
+def read_json_snapshot(directory: str, serializer: Optional[Serializer] = None) -> bytes:
+    """
+    Read the JSON payload of a snapshot directory
+
+    The payload is found by name, so snapshots written with another
+    compression setting still load.
+
+    Args:
+        directory: Snapshot directory
+        serializer: Serializer used to decompress
+
+    Returns:
+        Uncompressed JSON bytes
+    """
+    serializer = serializer or Serializer()
+    name = next(n for n in sorted(os.listdir(directory)) if n.startswith(JSON_FILE + '.json'))
+    with open(os.path.join(directory, name), 'rb') as f:
+        return serializer.decompress(f.read(), suffix=name)
+
+
+def _write_pointer(path: str, meta: Dict[str, Any]):
+    """Replace a pointer file atomically"""
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.pointer-')
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(meta, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class SnapshotStore:
+    """
+    Directory of immutable snapshot generations.
+
+    Every generation is written into a temporary directory and published
+    with an atomic rename, then the ``CURRENT`` pointer is replaced
+    atomically, so readers in any process only ever see complete
+    snapshots. Each generation carries the hash of the content it was
+    built from; publishing the same content again is a no-op. The newest
+    ``keep`` generations stay on disk for rollback, and older ones until
+    they have been replaced for ``grace`` seconds.
+    """
+    def __init__(self, root: str, keep: int = 3, grace: float = 3600):
+        """
+        Initialize the store
+
+        Args:
+            root: Directory holding the generations
+            keep: Number of generations kept on disk
+            grace: Seconds a replaced generation stays on disk for readers
+                that still hold it
+        """
+        self.root = root
+        self.keep = max(1, keep)
+        self.grace = grace
+
+    def path(self, generation: int) -> str:
+        """Directory of one generation"""
+        return os.path.join(self.root, f"gen-{generation:06d}")
+
+    def generations(self) -> List[int]:
+        """Generations present on disk, oldest first"""
+        if not os.path.isdir(self.root):
+            return []
+        found = (GENERATION_PATTERN.match(name) for name in os.listdir(self.root))
+        return sorted(int(m.group(1)) for m in found if m)
+
+    def current(self) -> Optional[Dict[str, Any]]:
+        """
+        Get the published generation
+
+        Returns:
+            Metadata with generation, hash, created and path, or None if
+            nothing was published
+        """
+        pointer = os.path.join(self.root, POINTER_FILE)
+        if not os.path.exists(pointer):
+            return None
+        try:
+            with open(pointer, 'r') as f:
+                meta = json.load(f)
+        except Exception as e:
+            logger.error(f"Error reading snapshot pointer {pointer}: {str(e)}")
+            return None
+        meta['path'] = self.path(meta['generation'])
+        return meta if os.path.isdir(meta['path']) else None
+
+    def publish(
+        self,
+        write: Callable[[str], None],
+        hash_value: str,
+        extra: Optional[Dict[str, Any]] = None,
+        force: bool = False
+    ) -> Optional[Dict[str, Any]]:
+        """
+        Write and publish a new generation
+
+        Args:
+            write: Function filling the directory it receives
+            hash_value: Hash of the content being written
+            extra: Additional metadata stored in the pointer
+            force: Publish even if the content hash is unchanged
+
+        Returns:
+            Metadata of the new generation, or None if the current one
+            already holds the same content
+        """
+        current = self.current()
+        if current is not None and current.get('hash') == hash_value and not force:
+            logger.info(f"Snapshot {self.root} unchanged (generation {current['generation']}), not rewritten")
+            return None
+
+        os.makedirs(self.root, exist_ok=True)
+        known = self.generations() + ([current['generation']] if current else [])
+        generation = max(known, default=0) + 1
+
+        meta = dict(extra or {})
+        meta.update({
+            'generation': generation,
+            'hash': hash_value,
+            'created': datetime.datetime.now().isoformat()
+        })
+
+        tmp = tempfile.mkdtemp(dir=self.root, prefix='.tmp-')
+        try:
+            write(tmp)
+            with open(os.path.join(tmp, META_FILE), 'w') as f:
+                json.dump(meta, f)
+            os.rename(tmp, self.path(generation))
+        except Exception:
+            shutil.rmtree(tmp, ignore_errors=True)
+            raise
+
+        _write_pointer(os.path.join(self.root, POINTER_FILE), meta)
+        self._prune(generation, current['generation'] if current else None)
+
+        meta['path'] = self.path(generation)
+        return meta
+
+    def validate(self) -> Optional[Dict[str, Any]]:
+        """
+        Record that the source still matches the published generation
+
+        The pointer is rewritten with a ``validated`` time, so other
+        processes learn the data is fresh without a new generation.
+
+        Returns:
+            Updated metadata, or None if nothing was published
+        """
+        current = self.current()
+        if current is None:
+            return None
+        current.pop('path')
+        current['validated'] = datetime.datetime.now().isoformat()
+        _write_pointer(os.path.join(self.root, POINTER_FILE), current)
+        current['path'] = self.path(current['generation'])
+        return current
+
+    def rollback(self, generation: Optional[int] = None) -> Optional[Dict[str, Any]]:
+        """
+        Point the store back to an older generation
+
+        The restored generation is marked validated now: its data is what
+        should be served, so readers must not see it as stale and replace it
+        with the upstream data it backs out before the next refresh is due.
+
+        Args:
+            generation: Generation to restore, defaults to the one before
+                the current generation
+
+        Returns:
+            Metadata of the restored generation, or None if there is none
+        """
+        current = self.current()
+        available = self.generations()
+        if generation is None:
+            older = [g for g in available if current is None or g < current['generation']]
+            if not older:
+                return None
+            generation = older[-1]
+        elif generation not in available:
+            return None
+
+        meta = {'generation': generation, 'hash': None}
+        saved = os.path.join(self.path(generation), META_FILE)
+        if os.path.exists(saved):
+            with open(saved, 'r') as f:
+                meta.update(json.load(f))
+        meta['validated'] = datetime.datetime.now().isoformat()
+        _write_pointer(os.path.join(self.root, POINTER_FILE), meta)
+        logger.info(f"Snapshot {self.root} rolled back to generation {generation}")
+
+        meta['path'] = self.path(generation)
+        return meta
+
+    def _published_at(self, generation: int) -> Optional[float]:
+        """When a generation was published, None if it is gone"""
+        try:
+            return os.path.getmtime(os.path.join(self.path(generation), META_FILE))
+        except OSError:
+            return None
+
+    def _prune(self, current: int, previous: Optional[int] = None):
+        """
+        Delete the generations beyond the newest ``keep``
+
+        Workers attach a generation lazily and memory-map its columns on
+        first use, so one may still be reading a generation after the
+        pointer moved on. The previous current generation is never deleted
+        here, nor one replaced less than ``grace`` seconds ago.
+
+        Args:
+            current: Generation just published
+            previous: Generation that was current before it
+        """
+        generations = self.generations()
+        now = time.time()
+        for i, generation in enumerate(generations[:-self.keep]):
+            if generation in (current, previous):
+                continue
+            # It stopped being the newest when the next generation was published
+            replaced_at = self._published_at(generations[i + 1])
+            if replaced_at is not None and now - replaced_at < self.grace:
+                continue
+            shutil.rmtree(self.path(generation), ignore_errors=True)
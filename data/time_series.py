@@ -0,0 +1,189 @@
+"""
+Rolling time-window KPIs over the sales store
+"""
+import logging
+from typing import Dict, Any, List, Optional
+
+import numpy as np
+import pandas as pd
+
+from .sales_store import DATE_COLUMN, frame_to_records
+from .sales_filters import compile_filters, normalize_filters
+from .sales_aggregation import AggregationCache
+
+logger = logging.getLogger(__name__)
+
+# Supported window granularities -> pandas period frequency
+FREQUENCIES = {
+    'month': 'M',
+    'week': 'W-SUN',  # semanas de lunes a domingo
+    'quarter': 'Q',
+}
+
+# Periods per year, used for the year-over-year comparison
+PERIODS_PER_YEAR = {
+    'month': 12,
+    'week': 52,
+    'quarter': 4,
+}
+
+# Maximum number of periods a single window may return
+MAX_WINDOW_PERIODS = 520
+
+
+def period_label(period: pd.Period, frequency: str) -> str:
+    """
+    Human readable key for a period
+
+    Args:
+        period: Pandas period
+        frequency: month, week or quarter
+
+    Returns:
+        ``2024-03`` for months, ``2024Q1`` for quarters and the Monday date
+        for weeks
+    """
+    if frequency == 'week':
+        return period.start_time.strftime('%Y-%m-%d')
+    return str(period)
+
+
+def period_totals(df: pd.DataFrame, frequency: str) -> pd.DataFrame:
+    """
+    Additive per-period totals in one grouping pass
+
+    Args:
+        df: Typed sales rows with FECHA and IMPORTE_TOTAL
+        frequency: month, week or quarter
+
+    Returns:
+        DataFrame indexed by period with ventas, importes, transacciones
+        and (if CLIENTE is present) clientes
+    """
+    periods = df[DATE_COLUMN].dt.to_period(FREQUENCIES[frequency])
+    named = {
+        'ventas': pd.NamedAgg(column='IMPORTE_TOTAL', aggfunc='sum'),
+        'importes': pd.NamedAgg(column='IMPORTE_TOTAL', aggfunc='count'),
+        'transacciones': pd.NamedAgg(column=DATE_COLUMN, aggfunc='size'),
+    }
+    if 'CLIENTE' in df.columns:
+        named['clientes'] = pd.NamedAgg(column='CLIENTE', aggfunc='nunique')
+    # Las filas sin fecha no pertenecen a ningún periodo
+    return df.groupby(periods, observed=True).agg(**named)
+
+
+def window_frame(totals: pd.DataFrame, frequency: str, start: pd.Period, end: pd.Period) -> pd.DataFrame:
+    """
+    Derive the windowed KPIs from the per-period totals
+
+    Deltas and running totals are computed over the full history up to the
+    end of the window, so the first periods of the window still compare
+    against the periods before it.
+
+    Args:
+        totals: Output of period_totals
+        frequency: month, week or quarter
+        start: First period of the window
+        end: Last period of the window
+
+    Returns:
+        One row per period in [start, end], empty periods filled with zeros
+    """
+    first = min(start, totals.index.min()) if len(totals) else start
+    full = totals.reindex(pd.period_range(first, end, freq=FREQUENCIES[frequency]), fill_value=0)
+
+    ventas = full['ventas'].astype('float64')
+    previous = ventas.shift(1)
+    last_year = ventas.shift(PERIODS_PER_YEAR[frequency])
+
+    result = pd.DataFrame(index=full.index)
+    result['periodo'] = [period_label(p, frequency) for p in full.index]
+    result['inicio'] = full.index.start_time
+    result['ventas'] = ventas
+    result['transacciones'] = full['transacciones'].astype('int64')
+    if 'clientes' in full.columns:
+        result['clientes'] = full['clientes'].astype('int64')
+    result['ticket_promedio'] = (ventas / full['importes'].where(full['importes'] > 0)).fillna(0.0)
+    result['variacion_vs_anterior'] = ventas - previous
+    result['variacion_vs_anterior_pct'] = (ventas - previous) / previous.where(previous != 0) * 100
+    result['variacion_anual'] = ventas - last_year
+    result['variacion_anual_pct'] = (ventas - last_year) / last_year.where(last_year != 0) * 100
+    result['acumulado'] = ventas.cumsum()
+    result['acumulado_anual'] = ventas.groupby(full.index.year).cumsum()
+
+    return result.loc[start:end]
+
+
+class TimeSeriesEngine:
+    """
+    Rolling windows (last N months, weeks or quarters) over the sales store.
+
+    The only pass over the rows is one vectorized grouping per frequency and
+    filter set; every window, delta and running total is derived from those
+    per-period totals. Both the totals and the windows are cached per data
+    version.
+    """
+    def __init__(self):
+        self._cache = AggregationCache()
+
+    def totals(self, store, frequency: str, filters: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+        """
+        Get the cached per-period totals
+
+        Args:
+            store: SalesStore to read from
+            frequency: month, week or quarter
+            filters: Optional filter specification
+
+        Returns:
+            DataFrame indexed by period
+        """
+        key = ('totals', frequency, normalize_filters(filters))
+        totals = self._cache.get(store.version, key)
+        if totals is None:
+            positions = compile_filters(filters).apply(store) if filters else None
+            columns = [c for c in [DATE_COLUMN, 'IMPORTE_TOTAL', 'CLIENTE'] if c in store.columns]
+            totals = period_totals(store.take(positions, columns), frequency)
+            self._cache.put(store.version, key, totals)
+        return totals
+
+    def window(
+        self,
+        store,
+        frequency: str = 'month',
+        last_n: int = 12,
+        end: Any = None,
+        filters: Optional[Dict[str, Any]] = None
+    ) -> List[Dict[str, Any]]:
+        """
+        KPIs for the last N periods
+
+        Args:
+            store: SalesStore to read from
+            frequency: month, week or quarter
+            last_n: Number of periods in the window
+            end: Date inside the last period (defaults to today)
+            filters: Optional filter specification
+
+        Returns:
+            Records ordered from oldest to newest with ventas, transacciones,
+            clientes, ticket_promedio, deltas against the previous period and
+            the same period last year, and running totals
+        """
+        if frequency not in FREQUENCIES:
+            raise ValueError(f"Frecuencia '{frequency}' no soportada (disponibles: {', '.join(FREQUENCIES)})")
+        last_n = max(1, min(int(last_n), MAX_WINDOW_PERIODS))
+        end_period = pd.Timestamp(end if end is not None else pd.Timestamp.now()).to_period(FREQUENCIES[frequency])
+
+        key = ('window', frequency, last_n, str(end_period), normalize_filters(filters))
+        records = self._cache.get(store.version, key)
+        if records is None:
+            totals = self.totals(store, frequency, filters)
+            frame = window_frame(totals, frequency, end_period - (last_n - 1), end_period)
+            records = frame_to_records(frame.replace([np.inf, -np.inf], np.nan))
+            self._cache.put(store.version, key, records)
+        return records
+
+    def clear(self):
+        """Drop every cached series"""
+        self._cache.clear()
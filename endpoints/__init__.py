@@ -1,9 +1,24 @@
 """
 Endpoints package initialization
 """
-from .data_endpoints import fetch_data, setup_data_scheduler
+from .data_endpoints import fetch_data, fetch_data_conditional, fetch_data_stream, setup_data_scheduler
+from .http_client import CircuitOpenError, FetchClient, get_client
+from .pagination import endpoint_pagination, endpoint_url, fetch_pages
+from .scheduler import CronSchedule, RefreshScheduler
+from .sales_api import create_sales_blueprint
 
 __all__ = [
     'fetch_data',
-    'setup_data_scheduler'
+    'fetch_data_conditional',
+    'fetch_data_stream',
+    'fetch_pages',
+    'endpoint_url',
+    'endpoint_pagination',
+    'FetchClient',
+    'CircuitOpenError',
+    'get_client',
+    'setup_data_scheduler',
+    'RefreshScheduler',
+    'CronSchedule',
+    'create_sales_blueprint'
 ]
\ No newline at end of file
@@ -1,33 +1,160 @@
 """
 Data endpoints for fetching data from external sources
 """
+import hashlib
 import requests
 import logging
-import schedule
 import time
 import threading
-from typing import Dict, Any, Optional
+from typing import Dict, Any, Callable, List, Optional, Tuple
 
 import config
+from data.json_stream import JSONRecordStream
+from data.serialization import decode_json
+from .http_client import get_client
+from .scheduler import RefreshScheduler
 
 logger = logging.getLogger(__name__)
 
-def fetch_data(endpoint: str) -> Dict[str, Any]:
+# Response headers remembered per domain to make the next request conditional
+VALIDATOR_HEADERS = {
+    'etag': 'ETag',
+    'last_modified': 'Last-Modified'
+}
+
+def fetch_data(
+    endpoint: str,
+    params: Optional[Dict[str, Any]] = None,
+    since: Optional[Any] = None,
+    since_param: str = 'since'
+) -> Dict[str, Any]:
     """
     Fetch data from an endpoint
     
     Args:
         endpoint: URL endpoint to fetch data from
+        params: Optional query string parameters
+        since: Optional watermark (datetime or string) for endpoints that
+            can return only the records changed since then
+        since_param: Query string parameter carrying the watermark
         
     Returns:
         Dictionary containing the fetched data
     """
+    return fetch_data_conditional(endpoint, params=params, since=since, since_param=since_param)['data']
+
+def fetch_data_conditional(
+    endpoint: str,
+    validators: Optional[Dict[str, Any]] = None,
+    params: Optional[Dict[str, Any]] = None,
+    since: Optional[Any] = None,
+    since_param: str = 'since',
+    parse: bool = True
+) -> Dict[str, Any]:
+    """
+    Fetch data from an endpoint unless it is unchanged
+    
+    The ETag and Last-Modified of the previous response are sent as
+    If-None-Match / If-Modified-Since; a 304 answer, or a body whose hash
+    equals the previous one, is reported as not modified without parsing
+    the body.
+    
+    Args:
+        endpoint: URL endpoint to fetch data from
+        validators: Validators of the previous response (etag,
+            last_modified and hash), as returned by this function
+        params: Optional query string parameters
+        since: Optional watermark (datetime or string) for endpoints that
+            can return only the records changed since then
+        since_param: Query string parameter carrying the watermark
+        parse: Decode the JSON body; if False, data holds the raw bytes
+            (e.g. to parse them in a worker process)
+        
+    Returns:
+        Dictionary with modified (False on 304 or identical payload), data
+        (None when not modified), validators of this response and bytes
+        received
+    """
+    params, headers = _conditional_request(validators, params, since, since_param)
     try:
-        response = requests.get(endpoint, timeout=30)
-        response.raise_for_status()  # Raise exception for HTTP errors
+        response = get_client().get(endpoint, params=params, headers=headers)
+        return _conditional_result(endpoint, response, validators, parse=parse)
+    except requests.exceptions.RequestException as e:
+        logger.error(f"Error fetching data from {endpoint}: {str(e)}")
+        raise
+    except ValueError as e:
+        logger.error(f"Error parsing JSON from {endpoint}: {str(e)}")
+        raise
+
+def fetch_data_stream(
+    endpoint: str,
+    on_batch: Callable[[List[Dict[str, Any]]], None],
+    validators: Optional[Dict[str, Any]] = None,
+    params: Optional[Dict[str, Any]] = None,
+    since: Optional[Any] = None,
+    since_param: str = 'since',
+    records_key: Optional[str] = None,
+    batch_size: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Download a records payload in chunks and hand it over in batches
+    
+    The body is never held whole: it is read in chunks of
+    config.DATA_STREAM_CHUNK_BYTES, parsed incrementally, and every
+    ``batch_size`` records are passed to ``on_batch`` as soon as they are
+    complete, so peak memory is bounded by the batch size rather than the
+    payload size. The request is conditional like fetch_data_conditional;
+    an identical payload is only detected at the end, once its hash is
+    known.
+    
+    Args:
+        endpoint: URL endpoint to fetch data from
+        on_batch: Function receiving each list of records
+        validators: Validators of the previous response
+        params: Optional query string parameters
+        since: Optional watermark for endpoints returning deltas
+        since_param: Query string parameter carrying the watermark
+        records_key: Key of the records array when the payload is an object
+        batch_size: Records per batch (defaults to config.DATA_STREAM_BATCH_SIZE)
         
-        # Try to parse as JSON
-        return response.json()
+    Returns:
+        Dictionary with modified, validators, bytes received, records parsed
+        and meta (the other entries of an object payload)
+    """
+    batch_size = max(1, batch_size or config.DATA_STREAM_BATCH_SIZE)
+    params, headers = _conditional_request(validators, params, since, since_param)
+    validators = validators or {}
+    try:
+        response = get_client().get(endpoint, params=params, headers=headers, stream=True)
+        with response:
+            if response.status_code == 304:
+                logger.info(f"{endpoint} not modified (304)")
+                return {"modified": False, "validators": validators, "bytes": 0, "records": 0, "meta": {}}
+            response.raise_for_status()  # Raise exception for HTTP errors
+            
+            digest = hashlib.sha256()
+            parser = JSONRecordStream(records_key)
+            received = 0
+            records = 0
+            batch = []
+            for chunk in response.iter_content(chunk_size=config.DATA_STREAM_CHUNK_BYTES):
+                digest.update(chunk)
+                received += len(chunk)
+                batch.extend(parser.feed(chunk))
+                while len(batch) >= batch_size:
+                    on_batch(batch[:batch_size])
+                    records += batch_size
+                    batch = batch[batch_size:]
+            batch.extend(parser.close())
+            if batch:
+                on_batch(batch)
+                records += len(batch)
+        
+        current = {key: response.headers.get(header) for key, header in VALIDATOR_HEADERS.items()}
+        current['hash'] = digest.hexdigest()
+        modified = validators.get('hash') != current['hash']
+        logger.info(f"Streamed {records} records ({received} bytes) from {endpoint}")
+        return {"modified": modified, "validators": current, "bytes": received, "records": records, "meta": parser.meta}
     except requests.exceptions.RequestException as e:
         logger.error(f"Error fetching data from {endpoint}: {str(e)}")
         raise
@@ -35,31 +162,68 @@ def fetch_data(endpoint: str) -> Dict[str, Any]:
         logger.error(f"Error parsing JSON from {endpoint}: {str(e)}")
         raise
 
-def setup_data_scheduler(data_manager) -> None:
+def _conditional_request(
+    validators: Optional[Dict[str, Any]],
+    params: Optional[Dict[str, Any]],
+    since: Optional[Any],
+    since_param: str
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, str]]]:
+    """Build the query string and the conditional headers of a fetch"""
+    validators = validators or {}
+    params = dict(params or {})
+    if since is not None:
+        params[since_param] = since.isoformat() if hasattr(since, 'isoformat') else str(since)
+    
+    headers = {}
+    if validators.get('etag'):
+        headers['If-None-Match'] = validators['etag']
+    if validators.get('last_modified'):
+        headers['If-Modified-Since'] = validators['last_modified']
+    return params or None, headers or None
+
+def _conditional_result(
+    endpoint: str,
+    response: requests.Response,
+    validators: Optional[Dict[str, Any]],
+    parse: bool = True
+) -> Dict[str, Any]:
+    """Turn a response into a fetch result, parsing the body only if it changed"""
+    validators = validators or {}
+    if response.status_code == 304:
+        logger.info(f"{endpoint} not modified (304)")
+        return {"modified": False, "data": None, "validators": validators, "bytes": 0}
+    response.raise_for_status()  # Raise exception for HTTP errors
+    
+    body = response.content
+    current = {key: response.headers.get(header) for key, header in VALIDATOR_HEADERS.items()}
+    current['hash'] = hashlib.sha256(body).hexdigest()
+    if validators.get('hash') == current['hash']:
+        logger.info(f"{endpoint} returned an identical payload, not parsed")
+        return {"modified": False, "data": None, "validators": current, "bytes": len(body)}
+    
+    # Try to parse as JSON
+    return {"modified": True, "data": decode_json(body) if parse else body, "validators": current, "bytes": len(body)}
+
+def setup_data_scheduler(data_manager) -> RefreshScheduler:
     """
     Set up a scheduler to refresh data periodically
     
+    Every process may call this: the processes on one host elect a leader
+    through a lock file and only the leader refreshes.
+    
     Args:
         data_manager: Data manager instance
+        
+    Returns:
+        The running scheduler (its status() reports the last and next runs)
     """
-    # Set up the schedule to refresh data
-    refresh_interval = config.DATA_REFRESH_INTERVAL
-    
-    # Convert seconds to hours for better readability in logging
-    hours = refresh_interval / 3600
-    logger.info(f"Setting up data refresh scheduler to run every {hours} hours")
+    scheduler = RefreshScheduler(data_manager)
+    for domain, schedule in scheduler.schedules.items():
+        logger.info(f"Refreshing {domain} data {schedule} (jitter up to {scheduler.jitter:g}s)")
     
-    # Schedule the refresh job
-    schedule.every(refresh_interval).seconds.do(data_manager.refresh_all_data)
+    # Leadership is decided on start; a missing domain is only fetched by the leader
+    scheduler.start()
+    data_manager.set_refresh_gate(lambda: scheduler.leader)
     
-    # Start the scheduler in a background thread
-    scheduler_thread = threading.Thread(target=_run_scheduler, daemon=True)
-    scheduler_thread.start()
-    
-    logger.info("Data refresh scheduler started")
-
-def _run_scheduler() -> None:
-    """Run the scheduler in a loop"""
-    while True:
-        schedule.run_pending()
-        time.sleep(1)
\ No newline at end of file
+    logger.info(f"Data refresh scheduler started ({'leader' if scheduler.leader else 'follower'})")
+    return scheduler
@@ -0,0 +1,257 @@
+"""
+Shared HTTP client for fetching data from external sources
+"""
+import logging
+import random
+import threading
+import time
+from typing import Dict, Any, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+import config
+
+logger = logging.getLogger(__name__)
+
+# Status codes worth retrying: the upstream is overloaded or restarting
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+
+class CircuitOpenError(requests.exceptions.RequestException):
+    """Raised without contacting an endpoint whose circuit is open"""
+
+
+class CircuitBreaker:
+    """
+    Failure counter of one endpoint.
+
+    After ``threshold`` consecutive failed fetches (each counted once, after
+    its retries) the circuit opens and fetches fail immediately for
+    ``reset_timeout`` seconds; then a single trial fetch is let through,
+    closing the circuit again if it succeeds. Only 2xx and 3xx answers are
+    successes; client errors (4xx) leave the count unchanged.
+    """
+    def __init__(self, threshold: int = 5, reset_timeout: float = 60):
+        """
+        Initialize the breaker
+
+        Args:
+            threshold: Consecutive failures that open the circuit
+            reset_timeout: Seconds the circuit stays open
+        """
+        self.threshold = max(1, threshold)
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at = None
+        self._trial = False
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        """closed, open or half-open"""
+        if self.opened_at is None:
+            return 'closed'
+        if time.monotonic() - self.opened_at >= self.reset_timeout:
+            return 'half-open'
+        return 'open'
+
+    def allow(self) -> bool:
+        """Whether a request may be sent now"""
+        with self._lock:
+            state = self.state
+            if state == 'closed':
+                return True
+            if state == 'half-open' and not self._trial:
+                self._trial = True
+                return True
+            return False
+
+    def record_success(self):
+        """Close the circuit"""
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+            self._trial = False
+
+    def release(self):
+        """End a half-open trial without counting it either way"""
+        with self._lock:
+            self._trial = False
+
+    def record_failure(self):
+        """Count a failure, opening the circuit at the threshold"""
+        with self._lock:
+            self.failures += 1
+            if self._trial or self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+            self._trial = False
+
+
+class FetchClient:
+    """
+    Pooled HTTP client with timeouts, retries and per-endpoint circuit breakers.
+
+    One keep-alive session is shared by every fetch, so repeated refreshes
+    reuse their connections and TLS sessions. Connection errors, timeouts
+    and 429/5xx answers are retried with exponential backoff and full
+    jitter.
+    """
+    def __init__(
+        self,
+        connect_timeout: Optional[float] = None,
+        read_timeout: Optional[float] = None,
+        retries: Optional[int] = None,
+        backoff: Optional[float] = None,
+        max_backoff: Optional[float] = None,
+        breaker_threshold: Optional[int] = None,
+        breaker_reset: Optional[float] = None,
+        pool_size: Optional[int] = None
+    ):
+        """
+        Initialize the client (unset arguments default to the DATA_FETCH_* settings)
+
+        Args:
+            connect_timeout: Seconds to establish a connection
+            read_timeout: Seconds to wait for data from the server
+            retries: Retries after the first attempt
+            backoff: Base delay of the exponential backoff in seconds
+            max_backoff: Upper bound of a single delay in seconds
+            breaker_threshold: Consecutive failures that open an endpoint's circuit
+            breaker_reset: Seconds an open circuit rejects requests
+            pool_size: Connections kept alive per host
+        """
+        self.timeout = (
+            connect_timeout if connect_timeout is not None else config.DATA_FETCH_CONNECT_TIMEOUT,
+            read_timeout if read_timeout is not None else config.DATA_FETCH_READ_TIMEOUT
+        )
+        self.retries = retries if retries is not None else config.DATA_FETCH_RETRIES
+        self.backoff = backoff if backoff is not None else config.DATA_FETCH_BACKOFF
+        self.max_backoff = max_backoff if max_backoff is not None else config.DATA_FETCH_MAX_BACKOFF
+        self.breaker_threshold = breaker_threshold if breaker_threshold is not None else config.DATA_FETCH_BREAKER_THRESHOLD
+        self.breaker_reset = breaker_reset if breaker_reset is not None else config.DATA_FETCH_BREAKER_RESET
+        pool_size = pool_size if pool_size is not None else config.DATA_FETCH_POOL_SIZE
+
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size)
+        self.session.mount('http://', adapter)
+        self.session.mount('https://', adapter)
+        self._breakers = {}
+        self._lock = threading.Lock()
+
+    def breaker(self, url: str) -> CircuitBreaker:
+        """
+        Get the circuit breaker of an endpoint
+
+        Args:
+            url: Request URL (the query string is ignored)
+
+        Returns:
+            Circuit breaker shared by every request to the endpoint
+        """
+        parts = urlsplit(url)
+        key = (parts.scheme, parts.netloc, parts.path)
+        with self._lock:
+            if key not in self._breakers:
+                self._breakers[key] = CircuitBreaker(self.breaker_threshold, self.breaker_reset)
+            return self._breakers[key]
+
+    def _delay(self, attempt: int, response: Optional[requests.Response] = None) -> float:
+        """Backoff before the next attempt, honouring a numeric Retry-After"""
+        retry_after = response.headers.get('Retry-After') if response is not None else None
+        if retry_after and retry_after.isdigit():
+            return min(float(retry_after), self.max_backoff)
+        return random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+
+    def get(
+        self,
+        url: str,
+        params: Optional[Dict[str, Any]] = None,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: Optional[Tuple[float, float]] = None,
+        stream: bool = False
+    ) -> requests.Response:
+        """
+        Send a GET request, retrying transient failures
+
+        Args:
+            url: Request URL
+            params: Optional query string parameters
+            headers: Optional request headers
+            timeout: Optional (connect, read) timeouts overriding the client's
+            stream: Leave the body unread so it can be consumed in chunks
+
+        Returns:
+            The response (2xx, 3xx or a non-retryable 4xx, not raised)
+
+        Raises:
+            CircuitOpenError: If the endpoint's circuit is open
+            requests.exceptions.RequestException: If every attempt failed
+        """
+        # The breaker is consulted once per fetch: its retries never re-check
+        # it, and a half-open trial covers every attempt of this call
+        breaker = self.breaker(url)
+        if not breaker.allow():
+            raise CircuitOpenError(f"Circuito abierto para {url}: demasiados errores consecutivos")
+
+        attempt = 0
+        while True:
+            response = None
+            try:
+                response = self.session.get(
+                    url, params=params, headers=headers, timeout=timeout or self.timeout, stream=stream
+                )
+                if response.status_code < 400:
+                    breaker.record_success()
+                    return response
+                if response.status_code not in RETRY_STATUSES:
+                    # A client error says nothing about the upstream's health:
+                    # it neither closes the circuit nor counts against it
+                    breaker.release()
+                    return response
+                error = requests.exceptions.HTTPError(
+                    f"{response.status_code} Server Error for url: {response.url}", response=response
+                )
+            except (requests.exceptions.ConnectionError, requests.exceptions.Timeout) as e:
+                error = e
+            except requests.exceptions.RequestException:
+                # Not retryable (e.g. an invalid URL); still releases a half-open trial
+                breaker.record_failure()
+                raise
+
+            if attempt >= self.retries:
+                # A fetch counts as one failure, however many attempts it took
+                breaker.record_failure()
+                if response is not None:
+                    return response
+                raise error
+            if response is not None:
+                response.close()
+            delay = self._delay(attempt, response)
+            attempt += 1
+            logger.warning(f"Fetching {url} failed ({error}), retry {attempt}/{self.retries} in {delay:.2f}s")
+            time.sleep(delay)
+
+    def close(self):
+        """Close the pooled connections"""
+        self.session.close()
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> FetchClient:
+    """
+    Get the process-wide fetch client
+
+    Returns:
+        Shared FetchClient, created on first use
+    """
+    global _client
+    if _client is None:
+        with _client_lock:
+            if _client is None:
+                _client = FetchClient()
+    return _client
@@ -0,0 +1,213 @@
+"""
+Fetching of paginated endpoints (cursor, offset and Link header styles)
+"""
+import hashlib
+import logging
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Callable, List, Optional, Union
+from urllib.parse import urljoin
+
+import config
+from data.serialization import decode_json
+from .http_client import get_client
+
+logger = logging.getLogger(__name__)
+
+PAGINATION_STYLES = ('cursor', 'offset', 'link')
+
+# Settings of every style, overridable per domain
+DEFAULT_PAGINATION = {
+    'page_size': 1000,
+    'limit_param': 'limit',
+    'records_key': None,        # records array of an object page (dotted path); defaults to the first array
+    'cursor_param': 'cursor',
+    'next_field': 'next_cursor',  # cursor style: field of the page holding the next cursor (dotted path)
+    'offset_param': 'offset',
+    'total_field': 'total',     # offset style: field with the total count (or the X-Total-Count header)
+    'concurrency': None         # offset style: pages fetched at once once the total is known
+}
+
+
+def endpoint_url(endpoint: Union[str, Dict[str, Any]]) -> str:
+    """
+    Get the URL of a configured endpoint
+
+    Args:
+        endpoint: Entry of config.DATA_ENDPOINTS (URL or dictionary with url
+            and pagination)
+
+    Returns:
+        Endpoint URL
+    """
+    return endpoint.get('url', '') if isinstance(endpoint, dict) else endpoint
+
+
+def endpoint_pagination(endpoint: Union[str, Dict[str, Any]]) -> Optional[Dict[str, Any]]:
+    """
+    Get the pagination settings of a configured endpoint
+
+    Args:
+        endpoint: Entry of config.DATA_ENDPOINTS
+
+    Returns:
+        Settings with every default filled in, or None if the endpoint is
+        not paginated
+
+    Raises:
+        ValueError: If the pagination style is unknown
+    """
+    options = endpoint.get('pagination') if isinstance(endpoint, dict) else None
+    if not options:
+        return None
+    settings = dict(DEFAULT_PAGINATION, **options)
+    if settings.get('style') not in PAGINATION_STYLES:
+        raise ValueError(f"Paginación '{settings.get('style')}' no soportada (disponibles: {', '.join(PAGINATION_STYLES)})")
+    settings['concurrency'] = max(1, settings['concurrency'] or config.DATA_PAGE_CONCURRENCY)
+    return settings
+
+
+def _field(body: Any, path: Optional[str]) -> Any:
+    """Read a dotted field of a decoded page, None if absent"""
+    if not path:
+        return None
+    for part in path.split('.'):
+        if not isinstance(body, dict):
+            return None
+        body = body.get(part)
+    return body
+
+
+def _page_records(body: Any, records_key: Optional[str]) -> List[Any]:
+    """Extract the records of a decoded page"""
+    if isinstance(body, list):
+        return body
+    if records_key:
+        records = _field(body, records_key)
+        if not isinstance(records, list):
+            raise ValueError(f"La página no contiene registros en '{records_key}'")
+        return records
+    records = next((value for value in body.values() if isinstance(value, list)), None) if isinstance(body, dict) else None
+    if records is None:
+        raise ValueError("La página no contiene un arreglo de registros")
+    return records
+
+
+class _Page:
+    """One fetched page: raw body, decoded content and response"""
+    def __init__(self, response, records_key: Optional[str]):
+        response.raise_for_status()  # Raise exception for HTTP errors
+        self.url = response.url
+        self.content = response.content
+        self.body = decode_json(self.content)
+        self.records = _page_records(self.body, records_key)
+        self.headers = response.headers
+        self.links = response.links
+
+
+def fetch_pages(
+    endpoint: Union[str, Dict[str, Any]],
+    on_page: Callable[[List[Any]], None],
+    validators: Optional[Dict[str, Any]] = None,
+    params: Optional[Dict[str, Any]] = None,
+    since: Optional[Any] = None,
+    since_param: str = 'since'
+) -> Dict[str, Any]:
+    """
+    Fetch every page of a paginated endpoint
+
+    Pages are handed to ``on_page`` in order as they arrive, so they flow
+    into processing while the next ones download. With offset pagination
+    and a known total, the remaining pages are fetched concurrently, at
+    most ``concurrency`` at a time; fetched pages wait only for the pages
+    before them, so memory stays bounded by the concurrency.
+
+    Args:
+        endpoint: Paginated entry of config.DATA_ENDPOINTS
+        on_page: Function receiving the records of each page
+        validators: Validators of the previous fetch (only the payload hash
+            applies to paginated content)
+        params: Optional query string parameters sent with the first page
+            (offset and cursor styles send them with every page)
+        since: Optional watermark for endpoints returning deltas, sent as
+            the since_param query string parameter
+        since_param: Name of the watermark parameter
+
+    Returns:
+        Dictionary with modified (False if every page is identical to the
+        previous fetch), validators, bytes received, records and pages
+    """
+    url = endpoint_url(endpoint)
+    settings = endpoint_pagination(endpoint)
+    client = get_client()
+    digest = hashlib.sha256()
+    totals = {'bytes': 0, 'records': 0, 'pages': 0}
+
+    def fetch(page_params: Optional[Dict[str, Any]], page_url: str = url) -> _Page:
+        return _Page(client.get(page_url, params=page_params), settings['records_key'])
+
+    def deliver(page: _Page):
+        digest.update(page.content)
+        totals['bytes'] += len(page.content)
+        totals['records'] += len(page.records)
+        totals['pages'] += 1
+        on_page(page.records)
+
+    style = settings['style']
+    size = settings['page_size']
+    base = dict(params or {})
+    if since is not None:
+        base[since_param] = since.isoformat() if hasattr(since, 'isoformat') else str(since)
+    base[settings['limit_param']] = size
+
+    if style == 'offset':
+        page = fetch(dict(base, **{settings['offset_param']: 0}))
+        total = _field(page.body, settings['total_field']) if isinstance(page.body, dict) else None
+        if total is None and page.headers.get('X-Total-Count', '').isdigit():
+            total = int(page.headers['X-Total-Count'])
+        deliver(page)
+        # Upstreams may cap the limit below page_size: the first page has the real size
+        step = len(page.records) or size
+
+        if total is not None:
+            # Known total: the remaining pages go out concurrently, delivered in order
+            offsets = iter(range(step, int(total), step))
+            with ThreadPoolExecutor(max_workers=settings['concurrency'], thread_name_prefix='page') as pool:
+                window = deque(
+                    pool.submit(fetch, dict(base, **{settings['offset_param']: offset}))
+                    for _, offset in zip(range(settings['concurrency']), offsets)
+                )
+                while window:
+                    deliver(window.popleft().result())
+                    offset = next(offsets, None)
+                    if offset is not None:
+                        window.append(pool.submit(fetch, dict(base, **{settings['offset_param']: offset})))
+        else:
+            # Without a total only an empty page marks the end
+            offset = 0
+            while page.records:
+                offset += len(page.records)
+                page = fetch(dict(base, **{settings['offset_param']: offset}))
+                deliver(page)
+
+    elif style == 'cursor':
+        page = fetch(base)
+        deliver(page)
+        cursor = _field(page.body, settings['next_field'])
+        while cursor and page.records:
+            page = fetch(dict(base, **{settings['cursor_param']: cursor}))
+            deliver(page)
+            cursor = _field(page.body, settings['next_field'])
+
+    else:
+        page = fetch(base)
+        deliver(page)
+        while page.links.get('next', {}).get('url') and page.records:
+            # The next URL already carries every parameter; it may be relative to the page
+            page = fetch(None, urljoin(page.url, page.links['next']['url']))
+            deliver(page)
+
+    current = {'hash': digest.hexdigest()}
+    modified = (validators or {}).get('hash') != current['hash']
+    logger.info(f"Fetched {totals['records']} records in {totals['pages']} pages ({totals['bytes']} bytes) from {url}")
+    return dict(totals, modified=modified, validators=current)
@@ -0,0 +1,77 @@
+"""
+HTTP endpoints for paginated and streamed sales rows
+"""
+import json
+import logging
+
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+
+from data.serialization import encode_json
+
+logger = logging.getLogger(__name__)
+
+
+def _request_filters():
+    """
+    Parse the ``filters`` query parameter
+
+    Returns:
+        Filter dictionary or None
+
+    Raises:
+        ValueError: If the parameter is not a JSON object
+    """
+    raw = request.args.get('filters')
+    if not raw:
+        return None
+    filters = json.loads(raw)
+    if not isinstance(filters, dict):
+        raise ValueError("filters debe ser un objeto JSON")
+    return filters
+
+
+def create_sales_blueprint(data_manager) -> Blueprint:
+    """
+    Create the blueprint serving raw sales rows
+
+    Args:
+        data_manager: Data manager instance
+
+    Returns:
+        Flask blueprint with the /api/data/sales/rows endpoints
+    """
+    blueprint = Blueprint('sales_rows', __name__)
+
+    @blueprint.route('/api/data/sales/rows', methods=['GET'])
+    def get_sales_rows():
+        """One page of filtered sales rows (?filters=<json>&cursor=&limit=)"""
+        try:
+            page = data_manager.get_sales_rows(
+                filters=_request_filters(),
+                cursor=request.args.get('cursor'),
+                limit=request.args.get('limit', type=int)
+            )
+            if 'error' in page:
+                return jsonify(page), 400
+            return jsonify(page)
+        except ValueError as e:
+            return jsonify({"error": f"Filtros inválidos: {str(e)}"}), 400
+        except Exception as e:
+            logger.error(f"Error paginating sales rows: {str(e)}")
+            return jsonify({"error": str(e)}), 500
+
+    @blueprint.route('/api/data/sales/rows.ndjson', methods=['GET'])
+    def stream_sales_rows():
+        """Every filtered sales row as newline-delimited JSON, written as it is read"""
+        try:
+            filters = _request_filters()
+        except ValueError as e:
+            return jsonify({"error": f"Filtros inválidos: {str(e)}"}), 400
+
+        def generate():
+            for record in data_manager.iter_sales_rows(filters=filters):
+                yield encode_json(record) + b'\n'
+
+        return Response(stream_with_context(generate()), mimetype='application/x-ndjson')
+
+    return blueprint
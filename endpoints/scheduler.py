@@ -0,0 +1,366 @@
+"""
+Event-driven data refresh scheduler with leader election across processes
+"""
+import datetime
+import json
+import logging
+import os
+import random
+import tempfile
+import threading
+import time
+from typing import Dict, Any, List, Optional, Set
+
+try:
+    import fcntl
+except ImportError:  # Windows: no advisory file locks
+    fcntl = None
+
+import config
+
+logger = logging.getLogger(__name__)
+
+LOCK_FILE = 'scheduler.lock'
+STATE_FILE = 'schedule.json'
+
+# Longest single sleep, so a wall clock change delays a cron job by at most this
+MAX_SLEEP = 3600
+
+
+class IntervalSchedule:
+    """Run every fixed number of seconds"""
+    def __init__(self, seconds: float):
+        if seconds <= 0:
+            raise ValueError(f"Intervalo de actualización inválido: {seconds}")
+        self.seconds = seconds
+
+    def next(self, after: float) -> float:
+        """Epoch time of the first run after ``after``"""
+        return after + self.seconds
+
+    def __str__(self) -> str:
+        return f"every {self.seconds:g}s"
+
+
+class CronSchedule:
+    """
+    Run at the times matched by a cron expression.
+
+    Five fields in local time: minute, hour, day of month, month and day of
+    week (0 or 7 is Sunday). Each field takes ``*``, values, ranges and
+    steps (``*/15``, ``1-5``, ``0,30``). As in cron, when both days are
+    restricted a time matches either of them.
+    """
+    FIELDS = (('minute', 0, 59), ('hour', 0, 23), ('day', 1, 31), ('month', 1, 12), ('weekday', 0, 7))
+
+    def __init__(self, expression: str):
+        parts = expression.split()
+        if len(parts) != 5:
+            raise ValueError(f"Expresión cron inválida (se esperaban 5 campos): '{expression}'")
+        self.expression = expression
+        self.minutes, self.hours, self.days, self.months, weekdays = (
+            self._parse(part, low, high) for part, (_, low, high) in zip(parts, self.FIELDS)
+        )
+        # cron counts Sunday as 0 (or 7), Python as 6
+        self.weekdays = {(day - 1) % 7 for day in weekdays}
+        self.any_day = parts[2] == '*'
+        self.any_weekday = parts[4] == '*'
+
+    @staticmethod
+    def _parse(field: str, low: int, high: int) -> Set[int]:
+        values = set()
+        for item in field.split(','):
+            spec, _, step = item.partition('/')
+            if spec == '*':
+                start, end = low, high
+            elif '-' in spec:
+                start, end = (int(value) for value in spec.split('-', 1))
+            else:
+                start = end = int(spec)
+            if start < low or end > high or start > end or (step and int(step) <= 0):
+                raise ValueError(f"Campo cron fuera de rango: '{item}' ({low}-{high})")
+            values.update(range(start, end + 1, int(step) if step else 1))
+        return values
+
+    def _day_matches(self, day: datetime.date) -> bool:
+        in_month = day.day in self.days
+        in_week = day.weekday() in self.weekdays
+        if self.any_day or self.any_weekday:
+            return in_month and in_week
+        return in_month or in_week
+
+    def next(self, after: float) -> float:
+        """Epoch time of the first matching minute after ``after``"""
+        moment = datetime.datetime.fromtimestamp(after).replace(second=0, microsecond=0) + datetime.timedelta(minutes=1)
+        day = moment.date()
+        # Every combination recurs within a few years (29 February on a given weekday)
+        for _ in range(366 * 8):
+            if day.month in self.months and self._day_matches(day):
+                first_day = day == moment.date()
+                for hour in sorted(self.hours):
+                    if first_day and hour < moment.hour:
+                        continue
+                    for minute in sorted(self.minutes):
+                        if first_day and hour == moment.hour and minute < moment.minute:
+                            continue
+                        return datetime.datetime.combine(day, datetime.time(hour, minute)).timestamp()
+            day += datetime.timedelta(days=1)
+        raise ValueError(f"La expresión cron '{self.expression}' nunca se cumple")
+
+    def __str__(self) -> str:
+        return f"cron {self.expression}"
+
+
+def parse_schedule(spec: str):
+    """
+    Parse a refresh schedule
+
+    Args:
+        spec: Interval in seconds or five-field cron expression
+
+    Returns:
+        IntervalSchedule or CronSchedule
+    """
+    spec = str(spec).strip()
+    try:
+        return IntervalSchedule(float(spec))
+    except ValueError:
+        return CronSchedule(spec)
+
+
+class LeaderLock:
+    """
+    Host-wide leadership held through an exclusive lock on a file.
+
+    The lock is never released while the process runs and the operating
+    system drops it when the process exits, so another process takes over
+    as soon as the leader dies. The leader's PID is written to the file.
+    """
+    def __init__(self, path: str):
+        self.path = path
+        self.held = False
+        self._file = None
+
+    def acquire(self) -> bool:
+        """
+        Try to become the leader without blocking
+
+        Returns:
+            True if this process holds the lock
+        """
+        if self.held:
+            return True
+        if fcntl is None:
+            logger.warning("File locks are not available; this process refreshes the data without leader election")
+            self.held = True
+            return True
+        handle = open(self.path, 'a+')
+        try:
+            fcntl.flock(handle.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            handle.close()
+            return False
+        handle.seek(0)
+        handle.truncate()
+        handle.write(str(os.getpid()))
+        handle.flush()
+        self._file = handle
+        self.held = True
+        return True
+
+    def holder(self) -> Optional[int]:
+        """PID of the current leader, if any wrote it"""
+        try:
+            with open(self.path) as f:
+                content = f.read().strip()
+        except OSError:
+            return None
+        return int(content) if content.isdigit() else None
+
+    def release(self):
+        """Give up leadership"""
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+        self.held = False
+
+
+class RefreshScheduler:
+    """
+    Refreshes each data domain on its own schedule, in one process per host.
+
+    Every process runs a scheduler, but only the one holding the leader
+    lock refreshes; the others attach the snapshots it publishes and keep
+    trying the lock, taking over if the leader exits. The leader sleeps
+    until the next due job instead of polling. Last and next runs are kept
+    in a state file next to the snapshots, so every process can report
+    them and a new leader resumes the schedule where the old one left it.
+    """
+    def __init__(
+        self,
+        data_manager,
+        schedules: Optional[Dict[str, str]] = None,
+        jitter: Optional[float] = None,
+        lock_path: Optional[str] = None,
+        state_path: Optional[str] = None
+    ):
+        """
+        Initialize the scheduler
+
+        Args:
+            data_manager: Data manager instance
+            schedules: Interval in seconds or cron expression per domain
+                (defaults to config.DATA_REFRESH_SCHEDULES)
+            jitter: Maximum random delay in seconds added to every run
+                (defaults to config.DATA_REFRESH_JITTER)
+            lock_path: Leader lock file (defaults to the cache directory)
+            state_path: Schedule state file (defaults to the cache directory)
+        """
+        self.data_manager = data_manager
+        specs = schedules or config.DATA_REFRESH_SCHEDULES
+        self.schedules = {domain: parse_schedule(spec) for domain, spec in specs.items()}
+        self.jitter = config.DATA_REFRESH_JITTER if jitter is None else jitter
+        self.lock = LeaderLock(lock_path or os.path.join(config.DATA_CACHE_DIR, LOCK_FILE))
+        self.state_path = state_path or os.path.join(config.DATA_CACHE_DIR, STATE_FILE)
+        self._jobs = {domain: {} for domain in self.schedules}
+        self._wake = threading.Event()
+        self._stopped = False
+        self._thread = None
+
+    @property
+    def leader(self) -> bool:
+        """Whether this process refreshes the data"""
+        return self.lock.held
+
+    def _next_run(self, domain: str, after: float) -> float:
+        return self.schedules[domain].next(after) + random.uniform(0, self.jitter)
+
+    def _read_state(self) -> Dict[str, Any]:
+        try:
+            with open(self.state_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_state(self):
+        """Replace the state file atomically"""
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(self.state_path), prefix='.schedule-')
+        try:
+            with os.fdopen(fd, 'w') as f:
+                json.dump({domain: dict(job, schedule=str(self.schedules[domain])) for domain, job in self._jobs.items()}, f)
+            os.replace(tmp, self.state_path)
+        except Exception as e:
+            logger.warning(f"Could not save the refresh schedule: {str(e)}")
+            if os.path.exists(tmp):
+                os.remove(tmp)
+
+    def _resume(self):
+        """Plan every domain from its last run (or its snapshot) on becoming leader"""
+        state = self._read_state()
+        now = time.time()
+        for domain, job in self._jobs.items():
+            job.update({key: value for key, value in state.get(domain, {}).items() if key != 'schedule'})
+            last = job.get('last_run')
+            if last is None:
+                created = self.data_manager.cache_generations(domain).get('created')
+                last = datetime.datetime.fromisoformat(created).timestamp() if created else None
+            # Overdue and never refreshed domains run right away
+            job['next_run'] = max(now, self._next_run(domain, last)) if last is not None else now
+        self._write_state()
+
+    def _run_due(self, due: List[str]):
+        """Refresh the due domains together and plan their next runs"""
+        logger.info(f"Scheduled refresh of {', '.join(due)}")
+        report = self.data_manager.refresh_all_data(domains=due)
+        finished = time.time()
+        for domain in due:
+            result = report['domains'].get(domain, {})
+            self._jobs[domain].update(
+                last_run=finished,
+                last_status=result.get('status'),
+                last_duration=result.get('duration'),
+                next_run=self._next_run(domain, finished)
+            )
+        self._write_state()
+
+    def _try_lead(self) -> bool:
+        """Take the leader lock if it is free, resuming the schedule"""
+        if not self.leader and self.lock.acquire():
+            logger.info(f"Process {os.getpid()} is now the data refresh leader")
+            self._resume()
+        return self.leader
+
+    def _loop(self):
+        while not self._stopped:
+            if self._try_lead():
+                now = time.time()
+                due = [domain for domain, job in self._jobs.items() if job['next_run'] <= now]
+                if due:
+                    try:
+                        self._run_due(due)
+                    except Exception as e:
+                        logger.error(f"Scheduled refresh failed: {str(e)}")
+                        for domain in due:
+                            self._jobs[domain]['next_run'] = self._next_run(domain, time.time())
+                    continue
+                timeout = min(job['next_run'] for job in self._jobs.values()) - now
+            else:
+                # Followers only wait to take over; the leader's snapshots are attached on read
+                timeout = config.DATA_LEADER_RETRY
+            self._wake.wait(min(timeout, MAX_SLEEP))
+            self._wake.clear()
+
+    def start(self) -> threading.Thread:
+        """
+        Start the scheduler thread
+
+        Leadership is decided before returning, so callers can tell right
+        away whether this process refreshes the data.
+
+        Returns:
+            The scheduler thread (already running)
+        """
+        if self._thread is not None and self._thread.is_alive():
+            return self._thread
+        self._stopped = False
+        self._try_lead()
+        self._thread = threading.Thread(target=self._loop, name='data-scheduler', daemon=True)
+        self._thread.start()
+        return self._thread
+
+    def stop(self):
+        """Stop the scheduler thread and give up leadership"""
+        self._stopped = True
+        self._wake.set()
+        if self._thread is not None:
+            self._thread.join(timeout=5)
+        self.lock.release()
+
+    def status(self) -> Dict[str, Any]:
+        """
+        Describe the schedule
+
+        Returns:
+            Dictionary with whether this process is the leader, the leader's
+            PID and per domain the schedule, last run (time, status and
+            duration) and next run, as seen by the leader
+        """
+        jobs = self._jobs if self.leader else self._read_state()
+
+        def iso(value):
+            return datetime.datetime.fromtimestamp(value).isoformat() if value is not None else None
+
+        return {
+            "leader": self.leader,
+            "leader_pid": os.getpid() if self.leader else self.lock.holder(),
+            "domains": {
+                domain: {
+                    "schedule": str(schedule),
+                    "last_run": iso(jobs.get(domain, {}).get('last_run')),
+                    "last_status": jobs.get(domain, {}).get('last_status'),
+                    "last_duration": jobs.get(domain, {}).get('last_duration'),
+                    "next_run": iso(jobs.get(domain, {}).get('next_run'))
+                }
+                for domain, schedule in self.schedules.items()
+            }
+        }
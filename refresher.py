@@ -0,0 +1,47 @@
+#!/usr/bin/env python
+"""
+Data refresher process for multi-worker deployments
+
+Fetches every data domain and publishes it as a cache snapshot generation.
+Web workers started with DATA_REFRESHER=false never refresh on their own:
+they memory-map the published snapshots and attach each new generation.
+"""
+import argparse
+import logging
+import time
+
+# Configure logging
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+from data.data_manager import DataManager
+from endpoints.data_endpoints import setup_data_scheduler
+
+
+def main():
+    """Run the refresher"""
+    parser = argparse.ArgumentParser(description='Refresh and publish the cached data for all workers')
+    parser.add_argument('--once', action='store_true',
+                        help='Refresh every domain once and exit')
+    args = parser.parse_args()
+
+    data_manager = DataManager()
+    if args.once:
+        logger.info("Refreshing all data")
+        report = data_manager.refresh_all_data()
+        # Non-zero exit status when some domain could not be refreshed
+        raise SystemExit(0 if report['status'] == 'ok' else 1)
+
+    # Domains never refreshed or overdue are refreshed right away
+    setup_data_scheduler(data_manager)
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        logger.info("Refresher stopped")
+
+if __name__ == "__main__":
+    main()
@@ -6,7 +6,6 @@ import os
 import argparse
 import logging
 import uvicorn
-from app import app
 
 # Configure logging
 logging.basicConfig(
@@ -26,6 +25,9 @@ def main():
                         help='Run in debug mode')
     args = parser.parse_args()
     
+    # Imported here so ingest worker processes re-importing this script never build the app
+    from app import app
+    
     logger.info(f"Starting Decision Making Assistant on {args.host}:{args.port} (debug: {args.debug})")
     try:
         app.run(host=args.host, port=args.port, debug=args.debug)
@@ -10,9 +10,6 @@ from dotenv import load_dotenv
 import traceback
 import datetime
 import json
-from data import DataManager
-
-data_manager = DataManager()
 
 # Load environment variables first to ensure API key is available
 load_dotenv()
@@ -30,6 +27,7 @@ logger = logging.getLogger(__name__)
 # Import after environment variables are loaded
 from agents.direct_agent import DirectAgent, function_tool
 from data.data_manager import DataManager
+from endpoints.sales_api import create_sales_blueprint
 
 # Initialize Flask app
 app = Flask(__name__)
@@ -38,6 +36,9 @@ app.secret_key = os.getenv('FLASK_SECRET_KEY', 'default-secret-key')
 # Initialize data manager
 data_manager = DataManager()
 
+# Paginated and streamed sales rows
+app.register_blueprint(create_sales_blueprint(data_manager))
+
 # Create tools for our agent
 @function_tool
 def get_marketing_metrics(metric_name=None):
@@ -46,12 +47,12 @@ def get_marketing_metrics(metric_name=None):
     
     if metric_name:
         if metric_name in marketing_data:
-            return {metric_name: marketing_data[metric_name]}
+            return data_manager.get_encoded_data('marketing', metric_name)
         else:
             return {"error": f"Metric '{metric_name}' not found in marketing data"}
     
-    # Return all metrics if no specific one requested
-    return marketing_data
+    # Return all metrics if no specific one requested (encoded once per data version)
+    return data_manager.get_encoded_data('marketing')
 
 @function_tool
 def get_sales_data(metric_name=None, time_period="current"):
@@ -76,10 +77,10 @@ def get_sales_data(metric_name=None, time_period="current"):
     return {
         'kpis': kpis,
         'aggregations': sales_data.get('aggregations', {}),
-        'data_summary': {
-            'total_records': len(sales_data.get('raw_data', [])),
+        'data_summary': sales_data.get('data_summary', {
+            'total_records': 0,
             'aggregations_available': list(sales_data.get('aggregations', {}).keys())
-        }
+        })
     }
 @function_tool
 def get_total_sales():
@@ -189,12 +190,12 @@ def get_logistics_data(category=None):
     
     if category:
         if category in logistics_data:
-            return {category: logistics_data[category]}
+            return data_manager.get_encoded_data('logistics', category)
         else:
             return {"error": f"Category '{category}' not found in logistics data"}
     
-    # Return all data if no specific category requested
-    return logistics_data
+    # Return all data if no specific category requested (encoded once per data version)
+    return data_manager.get_encoded_data('logistics')
 
 @function_tool
 def get_collection_data(category=None):
@@ -203,12 +204,12 @@ def get_collection_data(category=None):
     
     if category:
         if category in collection_data:
-            return {category: collection_data[category]}
+            return data_manager.get_encoded_data('collection', category)
         else:
             return {"error": f"Category '{category}' not found in collection data"}
     
-    # Return all data if no specific category requested
-    return collection_data
+    # Return all data if no specific category requested (encoded once per data version)
+    return data_manager.get_encoded_data('collection')
 
 # Create the agent
 assistant = DirectAgent(
@@ -226,6 +227,7 @@ assistant = DirectAgent(
     4. Analyze the data to extract meaningful insights.
     5. Provide clear, concise recommendations based on the data.
     6. Support your conclusions with specific data points from the KPIs.
+    7. If the 'freshness' entry of the data says it is stale, mention how old the data is.
     
     Be professional, precise, and focus on actionable insights.
     Always check the data before answering, even if you think you know the answer.
@@ -286,8 +288,8 @@ def query():
 def refresh_data():
     """Manually trigger data refresh"""
     try:
-        data_manager.refresh_all_data()
-        return jsonify({"status": "success", "message": "Data refreshed successfully"})
+        report = data_manager.refresh_all_data()
+        return jsonify({"status": "success", "message": "Data refreshed successfully", "report": report})
     except Exception as e:
         logger.error(f"Error refreshing data: {str(e)}")
         return jsonify({"error": str(e)}), 500
@@ -295,7 +297,7 @@ def refresh_data():
 @app.route('/api/health', methods=['GET'])
 def health_check():
     """Health check endpoint"""
-    return jsonify({"status": "healthy"})
+    return jsonify({"status": "healthy", "data": data_manager.data_readiness()})
 
 @app.route('/api/data/sales/analysis', methods=['GET'])
 def analyze_sales():
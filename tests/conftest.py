@@ -0,0 +1,47 @@
+"""
+Shared test setup: the modules under test are imported from the repository root
+"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pytest
+
+import config
+
+
+@pytest.fixture
+def manager(tmp_path, monkeypatch):
+    """DataManager over an empty cache directory, without warm-up"""
+    from data.data_manager import DataManager
+    monkeypatch.setattr(config, 'DATA_CACHE_DIR', str(tmp_path / 'cache'))
+    monkeypatch.setattr(config, 'DATA_WARM_UP', False)
+    os.makedirs(config.DATA_CACHE_DIR, exist_ok=True)
+    return DataManager()
+
+
+@pytest.fixture
+def raw_sales():
+    """Untyped sales rows over five months, with undated rows and missing values"""
+    import numpy as np
+    import pandas as pd
+    rng = np.random.default_rng(7)
+    size = 400
+    dates = pd.Timestamp('2023-11-01') + pd.to_timedelta(rng.integers(0, 150, size), unit='D')
+    frame = pd.DataFrame({
+        'FOLIO': np.arange(size),
+        'FECHA': dates.strftime('%Y-%m-%d'),
+        'VENDEDOR': rng.choice(['v1', 'v2', 'v3', 'v4'], size),
+        'NOMBRE_ASESOR': rng.choice(['ana', 'beto', 'carla'], size),
+        'CLIENTE': rng.choice([f"c{i}" for i in range(20)], size),
+        'LINEA': rng.choice(['L1', 'L2', 'L3', None], size, p=[0.4, 0.3, 0.2, 0.1]),
+        'ARTICULO': rng.choice([f"a{i}" for i in range(10)], size),
+        'TIPO_CLIENTE': rng.choice(['mayoreo', 'menudeo'], size),
+        'CLASIFICACION': rng.choice(['A', 'B', 'C'], size),
+        'IMPORTE_TOTAL': np.round(rng.uniform(1, 500, size), 2),
+        'CANTIDAD': rng.integers(1, 20, size).astype(float)
+    })
+    frame.loc[rng.choice(size, 20, replace=False), 'FECHA'] = None
+    frame.loc[rng.choice(size, 15, replace=False), 'IMPORTE_TOTAL'] = np.nan
+    return frame
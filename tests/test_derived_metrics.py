@@ -0,0 +1,48 @@
+"""
+Derived sales metrics served once per data version
+"""
+from data.sales_store import SalesStore
+
+ROWS = [
+    {'NOMBRE_ASESOR': 'ana', 'CLIENTE': 'c1', 'IMPORTE_TOTAL': 100.0},
+    {'NOMBRE_ASESOR': 'luis', 'CLIENTE': 'c2', 'IMPORTE_TOTAL': 300.0},
+    {'NOMBRE_ASESOR': 'ana', 'CLIENTE': 'c3', 'IMPORTE_TOTAL': 50.0},
+    {'NOMBRE_ASESOR': 'eva', 'CLIENTE': 'c1', 'IMPORTE_TOTAL': 20.0}
+]
+
+
+def publish(manager, rows):
+    store = SalesStore.from_records(rows)
+    manager._publish('sales', {'store': store, 'kpis': {}, 'aggregations': {}})
+    return store
+
+
+def test_seller_analysis_is_computed_once_per_version(manager, monkeypatch):
+    publish(manager, ROWS)
+    calls = []
+    take = SalesStore.take
+
+    def counting_take(store, *args, **kwargs):
+        calls.append(kwargs.get('columns'))
+        return take(store, *args, **kwargs)
+
+    monkeypatch.setattr(SalesStore, 'take', counting_take)
+
+    analysis = manager.get_sales_aggregation('analisis_vendedores')
+    assert [row['NOMBRE_ASESOR'] for row in analysis] == ['luis', 'ana', 'eva']
+    assert analysis[1]['VENTAS_TOTALES'] == 150.0
+    assert analysis[1]['CLIENTES_UNICOS'] == 2
+    assert manager.get_sales_aggregation('analisis_vendedores') is analysis
+    assert len(calls) == 1
+
+    # A new version is analyzed again
+    publish(manager, ROWS[:2])
+    assert [row['NOMBRE_ASESOR'] for row in manager.get_sales_aggregation('analisis_vendedores')] == ['luis', 'ana']
+    assert len(calls) == 2
+
+
+def test_unknown_or_uncomputable_aggregation(manager):
+    publish(manager, [{'CLIENTE': 'c1', 'IMPORTE_TOTAL': 1.0}])
+
+    assert manager.get_sales_aggregation('analisis_vendedores') is None
+    assert manager.get_sales_aggregation('no_existe') is None
@@ -0,0 +1,49 @@
+"""
+Freshness reported with every response, from the snapshot the response was built from
+"""
+import time
+
+import config
+from data.sales_store import SalesStore
+
+
+def sales(amount):
+    return {'store': SalesStore.from_records([{'CLIENTE': 'c1', 'IMPORTE_TOTAL': amount}]), 'kpis': {}, 'aggregations': {}}
+
+
+def test_sales_freshness_describes_the_snapshot_that_was_read(manager, monkeypatch):
+    monkeypatch.setitem(config.DATA_TTLS, 'sales', 0)
+    day_ago = time.time() - 86400
+    manager._publish('sales', sales(1.0), fetched=day_ago)
+    build = manager._filter_and_aggregate_sales
+
+    def swap_mid_request(*args, **kwargs):
+        result = build(*args, **kwargs)
+        # A refresh lands between the read and the freshness entry
+        manager._publish('sales', sales(2.0))
+        return result
+
+    monkeypatch.setattr(manager, '_filter_and_aggregate_sales', swap_mid_request)
+
+    result = manager.get_sales_data()
+
+    assert 'error' not in result
+    assert result['freshness']['age_seconds'] >= 86400 - 60
+
+
+def test_rolled_back_generation_is_served_without_revalidation(manager, monkeypatch):
+    monkeypatch.setitem(config.DATA_TTLS, 'marketing', 0.2)
+    manager._save_cached_data('marketing', {'campaigns': [{'id': 1}]}, source_hash='h1')
+    manager._save_cached_data('marketing', {'campaigns': [{'id': 2}]}, source_hash='h2')
+    revalidated = []
+    monkeypatch.setattr(manager, '_refresh_in_background', revalidated.append)
+    time.sleep(0.3)
+
+    meta = manager.rollback_cached_data('marketing')
+    data = manager.get_marketing_data()
+
+    assert meta['generation'] == 1
+    assert data['campaigns'] == [{'id': 1}]
+    assert not data['freshness']['stale']
+    # The upstream data the rollback backs out is not fetched back in on read
+    assert revalidated == []
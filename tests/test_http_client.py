@@ -0,0 +1,186 @@
+"""
+FetchClient against a local stub HTTP server: retries, backoff and circuit breaker
+"""
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from endpoints import http_client
+from endpoints.http_client import CircuitOpenError, FetchClient
+
+
+class StubServer:
+    """HTTP server answering GETs with a scripted list of (status, headers)"""
+    def __init__(self, script, default=(200, {})):
+        self.script = list(script)
+        self.default = default
+        self.requests = 0
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                stub.requests += 1
+                status, headers = stub.script.pop(0) if stub.script else stub.default
+                body = b'{"ok": true}'
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.url = f"http://127.0.0.1:{self.server.server_address[1]}/data"
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True)
+        self.thread.start()
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def stub():
+    servers = []
+
+    def start(script, default=(200, {})):
+        server = StubServer(script, default)
+        servers.append(server)
+        return server
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+def make_client(**options):
+    settings = dict(retries=3, backoff=0.001, max_backoff=0.01, breaker_threshold=2, breaker_reset=60)
+    settings.update(options)
+    return FetchClient(**settings)
+
+
+def test_retries_transient_failures(stub):
+    server = stub([(503, {}), (502, {})])
+    client = make_client()
+
+    response = client.get(server.url)
+
+    assert response.status_code == 200
+    assert server.requests == 3
+    assert client.breaker(server.url).state == 'closed'
+
+
+def test_returns_last_response_when_retries_are_exhausted(stub):
+    server = stub([], default=(500, {}))
+    client = make_client(retries=2)
+
+    response = client.get(server.url)
+
+    assert response.status_code == 500
+    assert server.requests == 3
+
+
+def test_non_retryable_status_is_not_retried(stub):
+    server = stub([(404, {})])
+    client = make_client()
+
+    assert client.get(server.url).status_code == 404
+    assert server.requests == 1
+
+
+def test_backoff_is_exponential_with_jitter_and_honours_retry_after(stub, monkeypatch):
+    delays = []
+    monkeypatch.setattr(http_client.time, 'sleep', delays.append)
+    server = stub([(503, {}), (503, {}), (429, {'Retry-After': '7'})])
+    client = make_client(backoff=1, max_backoff=5)
+
+    assert client.get(server.url).status_code == 200
+    assert 0 <= delays[0] <= 1
+    assert 0 <= delays[1] <= 2
+    # Retry-After is capped by the largest single delay
+    assert delays[2] == 5
+
+
+def test_failed_fetch_counts_once_against_the_breaker(stub):
+    server = stub([], default=(503, {}))
+    client = make_client(retries=3, breaker_threshold=2)
+
+    client.get(server.url)
+
+    breaker = client.breaker(server.url)
+    assert server.requests == 4
+    assert breaker.failures == 1
+    assert breaker.state == 'closed'
+
+
+def test_breaker_opens_and_fails_fast(stub):
+    server = stub([], default=(500, {}))
+    client = make_client(retries=0, breaker_threshold=2)
+
+    client.get(server.url)
+    client.get(server.url)
+    with pytest.raises(CircuitOpenError):
+        client.get(server.url)
+
+    assert server.requests == 2
+    assert client.breaker(server.url).state == 'open'
+
+
+def test_half_open_trial_retries_and_closes_the_circuit(stub):
+    server = stub([(500, {}), (500, {}), (500, {})])
+    client = make_client(retries=0, breaker_threshold=2, breaker_reset=0.05)
+    client.get(server.url)
+    client.get(server.url)
+    time.sleep(0.06)
+
+    breaker = client.breaker(server.url)
+    assert breaker.state == 'half-open'
+    # The trial fails once, then its own retry succeeds instead of hitting the open circuit
+    client.retries = 1
+    assert client.get(server.url).status_code == 200
+    assert breaker.state == 'closed'
+
+
+def test_failed_half_open_trial_reopens_the_circuit(stub):
+    server = stub([], default=(500, {}))
+    client = make_client(retries=0, breaker_threshold=1, breaker_reset=0.05)
+    client.get(server.url)
+    time.sleep(0.06)
+
+    assert client.get(server.url).status_code == 500
+    with pytest.raises(CircuitOpenError):
+        client.get(server.url)
+    assert server.requests == 2
+
+
+def test_client_errors_do_not_reset_the_breaker(stub):
+    server = stub([(500, {}), (404, {}), (401, {}), (500, {})])
+    client = make_client(retries=0, breaker_threshold=2)
+
+    client.get(server.url)
+    assert client.get(server.url).status_code == 404
+    assert client.get(server.url).status_code == 401
+    breaker = client.breaker(server.url)
+    assert breaker.failures == 1
+
+    client.get(server.url)
+    assert breaker.state == 'open'
+
+
+def test_client_error_on_a_half_open_trial_keeps_the_circuit_half_open(stub):
+    server = stub([(500, {}), (403, {})])
+    client = make_client(retries=0, breaker_threshold=1, breaker_reset=0.05)
+    client.get(server.url)
+    time.sleep(0.06)
+
+    assert client.get(server.url).status_code == 403
+    breaker = client.breaker(server.url)
+    assert breaker.state == 'half-open'
+    # The trial is over: the next fetch is let through and closes the circuit
+    assert client.get(server.url).status_code == 200
+    assert breaker.state == 'closed'
@@ -0,0 +1,171 @@
+"""
+Paginated endpoints against a local stub API: offset, cursor and Link header styles
+"""
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import pytest
+
+from endpoints import pagination
+from endpoints.http_client import FetchClient
+from endpoints.pagination import endpoint_pagination, fetch_pages
+
+RECORDS = [{'id': i} for i in range(23)]
+
+
+class StubApi:
+    """HTTP server paginating RECORDS in the style given by the request path"""
+    def __init__(self, records):
+        self.records = records
+        self.requests = []
+        api = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlparse(self.path)
+                query = {name: values[0] for name, values in parse_qs(url.query).items()}
+                api.requests.append((url.path, query))
+                status, headers, body = api.page(url.path, query)
+                content = json.dumps(body).encode()
+                self.send_response(status)
+                for name, value in headers.items():
+                    self.send_header(name, value)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('Content-Length', str(len(content)))
+                self.end_headers()
+                self.wfile.write(content)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+        self.base = f"http://127.0.0.1:{self.server.server_address[1]}"
+        self.thread = threading.Thread(target=self.server.serve_forever, args=(0.01,), daemon=True)
+        self.thread.start()
+
+    def page(self, path, query):
+        limit = int(query.get('limit', 10))
+        if path == '/offset':
+            offset = int(query.get('offset', 0))
+            return 200, {}, {'total': len(self.records), 'data': self.records[offset:offset + limit]}
+        if path == '/offset-header':
+            offset = int(query.get('offset', 0))
+            return 200, {'X-Total-Count': str(len(self.records))}, self.records[offset:offset + limit]
+        if path == '/capped':
+            # No total and a server-side cap below the requested limit
+            offset = int(query.get('offset', 0))
+            return 200, {}, self.records[offset:offset + min(limit, 4)]
+        if path == '/cursor':
+            start = int(query.get('cursor', 0))
+            end = start + limit
+            following = str(end) if end < len(self.records) else None
+            return 200, {}, {'items': self.records[start:end], 'meta': {'next': following}}
+        if path.startswith('/link/'):
+            start = int(path.rsplit('/', 1)[1])
+            end = start + limit
+            # Relative next URL carrying its own parameters
+            headers = {'Link': f'<{end}?limit={limit}>; rel="next"'} if end < len(self.records) else {}
+            return 200, headers, self.records[start:end]
+        return 404, {}, {}
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+@pytest.fixture
+def api(monkeypatch):
+    server = StubApi(RECORDS)
+    client = FetchClient(retries=0, backoff=0.001, max_backoff=0.01)
+    monkeypatch.setattr(pagination, 'get_client', lambda: client)
+    yield server
+    server.close()
+
+
+def endpoint(api, path, **options):
+    return {'url': api.base + path, 'pagination': dict({'page_size': 5}, **options)}
+
+
+def collect(entry, **kwargs):
+    pages = []
+    result = fetch_pages(entry, pages.append, **kwargs)
+    return pages, result
+
+
+def test_endpoint_pagination_fills_defaults_and_rejects_unknown_styles():
+    assert endpoint_pagination('http://example.com/data') is None
+    assert endpoint_pagination({'url': 'http://example.com/data'}) is None
+
+    settings = endpoint_pagination({'url': '', 'pagination': {'style': 'offset', 'concurrency': 3}})
+    assert settings['page_size'] == 1000
+    assert settings['concurrency'] == 3
+
+    with pytest.raises(ValueError):
+        endpoint_pagination({'url': '', 'pagination': {'style': 'pages'}})
+
+
+@pytest.mark.parametrize('concurrency', [1, 3])
+def test_offset_with_total_delivers_pages_in_order(api, concurrency):
+    pages, result = collect(endpoint(api, '/offset', style='offset', records_key='data', concurrency=concurrency))
+
+    assert [record for page in pages for record in page] == RECORDS
+    assert [len(page) for page in pages] == [5, 5, 5, 5, 3]
+    assert result['records'] == 23 and result['pages'] == 5
+    # Nothing is requested past the total
+    assert len(api.requests) == 5
+
+
+def test_offset_total_from_header(api):
+    pages, result = collect(endpoint(api, '/offset-header', style='offset', concurrency=2))
+
+    assert [record for page in pages for record in page] == RECORDS
+    assert len(api.requests) == 5
+
+
+def test_offset_without_total_follows_the_upstream_page_size(api):
+    pages, _ = collect(endpoint(api, '/capped', style='offset'))
+
+    assert [record for page in pages for record in page] == RECORDS
+    offsets = [int(query['offset']) for _, query in api.requests]
+    assert offsets == [0, 4, 8, 12, 16, 20, 23]
+    # Only the empty page ends the walk
+    assert pages[-1] == []
+
+
+def test_cursor_style_reads_a_nested_next_field(api):
+    pages, result = collect(endpoint(api, '/cursor', style='cursor', next_field='meta.next', records_key='items'))
+
+    assert [record for page in pages for record in page] == RECORDS
+    assert result['pages'] == 5
+    assert [query.get('cursor') for _, query in api.requests] == [None, '5', '10', '15', '20']
+
+
+def test_link_style_resolves_relative_next_urls(api):
+    pages, result = collect(endpoint(api, '/link/0', style='link'))
+
+    assert [record for page in pages for record in page] == RECORDS
+    assert [path for path, _ in api.requests] == ['/link/0', '/link/5', '/link/10', '/link/15', '/link/20']
+
+
+def test_params_and_watermark_go_with_every_page(api):
+    collect(endpoint(api, '/cursor', style='cursor', next_field='meta.next'), params={'region': 'n'}, since='2024-01-01')
+
+    assert all(query['region'] == 'n' and query['since'] == '2024-01-01' for _, query in api.requests)
+    assert all(query['limit'] == '5' for _, query in api.requests)
+
+
+def test_unchanged_content_is_not_modified(api):
+    entry = endpoint(api, '/offset', style='offset', records_key='data')
+    _, first = collect(entry)
+    assert first['modified']
+
+    _, second = collect(entry, validators=first['validators'])
+    assert not second['modified']
+    assert second['validators'] == first['validators']
+
+
+def test_missing_records_array(api):
+    with pytest.raises(ValueError):
+        collect(endpoint(api, '/offset', style='offset', records_key='items'))
@@ -0,0 +1,56 @@
+"""
+Concurrent refresh of every domain with per-domain deadlines
+"""
+import threading
+import time
+
+import config
+
+
+def test_hung_domain_times_out_without_blocking_the_queue(manager, monkeypatch):
+    release = threading.Event()
+    refreshed = []
+
+    def hang():
+        release.wait(10)
+        return {}
+
+    def refresh(data_type):
+        def run():
+            refreshed.append(data_type)
+            manager._refresh_runs[data_type] = {'modified': True, 'bytes': 1}
+            return {}
+        return run
+
+    monkeypatch.setattr(manager, 'refresh_marketing_data', hang)
+    for data_type in ('sales', 'logistics', 'collection'):
+        monkeypatch.setattr(manager, f"refresh_{data_type}_data", refresh(data_type))
+    monkeypatch.setattr(config, 'DATA_REFRESH_TIMEOUTS', dict.fromkeys(config.DATA_REFRESH_TIMEOUTS, 0.2))
+
+    started = time.monotonic()
+    try:
+        # One slot: the hung domain gives it back at its deadline
+        report = manager.refresh_all_data(concurrency=1)
+    finally:
+        release.set()
+
+    assert time.monotonic() - started < 2
+    assert report['status'] == 'partial'
+    assert report['domains']['marketing']['status'] == 'timeout'
+    assert sorted(refreshed) == ['collection', 'logistics', 'sales']
+    for data_type in refreshed:
+        assert report['domains'][data_type]['status'] == 'updated'
+
+
+def test_failed_domain_is_reported(manager, monkeypatch):
+    def fail():
+        manager._refresh_runs['sales'] = {'error': 'boom'}
+        return {}
+
+    monkeypatch.setattr(manager, 'refresh_sales_data', fail)
+
+    report = manager.refresh_all_data(domains=['sales'])
+
+    assert report['status'] == 'failed'
+    assert report['domains']['sales']['status'] == 'failed'
+    assert report['domains']['sales']['error'] == 'boom'
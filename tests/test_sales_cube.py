@@ -0,0 +1,179 @@
+"""
+Sales cube answers checked against a plain pandas groupby over the rows
+"""
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.sales_aggregation import metric_names
+from data.sales_cube import SalesCube
+from data.sales_store import SalesStore
+
+METRICS = [
+    ('IMPORTE_TOTAL', 'sum'), ('IMPORTE_TOTAL', 'count'), ('IMPORTE_TOTAL', 'mean'),
+    ('IMPORTE_TOTAL', 'min'), ('IMPORTE_TOTAL', 'max'), ('CANTIDAD', 'sum')
+]
+
+QUERIES = {
+    'total': ([], None),
+    'seller': (['VENDEDOR'], None),
+    'month': (['AÑO', 'MES'], None),
+    'month and seller': (['AÑO', 'MES', 'VENDEDOR'], {'VENDEDOR': ['v1', 'v3']}),
+    'line': (['LINEA'], {'LINEA': {'regex': '^L[12]$'}}),
+    'article': (['ARTICULO'], {'AÑO': [2024]}),
+    'client type': (['AÑO', 'MES', 'TIPO_CLIENTE'], None),
+    'client under filter': (['CLIENTE'], {'VENDEDOR': ['v2'], 'LINEA': ['L1', 'L3']}),
+    'filtered total': ([], {'MES': {'min': 1, 'max': 2}})
+}
+
+
+def rows_of(raw):
+    """Raw rows typed the way a reader would: dates parsed, calendar columns derived"""
+    rows = raw.copy()
+    rows['FECHA'] = pd.to_datetime(rows['FECHA'])
+    rows['AÑO'] = rows['FECHA'].dt.year
+    rows['MES'] = rows['FECHA'].dt.month
+    return rows
+
+
+def select(rows, filters):
+    """Apply a filter specification with plain boolean masks"""
+    mask = pd.Series(True, index=rows.index)
+    for field, value in (filters or {}).items():
+        if isinstance(value, list):
+            mask &= rows[field].isin(value)
+        elif 'regex' in value:
+            pattern = re.compile(value['regex'])
+            mask &= rows[field].map(lambda v: isinstance(v, str) and bool(pattern.search(v)))
+        else:
+            mask &= rows[field].between(value['min'], value['max'])
+    return rows[mask]
+
+
+def expected(rows, dimensions, metrics, filters=None):
+    """Reference result as a frame sorted by its dimensions"""
+    rows = select(rows, filters)
+    names = metric_names(metrics)
+    if dimensions:
+        result = rows.groupby(dimensions).agg(**{
+            name: pd.NamedAgg(column=column, aggfunc=fn) for name, (column, fn) in zip(names, metrics)
+        }).reset_index()
+    else:
+        result = pd.DataFrame([{name: rows[column].agg(fn) for name, (column, fn) in zip(names, metrics)}])
+    return normalized(result, dimensions)
+
+
+def normalized(frame, dimensions):
+    frame = pd.DataFrame(frame)
+    for column in frame.columns:
+        if column in dimensions and column in ('AÑO', 'MES'):
+            frame[column] = frame[column].astype(float)
+        elif column in dimensions:
+            frame[column] = frame[column].astype(object)
+        else:
+            frame[column] = frame[column].astype(float)
+    return frame.sort_values(dimensions).reset_index(drop=True) if dimensions else frame
+
+
+def answer(cube, store, dimensions, metrics, filters=None):
+    records = cube.answer(filters, dimensions, metrics, store.columns)
+    assert records is not None, 'the cube should cover this query'
+    return normalized(pd.DataFrame(records, columns=dimensions + metric_names(metrics)), dimensions)
+
+
+@pytest.fixture
+def store(raw_sales):
+    return SalesStore.from_frame(raw_sales.copy())
+
+
+@pytest.mark.parametrize('dimensions, filters', list(QUERIES.values()), ids=list(QUERIES))
+def test_cube_matches_a_groupby(raw_sales, store, dimensions, filters):
+    cube = SalesCube.from_store(store)
+
+    result = answer(cube, store, dimensions, METRICS, filters)
+
+    pd.testing.assert_frame_equal(result, expected(rows_of(raw_sales), dimensions, METRICS, filters))
+
+
+@pytest.mark.parametrize('dimensions', [['VENDEDOR'], ['AÑO'], ['AÑO', 'MES'], ['LINEA'], []])
+def test_distinct_clients_match_a_groupby(raw_sales, store, dimensions):
+    cube = SalesCube.from_store(store)
+    metrics = [('CLIENTE', 'nunique'), ('IMPORTE_TOTAL', 'sum')]
+
+    result = answer(cube, store, dimensions, metrics)
+
+    pd.testing.assert_frame_equal(result, expected(rows_of(raw_sales), dimensions, metrics))
+
+
+def test_queries_outside_the_cube_are_declined(store):
+    cube = SalesCube.from_store(store)
+
+    # FECHA and NOMBRE_ASESOR are not cube dimensions
+    assert cube.answer({'FECHA': {'date_range': {'from': '2024-01-01', 'to': '2024-01-31'}}},
+                       ['VENDEDOR'], METRICS, store.columns) is None
+    assert cube.answer(None, ['NOMBRE_ASESOR'], METRICS, store.columns) is None
+    assert cube.answer(None, ['VENDEDOR'], [('NOMBRE_ASESOR', 'nunique')], store.columns) is None
+
+
+def delta_rows(raw, entries):
+    """Delta records shaped like the raw rows"""
+    template = raw.iloc[0].to_dict()
+    return pd.DataFrame([dict(template, **entry) for entry in entries])
+
+
+@pytest.mark.parametrize('merge', ['watermark', 'key'])
+def test_patched_cube_matches_a_groupby_over_the_merged_rows(raw_sales, store, merge):
+    cube = SalesCube.from_store(store)
+    changes = [
+        # A new seller in an existing month, a new month and an undated row (ignored with a watermark)
+        {'FOLIO': 1000, 'FECHA': '2024-03-20', 'VENDEDOR': 'v9', 'CLIENTE': 'c99', 'IMPORTE_TOTAL': 75.5},
+        {'FOLIO': 1001, 'FECHA': '2024-04-02', 'VENDEDOR': 'v1', 'CLIENTE': 'c1', 'IMPORTE_TOTAL': 12.0},
+        {'FOLIO': 1002, 'FECHA': None, 'VENDEDOR': 'v2', 'LINEA': 'L4', 'IMPORTE_TOTAL': 3.0}
+    ]
+    if merge == 'key':
+        # Rewrite an old sale so an earlier month changes too
+        old = raw_sales[raw_sales['FECHA'] == raw_sales['FECHA'].dropna().min()].iloc[0]
+        changes.append(dict(old.to_dict(), IMPORTE_TOTAL=9999.0, VENDEDOR='v4'))
+        delta = delta_rows(raw_sales, changes)
+        merged, months = store.merge(delta.copy(), key='FOLIO')
+        raw_merged = pd.concat([raw_sales[~raw_sales['FOLIO'].isin(delta['FOLIO'])], delta], ignore_index=True)
+    else:
+        since = '2024-03-01'
+        delta = delta_rows(raw_sales, changes)
+        merged, months = store.merge(delta.copy(), since=since)
+        dates = pd.to_datetime(raw_sales['FECHA'])
+        # Rows from the watermark on are replaced by the dated delta rows
+        kept = delta[pd.to_datetime(delta['FECHA']) >= pd.Timestamp(since)]
+        raw_merged = pd.concat([raw_sales[~(dates >= pd.Timestamp(since))], kept], ignore_index=True)
+
+    updated = cube.update(merged, months)
+    rows = rows_of(raw_merged)
+
+    assert len(merged) == len(raw_merged)
+    for dimensions, filters in QUERIES.values():
+        result = answer(updated, merged, dimensions, METRICS, filters)
+        pd.testing.assert_frame_equal(result, expected(rows, dimensions, METRICS, filters))
+    result = answer(updated, merged, ['VENDEDOR'], [('CLIENTE', 'nunique')])
+    pd.testing.assert_frame_equal(result, expected(rows, ['VENDEDOR'], [('CLIENTE', 'nunique')]))
+
+
+def test_update_without_changes_reuses_the_levels(store):
+    cube = SalesCube.from_store(store)
+
+    same = cube.update(store, set())
+
+    assert same.cuboids == cube.cuboids
+    assert same.version == store.version
+
+
+def test_purchases_per_client_count_dated_rows(raw_sales, store):
+    cube = SalesCube.from_store(store)
+    rows = rows_of(raw_sales)
+
+    counts = cube.purchases_per_client()
+
+    reference = rows[rows['FECHA'].notna()].groupby('CLIENTE').size()
+    assert {k: int(v) for k, v in counts.items() if v} == reference.to_dict()
+    assert np.all(counts >= 0)
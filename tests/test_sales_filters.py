@@ -0,0 +1,122 @@
+"""
+Compiled filter plans checked against plain pandas boolean masks
+"""
+import re
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.sales_filters import DateRangePredicate, InPredicate, RangePredicate, compile_filters
+from data.sales_store import SalesStore
+
+
+def reference(store, filters):
+    """Matching row positions computed with one boolean mask over the rows"""
+    rows = store.take()
+    mask = np.ones(len(rows), dtype=bool)
+    for field, value in filters.items():
+        if field not in rows.columns:
+            continue
+        column = rows[field]
+        if pd.api.types.is_numeric_dtype(column) or pd.api.types.is_datetime64_any_dtype(column):
+            values = column
+        else:
+            values = column.astype(object)
+        if isinstance(value, list):
+            mask &= values.isin(value).to_numpy()
+        elif isinstance(value, dict) and 'regex' in value:
+            pattern = re.compile(value['regex'])
+            mask &= np.array([isinstance(v, str) and bool(pattern.search(v)) for v in values], dtype=bool)
+        elif isinstance(value, dict) and 'date_range' in value:
+            dates = value['date_range']
+            mask &= ((values >= pd.Timestamp(dates['from'])) & (values <= pd.Timestamp(dates['to']))).to_numpy()
+        elif isinstance(value, dict):
+            low, high = value.get('min'), value.get('max')
+            if pd.api.types.is_datetime64_any_dtype(values):
+                low = pd.Timestamp(low) if low is not None else None
+                high = pd.Timestamp(high) if high is not None else None
+            elif not pd.api.types.is_numeric_dtype(values):
+                values = values.astype(str)
+            if low is not None:
+                mask &= (values >= low).to_numpy(dtype=bool)
+            if high is not None:
+                mask &= (values <= high).to_numpy(dtype=bool)
+        else:
+            mask &= (values == value).to_numpy(dtype=bool)
+    return np.flatnonzero(mask)
+
+
+FILTERS = {
+    'index': {'CLIENTE': ['c1', 'c3', 'c19']},
+    'exact value': {'LINEA': 'L2'},
+    'date slice': {'FECHA': {'date_range': {'from': '2024-01-10', 'to': '2024-02-15'}}},
+    'date bounds': {'FECHA': {'min': '2023-12-01', 'max': '2024-01-31'}},
+    'numeric range': {'IMPORTE_TOTAL': {'min': 100, 'max': 250}},
+    'open range': {'IMPORTE_TOTAL': {'min': 400}},
+    'dimension range': {'ARTICULO': {'min': 'a2', 'max': 'a5'}},
+    'regex': {'NOMBRE_ASESOR': {'regex': '^(ana|carla)$'}},
+    'date slice and index': {
+        'FECHA': {'date_range': {'from': '2023-12-01', 'to': '2024-03-31'}},
+        'CLIENTE': ['c2', 'c5'],
+        'VENDEDOR': ['v1', 'v2', 'v3']
+    },
+    'every kind': {
+        'FECHA': {'date_range': {'from': '2023-11-15', 'to': '2024-02-29'}},
+        'VENDEDOR': ['v2', 'v4'],
+        'LINEA': {'regex': 'L[13]'},
+        'IMPORTE_TOTAL': {'min': 50},
+        'TIPO_CLIENTE': 'menudeo'
+    },
+    'no match': {'CLIENTE': ['nobody']},
+    'unknown column': {'NO_EXISTE': ['x'], 'VENDEDOR': ['v1']}
+}
+
+
+@pytest.fixture
+def store(raw_sales):
+    return SalesStore.from_frame(raw_sales.copy())
+
+
+@pytest.mark.parametrize('filters', list(FILTERS.values()), ids=list(FILTERS))
+def test_plan_matches_a_boolean_mask(store, filters):
+    assert store.sorted_by_date
+    positions = compile_filters(filters).apply(store)
+    assert positions.tolist() == reference(store, filters).tolist()
+
+
+@pytest.mark.parametrize('filters', list(FILTERS.values()), ids=list(FILTERS))
+def test_plan_without_a_date_slice_matches_a_boolean_mask(store, filters):
+    # Rows out of date order: date ranges are scanned instead of sliced
+    shuffled = SalesStore(store.take().sample(frac=1, random_state=3).reset_index(drop=True))
+    assert not shuffled.sorted_by_date
+    positions = compile_filters(filters).apply(shuffled)
+    assert positions.tolist() == reference(shuffled, filters).tolist()
+
+
+def test_seeds_come_from_the_date_slice_and_the_indexes(store):
+    dates = DateRangePredicate('FECHA', '2024-01-10', '2024-02-15')
+    seeded = dates.seed(store)
+    assert seeded is not None
+    assert seeded.tolist() == reference(store, {'FECHA': {'date_range': {'from': '2024-01-10', 'to': '2024-02-15'}}}).tolist()
+
+    clients = InPredicate('CLIENTE', ['c1', 'c3'])
+    assert clients.seed(store).tolist() == reference(store, {'CLIENTE': ['c1', 'c3']}).tolist()
+
+    # No index on LINEA and no slice for ranges on other columns
+    assert InPredicate('LINEA', ['L1']).seed(store) is None
+    assert RangePredicate('IMPORTE_TOTAL', 1, 2).seed(store) is None
+
+
+def test_predicates_run_cheapest_first():
+    plan = compile_filters({
+        'LINEA': {'regex': 'L'},
+        'IMPORTE_TOTAL': {'min': 1},
+        'VENDEDOR': ['v1', 'v2', 'v3'],
+        'CLIENTE': ['c1']
+    })
+    assert [p.field for p in plan.predicates] == ['CLIENTE', 'VENDEDOR', 'IMPORTE_TOTAL', 'LINEA']
+
+
+def test_no_filters_select_every_row(store):
+    assert compile_filters(None).apply(store).tolist() == list(range(len(store)))
@@ -0,0 +1,150 @@
+"""
+Incremental merge of sales deltas into the columnar store and cube
+"""
+import pandas as pd
+import pytest
+
+from data.sales_cube import SalesCube
+from data.sales_store import SalesStore, frame_to_records
+
+
+def rows(*entries):
+    """Sales records from (folio, fecha, cliente, vendedor, importe) tuples"""
+    return [
+        {'FOLIO': folio, 'FECHA': fecha, 'CLIENTE': cliente, 'VENDEDOR': vendedor, 'IMPORTE_TOTAL': importe}
+        for folio, fecha, cliente, vendedor, importe in entries
+    ]
+
+
+HISTORY = rows(
+    (1, '2024-01-05', 'c1', 'v1', 100.0),
+    (2, '2024-01-20', 'c2', 'v1', 50.0),
+    (3, '2024-02-03', 'c1', 'v2', 70.0),
+    (4, '2024-02-15', 'c3', 'v2', 30.0),
+    (5, None, 'c2', 'v1', 10.0)
+)
+
+
+def records(store):
+    """Row records of a store, in store order"""
+    return frame_to_records(store.take(columns=['FOLIO', 'FECHA', 'CLIENTE', 'VENDEDOR', 'IMPORTE_TOTAL']))
+
+
+def rebuilt(entries):
+    """Store built from scratch over the expected rows"""
+    return SalesStore.from_records(entries)
+
+
+def test_watermark_replaces_rows_from_the_watermark_on():
+    store = SalesStore.from_records(HISTORY)
+    delta = pd.DataFrame(rows(
+        (4, '2024-02-15', 'c3', 'v2', 35.0),
+        (6, '2024-02-20', 'c4', 'v3', 20.0),
+        (7, '2024-01-01', 'c1', 'v1', 999.0)  # before the watermark: ignored
+    ))
+
+    merged, months = store.merge(delta, since='2024-02-01')
+
+    expected = rebuilt([HISTORY[0], HISTORY[1], HISTORY[4]] + rows(
+        (4, '2024-02-15', 'c3', 'v2', 35.0),
+        (6, '2024-02-20', 'c4', 'v3', 20.0)
+    ))
+    assert records(merged) == records(expected)
+    assert months == {(2024, 2)}
+
+
+def test_key_replaces_changed_rows_anywhere_in_the_history():
+    store = SalesStore.from_records(HISTORY)
+    delta = pd.DataFrame(rows(
+        (1, '2024-01-06', 'c1', 'v1', 110.0),
+        (8, '2024-03-01', 'c5', 'v1', 5.0)
+    ))
+
+    merged, months = store.merge(delta, key='FOLIO')
+
+    expected = rebuilt(rows(
+        (1, '2024-01-06', 'c1', 'v1', 110.0),
+        (8, '2024-03-01', 'c5', 'v1', 5.0)
+    ) + HISTORY[1:])
+    assert records(merged) == records(expected)
+    assert months == {(2024, 1), (2024, 3)}
+
+
+def test_merge_leaves_the_original_store_untouched():
+    store = SalesStore.from_records(HISTORY)
+    before = records(store)
+
+    merged, _ = store.merge(pd.DataFrame(rows((9, '2024-02-28', 'c9', 'v9', 1.0))))
+
+    assert records(store) == before
+    assert merged is not store
+    assert merged.version != store.version
+    assert len(merged) == len(store) + 1
+
+
+def test_new_dimension_values_keep_existing_codes():
+    store = SalesStore.from_records(HISTORY)
+    old_codes = store.codes('CLIENTE')
+
+    merged, _ = store.merge(pd.DataFrame(rows((9, '2024-02-28', 'c9', 'v9', 1.0))))
+
+    assert list(merged.dictionary[:len(store.dictionary)]) == list(store.dictionary)
+    assert 'c9' in set(merged.dictionary)
+    assert merged.codes('CLIENTE')[:4].tolist() == old_codes[:4].tolist()
+
+
+def test_rows_stay_sorted_with_undated_rows_last():
+    store = SalesStore.from_records(HISTORY)
+    delta = pd.DataFrame(rows(
+        (10, '2024-01-10', 'c1', 'v1', 1.0),
+        (11, None, 'c1', 'v1', 2.0)
+    ))
+
+    merged, months = store.merge(delta)
+
+    assert merged.sorted_by_date
+    assert merged.column('FOLIO').tolist() == [1, 10, 2, 3, 4, 5, 11]
+    assert months == {(2024, 1), None}
+
+
+@pytest.mark.parametrize('history', [HISTORY[:4], HISTORY], ids=['appended', 'spliced'])
+def test_indexes_follow_the_merged_rows(history):
+    store = SalesStore.from_records(history)
+    delta = rows((12, '2024-03-02', 'c1', 'v4', 8.0))
+    # Appended after a dated history the indexes are extended; otherwise rebuilt
+    merged, _ = store.merge(pd.DataFrame(delta))
+
+    assert merged.has_index('CLIENTE') and merged.has_index('VENDEDOR')
+    positions = merged.lookup('CLIENTE', ['c1'])
+    assert merged.column('FOLIO').iloc[positions].tolist() == [1, 3, 12]
+    assert merged.lookup('VENDEDOR', ['v4']).tolist() == [4]
+    expected = rebuilt(history + delta)
+    assert expected.lookup('CLIENTE', ['c1']).tolist() == positions.tolist()
+
+
+def test_merge_into_an_empty_store_builds_from_the_delta():
+    empty = SalesStore.from_frame(pd.DataFrame())
+
+    merged, months = empty.merge(pd.DataFrame(HISTORY[:2]))
+
+    assert records(merged) == records(rebuilt(HISTORY[:2]))
+    assert months == {(2024, 1)}
+
+
+def test_cube_update_matches_a_rebuilt_cube():
+    store = SalesStore.from_records(HISTORY)
+    cube = SalesCube.from_store(store)
+    delta = pd.DataFrame(rows(
+        (4, '2024-02-15', 'c3', 'v2', 35.0),
+        (6, '2024-02-20', 'c4', 'v3', 20.0)
+    ))
+
+    merged, months = store.merge(delta, since='2024-02-01')
+    updated = cube.update(merged, months)
+    fresh = SalesCube.from_store(merged)
+
+    metrics = [('IMPORTE_TOTAL', 'sum'), ('IMPORTE_TOTAL', 'count')]
+    for dimensions in (['VENDEDOR'], ['AÑO', 'MES'], []):
+        expected = fresh.answer(None, dimensions, metrics, merged.columns, sort_by='sum')
+        assert expected is not None
+        assert updated.answer(None, dimensions, metrics, merged.columns, sort_by='sum') == pytest.approx(expected)
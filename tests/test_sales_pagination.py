@@ -0,0 +1,109 @@
+"""
+Cursor pagination over filtered sales rows
+"""
+import base64
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data.data_manager import DataManager
+from data.sales_aggregation import AggregationCache
+from data.sales_filters import normalize_filters
+from data.sales_pagination import CursorError, clamp_page_size, decode_cursor, encode_cursor, page_slice
+from data.sales_store import SalesStore
+
+
+def test_cursor_round_trip():
+    cursor = encode_cursor('abc123', 41, '{"CLIENTE": ["c1"]}')
+    assert decode_cursor(cursor, 'abc123', '{"CLIENTE": ["c1"]}') == 41
+
+
+def test_cursor_is_bound_to_the_filters():
+    cursor = encode_cursor('abc123', 41, '{"CLIENTE": ["c1"]}')
+    with pytest.raises(CursorError, match='otros filtros'):
+        decode_cursor(cursor, 'abc123', '{"CLIENTE": ["c2"]}')
+
+
+def test_cursor_expires_with_the_snapshot():
+    cursor = encode_cursor('abc123', 41, '{}')
+    with pytest.raises(CursorError, match='actualizaron'):
+        decode_cursor(cursor, 'def456', '{}')
+
+
+@pytest.mark.parametrize('cursor', ['not-base64!', base64.urlsafe_b64encode(b'{"s": "abc123"}').decode(), ''])
+def test_malformed_cursor(cursor):
+    with pytest.raises(CursorError, match='inválido'):
+        decode_cursor(cursor, 'abc123', '{}')
+
+
+def test_cursor_snapshot_is_shared_by_stores_of_one_generation():
+    frame = pd.DataFrame({'IMPORTE_TOTAL': [1.0, 2.0]})
+    first, second = SalesStore(frame), SalesStore(frame)
+    # Versions are per process; unpublished stores are only valid where they live
+    assert DataManager._cursor_snapshot(first) != DataManager._cursor_snapshot(second)
+
+    first.snapshot_hash = second.snapshot_hash = 'feedbeef'
+    assert DataManager._cursor_snapshot(first) == DataManager._cursor_snapshot(second) == 'feedbeef'
+
+
+@pytest.mark.parametrize('limit, expected', [(None, 100), (0, 1), (-3, 1), (50, 50), (5000, 1000), ('20', 20)])
+def test_clamp_page_size(limit, expected):
+    assert clamp_page_size(limit, 100, 1000) == expected
+
+
+def test_page_slice_walks_every_position_once():
+    positions = np.array([2, 3, 5, 8, 13, 21, 34])
+    pages = []
+    after, has_more = None, True
+    while has_more:
+        page, has_more = page_slice(positions, after, 3)
+        pages.append(page.tolist())
+        after = page[-1]
+    assert pages == [[2, 3, 5], [8, 13, 21], [34]]
+
+
+def test_page_slice_resumes_after_a_position_that_no_longer_matches():
+    positions = np.array([2, 3, 5, 8, 13])
+    page, has_more = page_slice(positions, 4, 2)
+    assert page.tolist() == [5, 8]
+    assert has_more
+
+
+def test_page_slice_exact_last_page_has_no_more():
+    page, has_more = page_slice(np.array([1, 2, 3, 4]), 2, 2)
+    assert page.tolist() == [3, 4]
+    assert not has_more
+
+
+@pytest.mark.parametrize('after', [None, -1, 0, 3, 8, 9, 20])
+def test_page_slice_over_every_row_matches_the_array(after):
+    page, has_more = page_slice(range(10), after, 4)
+    expected, expected_more = page_slice(np.arange(10), after, 4)
+    assert page.tolist() == expected.tolist()
+    assert has_more == expected_more
+
+
+def test_unfiltered_rows_are_not_memoized(manager):
+    store = SalesStore(pd.DataFrame({'CLIENTE': ['c1', 'c2', 'c1'], 'IMPORTE_TOTAL': [1.0, 2.0, 3.0]}))
+
+    first = manager.get_sales_rows(limit=2, store=store)
+    second = manager.get_sales_rows(cursor=first['next_cursor'], limit=2, store=store)
+
+    assert [row['IMPORTE_TOTAL'] for row in first['data'] + second['data']] == [1.0, 2.0, 3.0]
+    assert second['next_cursor'] is None
+    assert manager._position_cache.get(store.version, normalize_filters(None)) is None
+    assert manager._aggregation_cache.get(store.version, ('rows', normalize_filters(None))) is None
+
+
+def test_position_cache_is_bounded_by_bytes():
+    cache = AggregationCache(max_size=10, max_bytes=100)
+    cache.put(1, 'a', np.arange(5))       # 40 bytes
+    cache.put(1, 'b', np.arange(5))
+    cache.put(1, 'c', np.arange(5))       # over 100: 'a' is evicted
+    assert cache.get(1, 'a') is None
+    assert cache.get(1, 'b') is not None and cache.get(1, 'c') is not None
+
+    cache.put(1, 'd', np.arange(50))      # larger than the whole budget: not kept
+    assert cache.get(1, 'd') is None
+    assert cache.get(1, 'c') is not None
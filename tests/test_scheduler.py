@@ -0,0 +1,99 @@
+"""
+Refresh schedules: interval and cron expression parsing
+"""
+import datetime
+
+import pytest
+
+from endpoints.scheduler import CronSchedule, IntervalSchedule, parse_schedule
+
+
+def at(*args) -> float:
+    """Epoch time of a local date and time"""
+    return datetime.datetime(*args).timestamp()
+
+
+def when(timestamp: float) -> datetime.datetime:
+    return datetime.datetime.fromtimestamp(timestamp)
+
+
+def test_parse_schedule_accepts_seconds_and_cron():
+    interval = parse_schedule('900')
+    assert isinstance(interval, IntervalSchedule)
+    assert interval.next(100.0) == 1000.0
+
+    cron = parse_schedule(' 0 2 * * * ')
+    assert isinstance(cron, CronSchedule)
+    assert str(cron) == 'cron 0 2 * * *'
+
+
+@pytest.mark.parametrize('spec', ['0', '-5'])
+def test_interval_must_be_positive(spec):
+    with pytest.raises(ValueError):
+        parse_schedule(spec)
+
+
+@pytest.mark.parametrize('expression', [
+    '* * * *',          # four fields
+    '60 * * * *',       # minute out of range
+    '* 24 * * *',       # hour out of range
+    '* * 0 * *',        # day out of range
+    '* * * 13 *',       # month out of range
+    '5-1 * * * *',      # reversed range
+    '*/0 * * * *',      # zero step
+    'a * * * *'
+])
+def test_invalid_cron_expressions(expression):
+    with pytest.raises(ValueError):
+        CronSchedule(expression)
+
+
+def test_fields_expand_values_ranges_and_steps():
+    schedule = CronSchedule('*/15 8-10 1,15 * 1-5')
+    assert schedule.minutes == {0, 15, 30, 45}
+    assert schedule.hours == {8, 9, 10}
+    assert schedule.days == {1, 15}
+    # Monday to Friday in Python's numbering
+    assert schedule.weekdays == {0, 1, 2, 3, 4}
+
+
+def test_sunday_is_zero_or_seven():
+    assert CronSchedule('0 0 * * 0').weekdays == {6}
+    assert CronSchedule('0 0 * * 7').weekdays == {6}
+
+
+def test_next_runs_strictly_after_the_given_time():
+    schedule = CronSchedule('*/15 * * * *')
+    assert when(schedule.next(at(2024, 3, 5, 10, 7, 30))) == datetime.datetime(2024, 3, 5, 10, 15)
+    # A matching minute is not repeated
+    assert when(schedule.next(at(2024, 3, 5, 10, 15))) == datetime.datetime(2024, 3, 5, 10, 30)
+
+
+def test_next_rolls_over_to_the_following_day():
+    schedule = CronSchedule('30 2 * * *')
+    assert when(schedule.next(at(2024, 3, 5, 2, 29))) == datetime.datetime(2024, 3, 5, 2, 30)
+    assert when(schedule.next(at(2024, 3, 5, 2, 30))) == datetime.datetime(2024, 3, 6, 2, 30)
+    assert when(schedule.next(at(2024, 12, 31, 23, 0))) == datetime.datetime(2025, 1, 1, 2, 30)
+
+
+def test_next_skips_to_a_matching_weekday():
+    # 2024-03-08 is a Friday: the next weekday run is on Monday
+    schedule = CronSchedule('0 6 * * 1-5')
+    assert when(schedule.next(at(2024, 3, 8, 7, 0))) == datetime.datetime(2024, 3, 11, 6, 0)
+
+
+def test_restricted_day_and_weekday_match_either():
+    # The 20th or any Sunday, whichever comes first
+    schedule = CronSchedule('0 0 20 * 0')
+    assert when(schedule.next(at(2024, 3, 5, 12, 0))) == datetime.datetime(2024, 3, 10, 0, 0)
+    assert when(schedule.next(at(2024, 3, 18, 12, 0))) == datetime.datetime(2024, 3, 20, 0, 0)
+
+
+def test_leap_day_schedule():
+    schedule = CronSchedule('0 0 29 2 *')
+    assert when(schedule.next(at(2024, 3, 1, 0, 0))) == datetime.datetime(2028, 2, 29, 0, 0)
+
+
+def test_expression_that_never_matches():
+    with pytest.raises(ValueError):
+        CronSchedule('0 0 31 2 *').next(at(2024, 1, 1, 0, 0))
@@ -0,0 +1,136 @@
+"""
+Atomic, generation-numbered snapshot publishing and rollback
+"""
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from data.serialization import Serializer
+from data.snapshots import POINTER_FILE, SnapshotStore, content_hash, read_json_snapshot, write_json_snapshot
+
+
+def writer(payload):
+    """Write function filling a generation with a JSON payload"""
+    return lambda directory: write_json_snapshot(directory, payload)
+
+
+def read(meta):
+    return json.loads(read_json_snapshot(meta['path']))
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SnapshotStore(str(tmp_path / 'sales'), keep=2, grace=0)
+
+
+def test_nothing_published(store):
+    assert store.current() is None
+    assert store.generations() == []
+    assert store.validate() is None
+    assert store.rollback() is None
+
+
+def test_publish_writes_a_generation_and_moves_the_pointer(store):
+    meta = store.publish(writer({'a': 1}), 'h1', extra={'etag': 'x'})
+
+    assert meta['generation'] == 1
+    current = store.current()
+    assert current['generation'] == 1
+    assert current['hash'] == 'h1'
+    assert current['etag'] == 'x'
+    assert read(current) == {'a': 1}
+
+
+def test_same_content_is_not_republished(store):
+    store.publish(writer({'a': 1}), 'h1')
+
+    assert store.publish(writer({'a': 1}), 'h1') is None
+    assert store.generations() == [1]
+    assert store.publish(writer({'a': 1}), 'h1', force=True)['generation'] == 2
+
+
+def test_failed_write_leaves_the_current_generation(store):
+    store.publish(writer({'a': 1}), 'h1')
+
+    def fail(directory):
+        write_json_snapshot(directory, {'a': 2})
+        raise RuntimeError('disk full')
+
+    with pytest.raises(RuntimeError):
+        store.publish(fail, 'h2')
+
+    assert store.current()['generation'] == 1
+    assert store.generations() == [1]
+    # No temporary directory is left behind
+    assert sorted(os.listdir(store.root)) == [POINTER_FILE, 'gen-000001']
+
+
+def test_validate_marks_the_current_generation_fresh(store):
+    store.publish(writer({'a': 1}), 'h1')
+
+    meta = store.validate()
+
+    assert meta['generation'] == 1
+    assert store.current()['validated'] == meta['validated']
+
+
+def test_rollback_to_the_previous_and_to_a_given_generation(store):
+    for i in range(3):
+        store.publish(writer({'a': i}), f"h{i}")
+
+    meta = store.rollback()
+    assert meta['generation'] == 2
+    assert meta['hash'] == 'h1'
+    assert store.current()['generation'] == 2
+    assert read(store.current()) == {'a': 1}
+    # Restored data counts as freshly confirmed
+    assert store.current()['validated'] == meta['validated']
+
+    assert store.rollback(3)['generation'] == 3
+    assert store.rollback(99) is None
+
+
+def test_publish_after_rollback_gets_a_new_number(store):
+    store.publish(writer({'a': 1}), 'h1')
+    store.publish(writer({'a': 2}), 'h2')
+    store.rollback(1)
+
+    # Content of the rolled-back-from generation is published again as a new one
+    assert store.publish(writer({'a': 2}), 'h2')['generation'] == 3
+
+
+def test_prune_keeps_the_newest_and_the_previous_generation(store):
+    for i in range(5):
+        store.publish(writer({'a': i}), f"h{i}")
+
+    assert store.generations() == [4, 5]
+
+
+def test_prune_keeps_generations_replaced_within_the_grace_period(tmp_path):
+    store = SnapshotStore(str(tmp_path / 'sales'), keep=1, grace=3600)
+    for i in range(4):
+        store.publish(writer({'a': i}), f"h{i}")
+
+    assert store.generations() == [1, 2, 3, 4]
+
+    store.grace = 0
+    store.publish(writer({'a': 9}), 'h9')
+    assert store.generations() == [4, 5]
+
+
+def test_snapshots_written_with_another_compression_still_load(tmp_path):
+    directory = str(tmp_path)
+    write_json_snapshot(directory, {'a': 1}, Serializer(compression='gzip'))
+
+    assert json.loads(read_json_snapshot(directory)) == {'a': 1}
+
+
+def test_content_hash_is_equal_for_equal_content():
+    assert content_hash({'a': [1, 2]}) == content_hash({'a': [1, 2]})
+    assert content_hash({'a': [1, 2]}) != content_hash({'a': [2, 1]})
+
+    frame = pd.DataFrame({'x': [1, 2], 'y': ['a', 'b']})
+    assert content_hash(frame) == content_hash(frame.copy())
+    assert content_hash(frame) != content_hash(frame.rename(columns={'y': 'z'}))
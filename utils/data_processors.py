@@ -7,12 +7,12 @@ from typing import Dict, Any, List, Optional, Union
 
 logger = logging.getLogger(__name__)
 
-def process_marketing_data(data: Union[Dict[str, Any], str, bytes]) -> Dict[str, Any]:
+def process_marketing_data(data: Union[Dict[str, Any], List[Dict[str, Any]], str, bytes]) -> Dict[str, Any]:
     """
     Process marketing data from source format to internal format
     
     Args:
-        data: Raw marketing data (JSON, CSV, or Excel)
+        data: Raw marketing data (JSON, list of records, CSV, or Excel)
         
     Returns:
         Processed marketing data dictionary
@@ -22,6 +22,10 @@ def process_marketing_data(data: Union[Dict[str, Any], str, bytes]) -> Dict[str,
         if isinstance(data, dict):
             return data
         
+        # If data is a list of records (e.g. the pages of a paginated endpoint)
+        if isinstance(data, list):
+            return _convert_marketing_df_to_dict(pd.DataFrame(data))
+        
         # Convert to string if bytes
         if isinstance(data, bytes):
             data = data.decode('utf-8')
@@ -94,12 +98,12 @@ def _convert_marketing_df_to_dict(df: pd.DataFrame) -> Dict[str, Any]:
     
     return result
 
-def process_sales_data(data: Union[Dict[str, Any], str, bytes]) -> Dict[str, Any]:
+def process_sales_data(data: Union[Dict[str, Any], List[Dict[str, Any]], str, bytes]) -> Dict[str, Any]:
     """
     Process sales data from source format to internal format
     
     Args:
-        data: Raw sales data (JSON, CSV, or Excel)
+        data: Raw sales data (JSON, list of records, CSV, or Excel)
         
     Returns:
         Processed sales data dictionary
@@ -109,6 +113,10 @@ def process_sales_data(data: Union[Dict[str, Any], str, bytes]) -> Dict[str, Any
         if isinstance(data, dict):
             return data
         
+        # If data is a list of records (e.g. the pages of a paginated endpoint)
+        if isinstance(data, list):
+            return _convert_sales_df_to_dict(pd.DataFrame(data))
+        
         # Convert to string if bytes
         if isinstance(data, bytes):
             data = data.decode('utf-8')
@@ -212,12 +220,12 @@ def _convert_sales_df_to_dict(df: pd.DataFrame) -> Dict[str, Any]:
     
     return result
 
-def process_logistics_data(data: Union[Dict[str, Any], str, bytes]) -> Dict[str, Any]:
+def process_logistics_data(data: Union[Dict[str, Any], List[Dict[str, Any]], str, bytes]) -> Dict[str, Any]:
     """
     Process logistics data from source format to internal format
     
     Args:
-        data: Raw logistics data (JSON, CSV, or Excel)
+        data: Raw logistics data (JSON, list of records, CSV, or Excel)
         
     Returns:
         Processed logistics data dictionary
@@ -227,6 +235,10 @@ def process_logistics_data(data: Union[Dict[str, Any], str, bytes]) -> Dict[str,
         if isinstance(data, dict):
             return data
         
+        # If data is a list of records (e.g. the pages of a paginated endpoint)
+        if isinstance(data, list):
+            return _convert_logistics_df_to_dict(pd.DataFrame(data))
+        
         # Convert to string if bytes
         if isinstance(data, bytes):
             data = data.decode('utf-8')
@@ -395,12 +407,12 @@ def _convert_logistics_df_to_dict(df: pd.DataFrame) -> Dict[str, Any]:
     
     return result
 
-def process_collection_data(data: Union[Dict[str, Any], str, bytes]) -> Dict[str, Any]:
+def process_collection_data(data: Union[Dict[str, Any], List[Dict[str, Any]], str, bytes]) -> Dict[str, Any]:
     """
     Process collection data from source format to internal format
     
     Args:
-        data: Raw collection data (JSON, CSV, or Excel)
+        data: Raw collection data (JSON, list of records, CSV, or Excel)
         
     Returns:
         Processed collection data dictionary
@@ -410,6 +422,10 @@ def process_collection_data(data: Union[Dict[str, Any], str, bytes]) -> Dict[str
         if isinstance(data, dict):
             return data
         
+        # If data is a list of records (e.g. the pages of a paginated endpoint)
+        if isinstance(data, list):
+            return _convert_collection_df_to_dict(pd.DataFrame(data))
+        
         # Convert to string if bytes
         if isinstance(data, bytes):
             data = data.decode('utf-8')